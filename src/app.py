@@ -1,14 +1,36 @@
+import atexit
+import os
+import time
+from typing import TYPE_CHECKING, Tuple, Optional
+
 import streamlit as st
-import pandas as pd
-import joblib
-import numpy as np
-from typing import Tuple, Optional
-from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import LabelEncoder
 
-# --- IMPORTAÇÕES DAS SUAS ABSTRAÇÕES ---
-from config import MODEL_FILE, LABEL_ENCODER_FILE
-from transformers import MtransGrouper, CalcGrouper, RoundingTransformer
+from config import (
+    ARTEFATO_MMAP_DIR,
+    REFERENCIA_DRIFT_FILE,
+    ESTADO_DRIFT_APP,
+    MODEL_FILE,
+    LABEL_ENCODER_FILE,
+    AUDITORIA_DIR,
+)
+
+# pandas, NumPy, sklearn e os módulos do modelo são importados só quando usados
+# (carregamento dos artefatos e predição), para a tela aparecer sem esperar por eles
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import LabelEncoder
+    from tabela_probabilidades import TabelaProbabilidades
+    from monitor_drift import MonitorDrift
+    from atribuicoes import ExplicadorFloresta
+    from cenarios import SimuladorCenarios
+    from registro_modelos import RegistroModelos, VersaoModelo
+    from auditoria import AuditoriaPredicoes
+
+# O estado do monitor de drift é gravado a cada N predições ou T segundos, não em toda predição
+SALVAR_DRIFT_A_CADA = 50
+INTERVALO_SALVAMENTO_DRIFT = 30.0
 
 # -------------------------------------------------------------------
 # Configuração da Página
@@ -71,28 +93,223 @@ def local_css():
 # -------------------------------------------------------------------
 # Carregamento de Artefatos
 # -------------------------------------------------------------------
-@st.cache_resource
-def carregar_artefatos() -> Tuple[Optional[Pipeline], Optional[LabelEncoder]]:
+def carregar_versao_modelo() -> Tuple["Pipeline", "LabelEncoder"]:
     """
     Carrega o pipeline e o label encoder.
-    Retorna (None, None) em caso de falha.
+    Usa o artefato memory-map (artefato_mmap.py) quando ele existe e está
+    íntegro; caso contrário, o joblib do pipeline completo.
+    """
+    from artefatos import carregar_artefatos as carregar_artefatos_modelo
+    from artefato_mmap import carregar_artefato_mmap, MANIFESTO
+    from instrumentacao import instrumentar_se_ativo
+
+    inicio = time.perf_counter()
+    if (ARTEFATO_MMAP_DIR / MANIFESTO).exists():
+        try:
+            pipeline, le = carregar_artefato_mmap()
+            print(f"⏱️ Artefatos memory-map carregados em {time.perf_counter() - inicio:.3f}s")
+            return instrumentar_se_ativo(pipeline), le
+        except Exception as e:
+            print(f"⚠️ Artefato memory-map ignorado: {e}")
+
+    pipeline, le = carregar_artefatos_modelo()
+    print(f"⏱️ Artefatos joblib carregados em {time.perf_counter() - inicio:.3f}s")
+    return instrumentar_se_ativo(pipeline), le
+
+
+@st.cache_resource
+def carregar_registro() -> "RegistroModelos":
+    """
+    Registro das versões do modelo (registro_modelos.py): carrega a versão
+    publicada e observa os arquivos do modelo, trocando para a nova versão
+    sem reiniciar o app. Se ainda não há modelo publicado (ou ele é inválido),
+    o registro fica sem versão e o observador carrega a primeira publicada.
     """
+    from artefato_mmap import MANIFESTO
+    from registro_modelos import RegistroModelos
+
+    registro = RegistroModelos(
+        carregar_versao_modelo,
+        arquivos=(MODEL_FILE, LABEL_ENCODER_FILE, ARTEFATO_MMAP_DIR / MANIFESTO),
+        caminho_referencia=REFERENCIA_DRIFT_FILE,
+    )
     try:
-        model = joblib.load(MODEL_FILE)
-        encoder = joblib.load(LABEL_ENCODER_FILE)
-        return model, encoder
+        registro.carregar()
     except Exception as e:
-        st.error(f"Erro crítico ao carregar artefatos: {e}")
-        return None, None
+        print(f"⚠️ Nenhum modelo carregado, aguardando publicação: {e}")
+    registro.iniciar_observador()
+    return registro
+
+
+def versao_modelo() -> Optional["VersaoModelo"]:
+    """
+    Versão do modelo em uso. Cada predição pega a versão uma única vez, então
+    termina com ela mesmo que uma nova seja publicada no meio.
+    Sem versão carregada, tenta carregar os arquivos atuais; None se falhar.
+    """
+    registro = carregar_registro()
+    if not registro.versoes():
+        try:
+            registro.carregar()
+        except Exception as e:
+            st.error(f"Erro crítico ao carregar artefatos: {e}")
+            return None
+    return registro.atual()
+
+
+# Os recursos derivados do modelo são criados por versão; a anterior continua
+# em cache para as predições que começaram antes da troca
+@st.cache_resource(max_entries=2)
+def carregar_tabela(identificador: str) -> Optional["TabelaProbabilidades"]:
+    """
+    Abre a tabela pré-calculada de probabilidades, se existir e tiver sido
+    gerada do mesmo arquivo de modelo da versão (não do publicado agora).
+    Sem a tabela (ou com a tabela de outro modelo) o app usa apenas o pipeline.
+    """
+    from tabela_probabilidades import TabelaProbabilidades
+
+    versao = carregar_registro().versao(identificador)
+    if versao is None or versao.hash_de(MODEL_FILE) is None:
+        return None
+    try:
+        return TabelaProbabilidades.carregar(hash_modelo=versao.hash_de(MODEL_FILE))
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+@st.cache_resource(max_entries=2)
+def carregar_explicador(identificador: str) -> Optional["ExplicadorFloresta"]:
+    """Explicador das predições da versão do modelo (None se indisponível)."""
+    from atribuicoes import ExplicadorFloresta
+
+    versao = carregar_registro().versao(identificador)
+    if versao is None:
+        return None
+    try:
+        return ExplicadorFloresta(versao.pipeline)
+    except (KeyError, ValueError) as e:
+        print(f"⚠️ Atribuições desativadas: {e}")
+        return None
+
+
+@st.cache_resource(max_entries=2)
+def carregar_simulador(identificador: str) -> Optional["SimuladorCenarios"]:
+    """Simulador dos cenários "e se" (usa a tabela pré-calculada se houver)."""
+    from cenarios import SimuladorCenarios
+
+    versao = carregar_registro().versao(identificador)
+    if versao is None:
+        return None
+    try:
+        return SimuladorCenarios(versao.pipeline, versao.le, carregar_tabela(identificador))
+    except ValueError as e:
+        print(f"⚠️ Cenários desativados: {e}")
+        return None
+
+
+def estado_drift(identificador: str):
+    """Arquivo dos contadores de drift do app para a versão do modelo."""
+    return ESTADO_DRIFT_APP.with_name(f"{ESTADO_DRIFT_APP.stem}_{identificador}.json")
+
+
+@st.cache_resource(max_entries=2)
+def carregar_monitor_drift(identificador: str) -> Optional["MonitorDrift"]:
+    """
+    Monitor de drift das entradas da versão do modelo, contra a referência
+    carregada com ela, com os contadores persistidos em estado_drift(identificador)
+    a cada SALVAR_DRIFT_A_CADA predições ou INTERVALO_SALVAMENTO_DRIFT segundos
+    e no encerramento. None se a versão não tem referência.
+    """
+    from monitor_drift import MonitorDrift
+
+    versao = carregar_registro().versao(identificador)
+    if versao is None or versao.referencia_drift is None:
+        return None
+    try:
+        monitor = MonitorDrift(
+            versao.referencia_drift,
+            caminho_estado=estado_drift(identificador),
+            salvar_a_cada=SALVAR_DRIFT_A_CADA,
+            intervalo_salvamento=INTERVALO_SALVAMENTO_DRIFT,
+        )
+        # Linhas contadas depois da última gravação
+        atexit.register(monitor.salvar_pendente)
+        return monitor
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Monitor de drift desativado: {e}")
+        return None
+
+
+@st.cache_resource
+def iniciar_metricas() -> None:
+    """
+    Com OBESIDADE_INSTRUMENTACAO=1 e OBESIDADE_METRICAS_PORTA definida, serve
+    as métricas de latência por etapa em /metrics (Prometheus) e /metrics.json.
+    """
+    from instrumentacao import instrumentacao_ativa, iniciar_servidor_metricas
+
+    porta = os.environ.get("OBESIDADE_METRICAS_PORTA")
+    if instrumentacao_ativa() and porta:
+        try:
+            iniciar_servidor_metricas(int(porta), os.environ.get("OBESIDADE_METRICAS_ENDERECO", "127.0.0.1"))
+            print(f"✅ Métricas em http://127.0.0.1:{porta}/metrics")
+        except OSError as e:
+            print(f"⚠️ Servidor de métricas não iniciado: {e}")
+
+
+@st.cache_resource
+def iniciar_auditoria() -> Optional["AuditoriaPredicoes"]:
+    """
+    Registro de auditoria das predições em AUDITORIA_DIR. A gravação dos
+    arquivos Parquet roda em uma thread de fundo; a fila é esvaziada no
+    encerramento do processo.
+    """
+    from auditoria import AuditoriaPredicoes
+
+    try:
+        return AuditoriaPredicoes(AUDITORIA_DIR).iniciar()
+    except OSError as e:
+        print(f"⚠️ Auditoria das predições desativada: {e}")
+        return None
+
 
+def painel_operador() -> None:
+    """
+    Com OBESIDADE_OPERADOR=1, mostra na barra lateral as versões do modelo em
+    memória e um botão para voltar instantaneamente à anterior (reverter).
+    """
+    if os.environ.get("OBESIDADE_OPERADOR") != "1":
+        return
+    registro = carregar_registro()
+    with st.sidebar:
+        st.subheader("Operação do modelo")
+        if st.button("Reverter para a versão anterior", disabled=len(registro.versoes()) < 2):
+            try:
+                versao = registro.reverter()
+                st.success(f"Modelo revertido para {versao.identificador}")
+            except ValueError as e:
+                st.error(str(e))
+        versoes = registro.versoes()
+        if not versoes:
+            st.warning("Nenhuma versão carregada")
+            return
+        st.caption(f"Em uso: {versoes[0].identificador}")
+        if len(versoes) > 1:
+            st.caption("Anteriores: " + ", ".join(v.identificador for v in versoes[1:]))
+
+
+def calcular_probabilidades(df_input: "pd.DataFrame", versao: "VersaoModelo") -> "np.ndarray":
+    """Consulta a tabela pré-calculada e recorre ao pipeline fora do domínio."""
+    from instrumentacao import REGISTRO
 
-pipeline_raw, le_raw = carregar_artefatos()
-if pipeline_raw is None or le_raw is None:
-    st.error("O sistema não pôde iniciar porque os modelos não foram encontrados.")
-    st.stop()
+    tabela = carregar_tabela(versao.identificador)
+    if tabela is not None:
+        with REGISTRO.medir("app/tabela", "consultar", len(df_input)):
+            probabilidades, validos = tabela.consultar(df_input)
+        if validos.all():
+            return probabilidades
+    return versao.pipeline.predict_proba(df_input)
 
-pipeline: Pipeline = pipeline_raw
-le: LabelEncoder = le_raw
 
 local_css()
 
@@ -126,6 +343,31 @@ MAPA_TRADUCOES_DISPLAY = {
     },
     "tue": {0: "0-2h", 1: "3-5h", 2: "5h+"},
 }
+
+# Rótulo de cada campo do modelo e o mapa de tradução das suas respostas
+NOMES_CAMPOS_DISPLAY = {
+    "genero": ("Gênero", "genero"),
+    "idade": ("Idade", None),
+    "historico_familiar": ("Histórico familiar de obesidade", "sim_nao"),
+    "favc": ("Consumo de comida calórica", "sim_nao"),
+    "fcvc": ("Consumo de vegetais", "fcvc"),
+    "ncp": ("Refeições por dia", "ncp"),
+    "caec": ("Come entre refeições", "frequencia"),
+    "ch20": ("Consumo de água", "ch20"),
+    "faf": ("Atividade física", "faf"),
+    "tue": ("Uso de telas", "tue"),
+    "calc": ("Consumo de álcool", "frequencia"),
+    "mtrans": ("Meio de transporte", "mtrans"),
+}
+
+
+def exibir_resposta(campo, valor) -> str:
+    """Resposta do usuário como aparece no formulário."""
+    mapa = MAPA_TRADUCOES_DISPLAY.get(NOMES_CAMPOS_DISPLAY.get(campo, (campo, None))[1], {})
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return str(mapa.get(valor, valor))
+
 # -------------------------------------------------------------------
 # Layout e Coleta de Inputs
 # -------------------------------------------------------------------
@@ -243,19 +485,60 @@ col_btn_1, col_btn_2, col_btn_3 = st.columns([1, 2, 1])
 
 with col_btn_2:
     if st.button("Calcular Classificação", width="stretch"):
+        versao = versao_modelo()
         if None in inputs_usuario.values() or not nome_usuario:
             st.warning("Preencha todos os campos.")
+        elif versao is None:
+            st.error("O sistema não pôde calcular porque os modelos não foram encontrados.")
         else:
+            import numpy as np
+            import pandas as pd
+            from artefatos import alinhar_colunas_modelo
+            from instrumentacao import REGISTRO
+
+            pipeline, le = versao.pipeline, versao.le
             try:
                 # 1. ALINHAMENTO AUTOMÁTICO (Recupera a ordem do Modelo)
-                colunas_modelo = list(pipeline.feature_names_in_)
-                df_completo = pd.DataFrame([inputs_usuario])
-                df_input = df_completo.reindex(columns=colunas_modelo)
+                with REGISTRO.medir("app/montar_entrada", "transform", 1):
+                    df_completo = pd.DataFrame([inputs_usuario])
+                    df_input = alinhar_colunas_modelo(df_completo, pipeline)
 
                 # 2. Execução da Predição
-                previsao = pipeline.predict(df_input)
-                st.session_state.probabilidade = pipeline.predict_proba(df_input)
+                with REGISTRO.medir("app/predicao", "total", 1):
+                    probabilidade = calcular_probabilidades(df_input, versao)
+                previsao = pipeline.classes_[np.argmax(probabilidade, axis=1)]
+                monitor_drift = carregar_monitor_drift(versao.identificador)
+                if monitor_drift is not None:
+                    monitor_drift.atualizar(df_input)
+                auditoria = iniciar_auditoria()
+                if auditoria is not None:
+                    auditoria.registrar(
+                        df_input,
+                        probabilidade,
+                        le.inverse_transform(previsao),
+                        versao.identificador,
+                        classes=le.inverse_transform(pipeline.classes_),
+                    )
+
+                # 3. Campos que mais pesaram na classe prevista
+                explicador = carregar_explicador(versao.identificador)
+                st.session_state.atribuicoes = (
+                    explicador.principais(df_input, n=5, classes=np.argmax(probabilidade, axis=1))
+                    if explicador is not None
+                    else None
+                )
+
+                # 4. Mudanças de hábito que mais reduzem o risco de obesidade
+                simulador = carregar_simulador(versao.identificador)
+                if simulador is not None:
+                    with REGISTRO.medir("app/cenarios", "total", 1):
+                        st.session_state.cenarios = simulador.melhores(df_input, n=5)
+                else:
+                    st.session_state.cenarios = None
+
+                st.session_state.probabilidade = probabilidade
                 st.session_state.resultado_classe = le.inverse_transform(previsao)[0]
+                st.session_state.classes = le.classes_
                 st.session_state.inputs_validados = df_input
                 st.session_state.show_results = True
 
@@ -266,6 +549,8 @@ with col_btn_2:
 # Exibição dos Resultados
 # -------------------------------------------------------------------
 if st.session_state.show_results:
+    import pandas as pd
+
     st.markdown("---")
     res_classe = st.session_state.resultado_classe.replace("_", " ").title()
 
@@ -281,7 +566,7 @@ if st.session_state.show_results:
     c_res, c_data = st.columns(2)
     with c_res:
         st.subheader("Distribuição de risco")
-        df_prob = pd.DataFrame(st.session_state.probabilidade, columns=le.classes_).T
+        df_prob = pd.DataFrame(st.session_state.probabilidade, columns=st.session_state.classes).T
         df_prob.columns = ["Probabilidade"]
         st.dataframe(df_prob.style.format("{:.2%}"), width="stretch")
 
@@ -290,3 +575,49 @@ if st.session_state.show_results:
         df_display = st.session_state.inputs_validados.T.reset_index()
         df_display.columns = ["Variável", "Valor"]
         st.dataframe(df_display.astype(str), width="stretch")
+
+    atribuicoes = st.session_state.get("atribuicoes")
+    if atribuicoes is not None and len(atribuicoes):
+        st.subheader("O que mais pesou no resultado")
+        df_atribuicoes = pd.DataFrame(
+            {
+                "Hábito": [NOMES_CAMPOS_DISPLAY.get(c, (c,))[0] for c in atribuicoes["campo"]],
+                "Sua resposta": [
+                    exibir_resposta(c, v) for c, v in zip(atribuicoes["campo"], atribuicoes["valor"])
+                ],
+                # Pontos percentuais somados (ou tirados) da probabilidade da classe
+                "Efeito na probabilidade": [f"{c * 100:+.1f} p.p." for c in atribuicoes["contribuicao"]],
+            }
+        )
+        st.dataframe(df_atribuicoes, width="stretch", hide_index=True)
+
+    cenarios = st.session_state.get("cenarios")
+    if cenarios is not None and len(cenarios[1]):
+        risco_atual, melhores = cenarios
+        st.subheader("E se você mudar alguns hábitos?")
+        st.caption(f"Risco de obesidade com as respostas atuais: {risco_atual:.1%}")
+        df_cenarios = pd.DataFrame(
+            {
+                "Mudança": [
+                    "; ".join(
+                        f"{NOMES_CAMPOS_DISPLAY.get(campo, (campo,))[0]}: "
+                        f"{exibir_resposta(campo, de)} → {exibir_resposta(campo, para)}"
+                        for campo, de, para in alteracoes
+                    )
+                    for alteracoes in melhores["alteracoes"]
+                ],
+                "Risco de obesidade": [f"{r:.1%}" for r in melhores["risco"]],
+                "Efeito no risco": [f"{-r * 100:.1f} p.p." for r in melhores["reducao"]],
+            }
+        )
+        st.dataframe(df_cenarios, width="stretch", hide_index=True)
+
+# Com a tela já desenhada, carrega o modelo e a tabela para que a primeira
+# predição não precise esperar por eles
+versao_carregada = versao_modelo()
+painel_operador()
+if versao_carregada is not None:
+    carregar_tabela(versao_carregada.identificador)
+    carregar_explicador(versao_carregada.identificador)
+    carregar_simulador(versao_carregada.identificador)
+iniciar_metricas()
@@ -0,0 +1,282 @@
+"""
+Formato de artefato do modelo para carregamento rápido via memory-map.
+
+O Random Forest do pipeline é convertido para a FlorestaVetorizada e os seus
+arrays (features, limiares, filhos e probabilidades dos nós) são gravados como
+.npy sem compressão. No carregamento eles são abertos com np.load(mmap_mode="r"):
+nada é desserializado, as páginas são lidas do disco sob demanda e todos os
+processos do mesmo host (réplicas do streamlit, workers da pontuação em lote)
+compartilham a mesma cópia no page cache.
+
+Conteúdo do diretório:
+- preprocessor.joblib: o ColumnTransformer ajustado (pequeno);
+- label_encoder.joblib;
+- floresta.joblib: a FlorestaVetorizada (ou subclasse) sem os arrays (parâmetros e classes_);
+- <array>.npy: um arquivo por array da floresta;
+- manifest.json: tamanho e sha256 de cada arquivo e hash, tamanho e mtime do
+  modelo de origem.
+
+Exemplo:
+    python src/artefato_mmap.py exportar
+    python src/artefato_mmap.py verificar
+    python src/artefato_mmap.py medir
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+from sklearn.pipeline import Pipeline
+
+from config import MODEL_FILE, LABEL_ENCODER_FILE, ARTEFATO_MMAP_DIR, SRC_DIR
+from artefatos import carregar_artefatos, hash_arquivo
+from floresta_vetorizada import FlorestaVetorizada
+
+VERSAO_FORMATO = 1
+MANIFESTO = "manifest.json"
+ARRAYS_FLORESTA = (
+    "feature_",
+    "limiar_",
+    "filhos_",
+    "nan_esquerda_",
+    "valores_",
+    "raizes_",
+    "profundidades_",
+)
+
+
+def exportar_artefato_mmap(
+    pipeline, le, diretorio=ARTEFATO_MMAP_DIR, caminho_modelo=MODEL_FILE
+) -> dict:
+    """
+    Grava o pipeline e o label encoder no formato memory-map em `diretorio`.
+    O diretório é montado em uma pasta temporária e trocado ao final, então
+    um leitor nunca encontra o artefato pela metade.
+
+    Retorna o manifesto gravado.
+    """
+    diretorio = Path(diretorio)
+    modelo = pipeline.named_steps["model"]
+    if not isinstance(modelo, FlorestaVetorizada):
+        modelo = FlorestaVetorizada.de_floresta(modelo)
+
+    diretorio.parent.mkdir(parents=True, exist_ok=True)
+    temporario = Path(tempfile.mkdtemp(dir=diretorio.parent, prefix=".tmp_mmap_"))
+    # mkdtemp cria a pasta só para o dono; os workers podem rodar com outro usuário
+    temporario.chmod(0o755)
+
+    esqueleto = type(modelo)(
+        tamanho_bloco=modelo.tamanho_bloco, limite_simultaneo=modelo.limite_simultaneo
+    )
+    for nome, valor in vars(modelo).items():
+        if nome.endswith("_") and nome not in ARRAYS_FLORESTA:
+            setattr(esqueleto, nome, valor)
+    for nome in ARRAYS_FLORESTA:
+        np.save(temporario / f"{nome}.npy", np.ascontiguousarray(getattr(modelo, nome)))
+
+    joblib.dump(pipeline.named_steps["preprocessor"], temporario / "preprocessor.joblib")
+    joblib.dump(le, temporario / "label_encoder.joblib")
+    joblib.dump(esqueleto, temporario / "floresta.joblib")
+
+    origem = Path(caminho_modelo).stat() if caminho_modelo else None
+    manifesto = {
+        "versao": VERSAO_FORMATO,
+        "hash_modelo": hash_arquivo(caminho_modelo) if caminho_modelo else None,
+        "bytes_modelo": origem.st_size if origem else None,
+        "mtime_modelo_ns": origem.st_mtime_ns if origem else None,
+        "arvores": int(modelo.n_arvores_),
+        "nos": int(len(modelo.feature_)),
+        "arquivos": {
+            arquivo.name: {"bytes": arquivo.stat().st_size, "sha256": hash_arquivo(arquivo)}
+            for arquivo in sorted(temporario.iterdir())
+        },
+    }
+    with open(temporario / MANIFESTO, "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2)
+
+    # Os processos que já abriram o artefato anterior continuam lendo os
+    # arquivos antigos até fechá-los (o memory-map mantém o inode vivo)
+    if diretorio.exists():
+        antigo = diretorio.with_name(f".antigo_{diretorio.name}_{os.getpid()}")
+        os.replace(diretorio, antigo)
+        os.replace(temporario, diretorio)
+        shutil.rmtree(antigo)
+    else:
+        os.replace(temporario, diretorio)
+
+    return manifesto
+
+
+def verificar_artefato_mmap(diretorio=ARTEFATO_MMAP_DIR, completo=True, caminho_modelo=MODEL_FILE) -> list:
+    """
+    Confere os arquivos do artefato contra o manifesto e retorna a lista de
+    problemas encontrados (vazia se estiver íntegro).
+
+    completo=False confere apenas a existência e o tamanho dos arquivos (sem
+    ler o conteúdo), o suficiente na inicialização do app; completo=True
+    também recalcula o sha256 de cada arquivo.
+    caminho_modelo: se existir, confere se o artefato foi exportado dele. Sem
+    completo, tamanho e mtime iguais aos do manifesto bastam; o sha256 do
+    modelo só é calculado se eles mudaram.
+    """
+    diretorio = Path(diretorio)
+    with open(diretorio / MANIFESTO, "r", encoding="utf-8") as f:
+        manifesto = json.load(f)
+
+    problemas = []
+    if manifesto.get("versao") != VERSAO_FORMATO:
+        problemas.append(f"versão do formato {manifesto.get('versao')} != {VERSAO_FORMATO}")
+
+    for nome, info in manifesto["arquivos"].items():
+        arquivo = diretorio / nome
+        if not arquivo.exists():
+            problemas.append(f"{nome}: arquivo ausente")
+        elif arquivo.stat().st_size != info["bytes"]:
+            problemas.append(f"{nome}: {arquivo.stat().st_size} bytes, esperado {info['bytes']}")
+        elif completo and hash_arquivo(arquivo) != info["sha256"]:
+            problemas.append(f"{nome}: sha256 diferente do manifesto")
+
+    if caminho_modelo is not None and manifesto.get("hash_modelo") and Path(caminho_modelo).exists():
+        origem = Path(caminho_modelo).stat()
+        mesmo_arquivo = (origem.st_size, origem.st_mtime_ns) == (
+            manifesto.get("bytes_modelo"),
+            manifesto.get("mtime_modelo_ns"),
+        )
+        if (completo or not mesmo_arquivo) and hash_arquivo(caminho_modelo) != manifesto["hash_modelo"]:
+            problemas.append(f"exportado de outro modelo que não '{caminho_modelo}'")
+    return problemas
+
+
+def carregar_artefato_mmap(diretorio=ARTEFATO_MMAP_DIR, completo=False, caminho_modelo=MODEL_FILE):
+    """
+    Abre o artefato e retorna (pipeline, le), como artefatos.carregar_artefatos.
+    O passo "model" do pipeline é a FlorestaVetorizada com os arrays em
+    memory-map (somente leitura); as probabilidades são idênticas às do
+    RandomForestClassifier original.
+
+    Levanta ValueError se o artefato não passar na verificação.
+    """
+    diretorio = Path(diretorio)
+    problemas = verificar_artefato_mmap(diretorio, completo, caminho_modelo)
+    if problemas:
+        raise ValueError(
+            f"Artefato '{diretorio}' inválido: {'; '.join(problemas)}. "
+            "Execute novamente: python src/artefato_mmap.py exportar"
+        )
+
+    floresta = joblib.load(diretorio / "floresta.joblib")
+    for nome in ARRAYS_FLORESTA:
+        setattr(floresta, nome, np.load(diretorio / f"{nome}.npy", mmap_mode="r"))
+
+    pipeline = Pipeline(
+        steps=[
+            ("preprocessor", joblib.load(diretorio / "preprocessor.joblib")),
+            ("model", floresta),
+        ]
+    )
+    return pipeline, joblib.load(diretorio / "label_encoder.joblib")
+
+
+_SCRIPT_MEDICAO = """
+import sys, time
+sys.path.insert(0, {src!r})
+inicio_imports = time.perf_counter()
+import joblib, numpy, pandas, sklearn.ensemble, sklearn.pipeline
+imports = time.perf_counter() - inicio_imports
+{linha_exemplo}
+inicio = time.perf_counter()
+{carregar}
+carregado = time.perf_counter() - inicio
+pipeline.predict_proba(X)
+total = time.perf_counter() - inicio
+# VmHWM é o pico de RSS deste processo (o ru_maxrss herda o do processo pai)
+with open("/proc/self/status") as status:
+    rss = [int(l.split()[1]) for l in status if l.startswith("VmHWM")][0] / 1024
+print(imports, carregado, total, rss)
+"""
+
+_CARREGAR = {
+    "joblib": "from artefatos import carregar_artefatos\npipeline, le = carregar_artefatos()",
+    "mmap": "from artefato_mmap import carregar_artefato_mmap\npipeline, le = carregar_artefato_mmap()",
+}
+
+_LINHA_EXEMPLO = (
+    "import pandas as pd\n"
+    "X = pd.DataFrame([{'genero': 'feminino', 'idade': 21.0, 'historico_familiar': 'sim', "
+    "'favc': 'nao', 'fcvc': 2.0, 'ncp': 3.0, 'caec': 'as_vezes', 'ch20': 2.0, 'faf': 0.0, "
+    "'tue': 1.0, 'calc': 'nunca', 'mtrans': 'transporte_publico'}])\n"
+)
+
+
+def medir_inicializacao(repeticoes=5) -> dict:
+    """
+    Mede, em processos novos, o tempo de carregamento dos artefatos, o tempo
+    até a primeira predição e o pico de memória (RSS) do processo, para o
+    joblib.load do pipeline completo e para o artefato memory-map. O tempo de
+    importação das bibliotecas (igual nos dois formatos) é medido à parte.
+    Os valores reportados são a mediana das repetições.
+    """
+    resultados = {}
+    print(
+        f"{'formato':>8} {'imports (s)':>12} {'carregar (s)':>13} "
+        f"{'até 1ª predição (s)':>20} {'RSS pico (MB)':>14}"
+    )
+    for formato, carregar in _CARREGAR.items():
+        script = _SCRIPT_MEDICAO.format(
+            src=str(SRC_DIR), linha_exemplo=_LINHA_EXEMPLO, carregar=carregar
+        )
+        medidas = []
+        for _ in range(repeticoes):
+            saida = subprocess.run(
+                [sys.executable, "-c", script], capture_output=True, text=True, check=True
+            ).stdout.split()
+            medidas.append([float(valor) for valor in saida[-4:]])
+        imports, carregado, total, rss = np.median(medidas, axis=0)
+        resultados[formato] = {
+            "imports_s": imports,
+            "carregar_s": carregado,
+            "primeira_predicao_s": total,
+            "rss_mb": rss,
+        }
+        print(f"{formato:>8} {imports:>12.3f} {carregado:>13.3f} {total:>20.3f} {rss:>14.1f}")
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Artefato do modelo em formato memory-map.")
+    parser.add_argument("acao", choices=["exportar", "verificar", "medir"])
+    parser.add_argument("--diretorio", type=Path, default=ARTEFATO_MMAP_DIR)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.acao == "exportar":
+        pipeline, le = carregar_artefatos(MODEL_FILE, LABEL_ENCODER_FILE)
+        inicio = time.perf_counter()
+        manifesto = exportar_artefato_mmap(pipeline, le, args.diretorio)
+        tamanho = sum(info["bytes"] for info in manifesto["arquivos"].values())
+        print(
+            f"✅ Artefato exportado em {time.perf_counter() - inicio:.2f}s: "
+            f"{manifesto['arvores']} árvores, {manifesto['nos']} nós, "
+            f"{tamanho / 2**20:.1f} MB -> '{args.diretorio}'"
+        )
+    elif args.acao == "verificar":
+        problemas = verificar_artefato_mmap(args.diretorio, completo=True)
+        for problema in problemas:
+            print(f"❌ {problema}")
+        if problemas:
+            sys.exit(1)
+        print("✅ Artefato íntegro.")
+    else:
+        medir_inicializacao(args.repeticoes)
+
+
+if __name__ == "__main__":
+    main()
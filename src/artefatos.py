@@ -0,0 +1,41 @@
+import hashlib
+from typing import Tuple
+
+import joblib
+import pandas as pd
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import LabelEncoder
+
+from config import MODEL_FILE, LABEL_ENCODER_FILE
+
+
+def carregar_artefatos(
+    caminho_modelo=MODEL_FILE, caminho_encoder=LABEL_ENCODER_FILE
+) -> Tuple[Pipeline, LabelEncoder]:
+    """
+    Carrega o pipeline treinado e o label encoder salvos pelo pipeline_treino.py.
+
+    Diferente da versão do app, não trata erros: quem chama decide como
+    reportar a falha (mensagem no streamlit, código de saída no CLI, etc).
+    """
+    pipeline = joblib.load(caminho_modelo)
+    encoder = joblib.load(caminho_encoder)
+    return pipeline, encoder
+
+
+def alinhar_colunas_modelo(df: pd.DataFrame, pipeline: Pipeline) -> pd.DataFrame:
+    """
+    Reordena as colunas de df na ordem usada no treinamento do pipeline.
+    Colunas extras são descartadas e colunas ausentes viram NaN.
+    """
+    colunas_modelo = list(pipeline.feature_names_in_)
+    return df.reindex(columns=colunas_modelo)
+
+
+def hash_arquivo(caminho, tamanho_leitura=1 << 20) -> str:
+    """Retorna o sha256 (hex) do conteúdo do arquivo, lido em partes."""
+    sha = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for parte in iter(lambda: f.read(tamanho_leitura), b""):
+            sha.update(parte)
+    return sha.hexdigest()
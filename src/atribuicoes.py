@@ -0,0 +1,168 @@
+"""
+Atribuição de cada predição às respostas do questionário.
+
+Usa as contribuições por caminho da FlorestaVetorizada (em cada divisão de
+cada árvore, a variação das probabilidades do nó para o filho escolhido é
+atribuída à feature da divisão) e soma as colunas de saída do
+ColumnTransformer de volta ao campo original do questionário (por exemplo,
+nom_multi__mtrans_outros e nom_multi__mtrans_transporte_publico viram mtrans).
+
+Para cada linha vale: base + soma das contribuições dos campos = predict_proba.
+O cálculo é vetorizado (todas as linhas e árvores juntas, um nível por vez) e
+leva poucos milissegundos por linha, também em lote.
+
+Exemplo:
+    python src/atribuicoes.py --linhas 5
+    python src/atribuicoes.py --saida dados/atribuicoes.csv
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.pipeline import Pipeline
+
+from config import DADOS_PROCESSADOS
+from artefatos import carregar_artefatos, alinhar_colunas_modelo
+from floresta_vetorizada import FlorestaVetorizada
+from utils import ler_dataset, salvar_dataset
+
+
+def mapear_campos(preprocessor, campos) -> np.ndarray:
+    """
+    Índice (em `campos`) do campo original de cada coluna de saída do
+    ColumnTransformer, pelo output_indices_ de cada ramo e pelo nome da coluna
+    gerada (ramo__campo ou ramo__campo_categoria).
+    """
+    nomes = preprocessor.get_feature_names_out()
+    indice_campo = np.full(len(nomes), -1, dtype=np.intp)
+
+    for ramo, _, colunas in preprocessor.transformers_:
+        fatia = preprocessor.output_indices_.get(ramo, slice(0, 0))
+        for posicao in range(fatia.start, fatia.stop):
+            sufixo = nomes[posicao].removeprefix(f"{ramo}__")
+            candidatos = [c for c in colunas if sufixo == c or sufixo.startswith(f"{c}_")]
+            if not candidatos and len(colunas) == 1:
+                candidatos = list(colunas)
+            if candidatos:
+                indice_campo[posicao] = campos.index(max(candidatos, key=len))
+
+    if (indice_campo < 0).any():
+        sem_campo = [str(nomes[i]) for i in np.flatnonzero(indice_campo < 0)]
+        raise ValueError(f"Colunas do preprocessor sem campo de origem: {sem_campo}")
+    return indice_campo
+
+
+class ExplicadorFloresta:
+    """
+    Explica as predições de um pipeline (preprocessor + floresta) em termos
+    dos campos de entrada do modelo.
+    """
+
+    def __init__(self, pipeline: Pipeline, passo_preprocessor="preprocessor", passo_modelo="model"):
+        modelo = pipeline.named_steps[passo_modelo]
+        if not isinstance(modelo, FlorestaVetorizada):
+            modelo = FlorestaVetorizada.de_floresta(modelo)
+        self.floresta = modelo
+        self.transformacao = pipeline[:-1]
+        self.campos = list(pipeline.feature_names_in_)
+        self.classes_ = modelo.classes_
+
+        indice_campo = mapear_campos(pipeline.named_steps[passo_preprocessor], self.campos)
+        # Matriz (colunas de saída x campos) que soma as colunas de cada campo
+        self._agregacao = np.zeros((len(indice_campo), len(self.campos)))
+        self._agregacao[np.arange(len(indice_campo)), indice_campo] = 1.0
+
+    def explicar(self, df_input: pd.DataFrame):
+        """
+        Retorna (base, contribuicoes): base (n_classes,), ou (linhas, n_classes)
+        na FlorestaCompacta, e contribuicoes com shape (linhas, campos,
+        n_classes), na ordem de self.campos.
+        """
+        X = self.transformacao.transform(df_input)
+        base, contribuicoes = self.floresta.contribuicoes(X)
+        return base, np.einsum("lfc,fk->lkc", contribuicoes, self._agregacao)
+
+    def contribuicoes_classe(self, df_input: pd.DataFrame, classes=None) -> pd.DataFrame:
+        """
+        Contribuição de cada campo para a probabilidade de uma classe por linha
+        (índices em classes_; padrão: a classe prevista), com a mesma ordem e
+        índice de df_input.
+        """
+        base, contribuicoes = self.explicar(df_input)
+        if classes is None:
+            probabilidades = base + contribuicoes.sum(axis=1)
+            classes = np.argmax(probabilidades, axis=1)
+        classes = np.broadcast_to(np.asarray(classes), (len(df_input),))
+        selecionadas = contribuicoes[np.arange(len(df_input)), :, classes]
+        return pd.DataFrame(selecionadas, columns=self.campos, index=df_input.index)
+
+    def principais(self, df_input: pd.DataFrame, n=5, classes=None) -> pd.DataFrame:
+        """
+        Os n campos de maior contribuição (em valor absoluto) de cada linha para
+        a classe prevista (ou `classes`), em formato longo: linha, campo, valor
+        informado e contribuição.
+        """
+        por_campo = self.contribuicoes_classe(df_input, classes)
+        valores = np.abs(por_campo.to_numpy())
+        ordem = np.argsort(-valores, axis=1, kind="stable")[:, :n]
+
+        registros = []
+        for posicao, (linha, campos_linha) in enumerate(zip(por_campo.index, ordem)):
+            for indice in campos_linha:
+                campo = self.campos[indice]
+                registros.append(
+                    {
+                        "linha": linha,
+                        "campo": campo,
+                        "valor": df_input[campo].iloc[posicao],
+                        "contribuicao": float(por_campo.iat[posicao, indice]),
+                    }
+                )
+        return pd.DataFrame(registros)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Atribuição das predições aos campos do questionário.")
+    parser.add_argument("--dados", default=DADOS_PROCESSADOS, help="dataset processado (padrão: %(default)s)")
+    parser.add_argument("--linhas", type=int, default=3, help="linhas exibidas com os principais campos")
+    parser.add_argument("--principais", type=int, default=5)
+    parser.add_argument(
+        "--saida",
+        default=None,
+        help="grava a contribuição de cada campo para a classe prevista de todas as linhas",
+    )
+    args = parser.parse_args()
+
+    pipeline, le = carregar_artefatos()
+    explicador = ExplicadorFloresta(pipeline)
+    df_input = alinhar_colunas_modelo(ler_dataset(args.dados), pipeline)
+
+    indices = np.argmax(pipeline.predict_proba(df_input), axis=1)
+    previstas = le.inverse_transform(pipeline.classes_[indices])
+
+    inicio = time.perf_counter()
+    por_campo = explicador.contribuicoes_classe(df_input, indices)
+    duracao = time.perf_counter() - inicio
+    print(
+        f"⏱️ {len(df_input)} linhas explicadas em {duracao:.2f}s "
+        f"({duracao / len(df_input) * 1000:.3f} ms por linha)"
+    )
+
+    amostra = df_input.head(args.linhas)
+    principais = explicador.principais(amostra, args.principais, indices[: len(amostra)])
+    for linha, classe in zip(amostra.index, previstas):
+        print(f"\nLinha {linha}: {classe}")
+        for _, registro in principais[principais["linha"] == linha].iterrows():
+            print(f"  {registro['campo']:<20} {str(registro['valor']):<20} {registro['contribuicao']:+.3f}")
+
+    if args.saida:
+        saida = por_campo.add_prefix("contrib_")
+        saida.insert(0, "classe_prevista", previstas)
+        salvar_dataset(saida, args.saida)
+        print(f"✅ Atribuições salvas em: {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+"""
+Registro de auditoria das predições.
+
+Cada predição (linha de entrada validada, vetor do predict_proba, classe
+prevista, identificador do modelo e instante) entra em uma fila em memória e
+uma thread de fundo acrescenta cada lote (até `tamanho_lote` registros ou
+`intervalo_gravacao` segundos) como um row group do arquivo Parquet aberto.
+A chamada no caminho da predição só enfileira: se a fila está cheia, espera no
+máximo `espera_maxima` segundos e então descarta o registro, contando o
+descarte. No encerramento do processo (atexit) a fila é gravada.
+
+O arquivo aberto é escrito como .parquet.parcial e rotacionado (fechado com o
+rodapé e renomeado para .parquet) ao passar de `tamanho_arquivo` bytes ou de
+`idade_arquivo` segundos, então quem lê a pasta vê apenas arquivos completos,
+sem um arquivo minúsculo por lote. Um processo morto no meio do caminho perde
+o arquivo ainda aberto e o que estava na fila. Para juntar os arquivos em um
+só, use `exportar`.
+
+Exemplo:
+    python src/auditoria.py resumo
+    python src/auditoria.py exportar --saida /tmp/predicoes.parquet
+"""
+
+import argparse
+import atexit
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import AUDITORIA_DIR
+
+MAX_FILA_PADRAO = 10_000
+TAMANHO_LOTE_PADRAO = 500
+# Segundos máximos que um registro espera na fila antes de ser gravado
+INTERVALO_GRAVACAO_PADRAO = 5.0
+ESPERA_MAXIMA_PADRAO = 0.005
+# Limites da janela de rotação do arquivo aberto
+TAMANHO_ARQUIVO_PADRAO = 64 * 1024 * 1024
+IDADE_ARQUIVO_PADRAO = 300.0
+
+EXTENSAO_PARCIAL = ".parquet.parcial"
+
+_FIM = object()
+
+
+class AuditoriaPredicoes:
+    """
+    Fila de registros de predição com gravação em segundo plano.
+    Use iniciar() antes de registrar() e fechar() (ou o atexit) no fim.
+    """
+
+    def __init__(
+        self,
+        diretorio=AUDITORIA_DIR,
+        max_fila=MAX_FILA_PADRAO,
+        tamanho_lote=TAMANHO_LOTE_PADRAO,
+        intervalo_gravacao=INTERVALO_GRAVACAO_PADRAO,
+        espera_maxima=ESPERA_MAXIMA_PADRAO,
+        tamanho_arquivo=TAMANHO_ARQUIVO_PADRAO,
+        idade_arquivo=IDADE_ARQUIVO_PADRAO,
+    ):
+        self.diretorio = Path(diretorio)
+        self.tamanho_lote = tamanho_lote
+        self.intervalo_gravacao = intervalo_gravacao
+        self.espera_maxima = espera_maxima
+        self.tamanho_arquivo = tamanho_arquivo
+        self.idade_arquivo = idade_arquivo
+        self._fila = queue.Queue(maxsize=max_fila)
+        self._thread = None
+        self._trava = threading.Lock()
+        self.contadores = {"recebidos": 0, "gravados": 0, "descartados": 0, "erros": 0, "arquivos": 0}
+        self._sequencia = 0
+        # Arquivo aberto pela thread de gravação (ParquetWriter, caminho, abertura, linhas)
+        self._escritor = None
+        self._parcial = None
+        self._aberto_em = 0.0
+        self._linhas_arquivo = 0
+
+    def iniciar(self) -> "AuditoriaPredicoes":
+        if self._thread is None:
+            self.diretorio.mkdir(parents=True, exist_ok=True)
+            self._thread = threading.Thread(target=self._gravar_continuamente, name="auditoria", daemon=True)
+            self._thread.start()
+            atexit.register(self.fechar)
+        return self
+
+    def _contar(self, nome, quantidade=1) -> None:
+        with self._trava:
+            self.contadores[nome] += quantidade
+
+    def registrar(self, df_input: pd.DataFrame, probabilidades, classes_previstas, modelo, classes=None) -> bool:
+        """
+        Enfileira uma predição por linha de df_input. probabilidades tem shape
+        (linhas x classes) na ordem de `classes` (nomes). Retorna False se
+        algum registro foi descartado por fila cheia.
+        """
+        instante = datetime.now(timezone.utc)
+        probabilidades = np.asarray(probabilidades, dtype=np.float64)
+        classes = [str(c) for c in classes] if classes is not None else None
+        # Montagem por coluna: DataFrame.to_dict("records") custa ~2 ms por linha
+        colunas = list(df_input.columns)
+        valores = zip(*(df_input[coluna].tolist() for coluna in colunas))
+        registros = [dict(zip(colunas, linha)) for linha in valores]
+        for registro, vetor, classe in zip(registros, probabilidades, np.atleast_1d(classes_previstas)):
+            registro.update(
+                {
+                    "instante": instante,
+                    "modelo": str(modelo),
+                    "classe_prevista": str(classe),
+                    "probabilidades": vetor.tolist(),
+                    "classes": classes,
+                }
+            )
+
+        self._contar("recebidos", len(registros))
+        for posicao, registro in enumerate(registros):
+            try:
+                self._fila.put(registro, timeout=self.espera_maxima)
+            except queue.Full:
+                # A fila continua cheia depois da espera: descarta o resto
+                self._contar("descartados", len(registros) - posicao)
+                return False
+        return True
+
+    def estatisticas(self) -> dict:
+        with self._trava:
+            return {**self.contadores, "na_fila": self._fila.qsize()}
+
+    # ---------------------------------------------------------------
+    # Thread de gravação
+    # ---------------------------------------------------------------
+    def _gravar_continuamente(self) -> None:
+        encerrar = False
+        while not encerrar:
+            lote = []
+            limite = time.monotonic() + self.intervalo_gravacao
+            if self._escritor is not None:
+                # Acorda a tempo de fechar o arquivo que chega à idade máxima
+                limite = min(limite, self._aberto_em + self.idade_arquivo)
+            while len(lote) < self.tamanho_lote:
+                restante = limite - time.monotonic()
+                try:
+                    item = self._fila.get(timeout=max(restante, 0.0)) if restante > 0 else self._fila.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _FIM:
+                    encerrar = True
+                    break
+                lote.append(item)
+
+            if lote:
+                self._gravar_lote(lote)
+            if self._escritor is not None and time.monotonic() - self._aberto_em >= self.idade_arquivo:
+                self._fechar_arquivo()
+        # Registros enfileirados depois do sinal de fim
+        restantes = []
+        while True:
+            try:
+                item = self._fila.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _FIM:
+                restantes.append(item)
+        if restantes:
+            self._gravar_lote(restantes)
+        self._fechar_arquivo()
+
+    def _gravar_lote(self, lote) -> None:
+        """Acrescenta o lote como um row group do arquivo aberto, rotacionando nos limites."""
+        import pyarrow as pa
+
+        try:
+            tabela = pa.Table.from_pylist(lote)
+            if self._escritor is not None and not tabela.schema.equals(self._escritor.schema):
+                try:
+                    # Ex.: coluna só com None no lote, inferida como null
+                    tabela = tabela.select(self._escritor.schema.names).cast(self._escritor.schema)
+                except (KeyError, pa.ArrowInvalid, pa.ArrowNotImplementedError, ValueError):
+                    self._fechar_arquivo()
+            if self._escritor is None:
+                self._abrir_arquivo(tabela.schema)
+            self._escritor.write_table(tabela)
+        except Exception as e:
+            self._contar("erros", len(lote))
+            print(f"⚠️ Falha ao gravar {len(lote)} registros de auditoria: {e}")
+            # Não acrescenta mais nada a um arquivo que pode ter ficado inconsistente
+            self._fechar_arquivo()
+            return
+        self._linhas_arquivo += len(lote)
+        if self._parcial.stat().st_size >= self.tamanho_arquivo:
+            self._fechar_arquivo()
+
+    def _abrir_arquivo(self, schema) -> None:
+        import pyarrow.parquet as pq
+
+        # Ordem de gravação no nome; o pid separa processos que dividem a pasta
+        carimbo = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S_%f")
+        self._sequencia += 1
+        nome = f"predicoes_{carimbo}_{os.getpid()}_{self._sequencia:06d}"
+        self._parcial = self.diretorio / f"{nome}{EXTENSAO_PARCIAL}"
+        self._escritor = pq.ParquetWriter(self._parcial, schema)
+        self._aberto_em = time.monotonic()
+        self._linhas_arquivo = 0
+
+    def _fechar_arquivo(self) -> None:
+        """Fecha o arquivo aberto (rodapé) e o renomeia para .parquet."""
+        if self._escritor is None:
+            return
+        escritor, parcial, linhas = self._escritor, self._parcial, self._linhas_arquivo
+        self._escritor, self._parcial, self._linhas_arquivo = None, None, 0
+        try:
+            escritor.close()
+            if linhas:
+                parcial.rename(parcial.with_name(parcial.name.replace(EXTENSAO_PARCIAL, ".parquet")))
+                self._contar("gravados", linhas)
+                self._contar("arquivos")
+            else:
+                parcial.unlink(missing_ok=True)
+        except Exception as e:
+            parcial.unlink(missing_ok=True)
+            self._contar("erros", linhas)
+            print(f"⚠️ Falha ao fechar o arquivo de auditoria com {linhas} registros: {e}")
+
+    def fechar(self, timeout=10.0) -> None:
+        """
+        Grava o que está na fila e para a thread. Se a gravação não termina em
+        `timeout` segundos, os registros ainda na fila contam como descartados.
+        """
+        if self._thread is None:
+            return
+        thread, self._thread = self._thread, None
+        atexit.unregister(self.fechar)
+        try:
+            # put bloqueante: com a fila cheia, espera a thread abrir espaço
+            self._fila.put(_FIM, timeout=timeout)
+            thread.join(timeout)
+        except queue.Full:
+            pass
+        if thread.is_alive():
+            pendentes = self._fila.qsize()
+            self._contar("descartados", pendentes)
+            print(f"⚠️ Auditoria encerrada sem gravar {pendentes} registros da fila")
+
+
+def ler_auditoria(diretorio=AUDITORIA_DIR) -> pd.DataFrame:
+    """Todos os registros dos arquivos completos da pasta, em ordem de gravação."""
+    diretorio = Path(diretorio)
+    arquivos = sorted(diretorio.glob("predicoes_*.parquet"))
+    parciais = list(diretorio.glob(f"predicoes_*{EXTENSAO_PARCIAL}"))
+    if parciais:
+        # Só sobram de um processo morto durante a gravação de um lote
+        print(f"⚠️ {len(parciais)} arquivo(s) {EXTENSAO_PARCIAL} incompleto(s) ignorado(s) em: {diretorio}")
+    if not arquivos:
+        return pd.DataFrame()
+    return pd.concat([pd.read_parquet(arquivo) for arquivo in arquivos], ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Registro de auditoria das predições.")
+    parser.add_argument("acao", choices=["resumo", "exportar"])
+    parser.add_argument("--diretorio", default=AUDITORIA_DIR)
+    parser.add_argument("--saida", default=None, help="arquivo único com todos os registros (exportar)")
+    args = parser.parse_args()
+
+    df = ler_auditoria(args.diretorio)
+    if df.empty:
+        print(f"⚠️ Nenhum registro de auditoria em: {args.diretorio}")
+        return
+    if args.acao == "resumo":
+        print(f"{len(df)} predições de {df['instante'].min()} a {df['instante'].max()}")
+        print(df.groupby(["modelo", "classe_prevista"]).size().rename("predicoes").to_string())
+    else:
+        if not args.saida:
+            parser.error("exportar precisa de --saida")
+        from utils import salvar_dataset
+
+        salvar_dataset(df, args.saida)
+        print(f"✅ {len(df)} registros salvos em: {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+"""
+Avaliação do modelo com intervalos de confiança.
+
+O relatório do pipeline_treino.py vem de uma única divisão 80/20. Este
+módulo mede quanto as métricas variam de duas formas:
+- validação cruzada estratificada (k folds) no dataset inteiro, com os folds
+  treinados em paralelo em um pool de processos;
+- bootstrap das predições no conjunto de teste do modelo treinado: cada par
+  (classe real, classe prevista) vira um código 0..K²-1 e cada reamostragem
+  é uma indexação desses códigos seguida de um bincount, o que dá de uma vez
+  o tensor de matrizes de confusão (reamostragens x K x K). Precisão, recall
+  e F1 de todas as reamostragens saem de operações NumPy sobre esse tensor.
+
+O relatório (dados/relatorio_avaliacao_<data>.txt) tem precisão/recall/F1
+por classe com o intervalo de confiança do bootstrap e a média ± desvio dos
+folds, além dos tempos de cada etapa.
+
+Exemplo:
+    python src/avaliacao.py
+    python src/avaliacao.py --folds 10 --reamostragens 5000 --processos 4
+    python src/avaliacao.py --estimador hgb --confianca 0.9
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import StratifiedKFold
+
+from config import DADOS_TREINO, RELATORIO_AVALIACAO
+from pipeline_treino import (
+    ESTIMADORES,
+    PARAMETROS_DIVISAO,
+    criar_pipeline,
+    diretorio_artefato,
+    estimador_configurado,
+    executar_treinamento,
+    preprocessar,
+    salvar_relatorio,
+    separar_treino_teste,
+)
+
+N_FOLDS_PADRAO = 5
+REAMOSTRAGENS_PADRAO = 2_000
+CONFIANCA_PADRAO = 0.95
+
+# Elementos (reamostragens x linhas) indexados por bloco no bootstrap; limita
+# a memória dos códigos reamostrados a ~64 MB (int64)
+ELEMENTOS_POR_BLOCO = 8_000_000
+
+
+# ---------------------------------------------------------------
+# Métricas a partir de matrizes de confusão
+# ---------------------------------------------------------------
+def _dividir(numerador, denominador) -> np.ndarray:
+    """Divisão com 0 onde o denominador é 0 (zero_division=0 do sklearn)."""
+    return np.divide(numerador, denominador, out=np.zeros(np.broadcast(numerador, denominador).shape), where=denominador > 0)
+
+
+def metricas_confusao(confusao: np.ndarray) -> dict:
+    """
+    Precisão, recall e F1 por classe e acurácia de uma ou várias matrizes de
+    confusão (..., K, K), com linhas = classe real e colunas = prevista.
+    As métricas por classe têm shape (..., K); a acurácia, (...).
+    """
+    acertos = np.diagonal(confusao, axis1=-2, axis2=-1).astype(np.float64)
+    reais = confusao.sum(axis=-1)
+    previstas = confusao.sum(axis=-2)
+    return {
+        "precisao": _dividir(acertos, previstas),
+        "recall": _dividir(acertos, reais),
+        "f1": _dividir(2 * acertos, reais + previstas),
+        "acuracia": acertos.sum(axis=-1) / confusao.sum(axis=(-2, -1)),
+    }
+
+
+def codificar_pares(y_real, y_previsto, n_classes) -> np.ndarray:
+    """Código único de cada par (real, previsto): real * K + previsto."""
+    return np.asarray(y_real, dtype=np.int64) * n_classes + np.asarray(y_previsto, dtype=np.int64)
+
+
+def confusoes_bootstrap(codigos, n_classes, reamostragens=REAMOSTRAGENS_PADRAO, semente=42) -> np.ndarray:
+    """
+    Tensor (reamostragens x K x K) com a matriz de confusão de cada
+    reamostragem com reposição das linhas de teste.
+    """
+    rng = np.random.default_rng(semente)
+    n_linhas = len(codigos)
+    celulas = n_classes * n_classes
+    confusoes = np.empty((reamostragens, celulas), dtype=np.int64)
+
+    tamanho_bloco = max(1, ELEMENTOS_POR_BLOCO // max(n_linhas, 1))
+    for inicio in range(0, reamostragens, tamanho_bloco):
+        fim = min(inicio + tamanho_bloco, reamostragens)
+        indices = rng.integers(0, n_linhas, size=(fim - inicio, n_linhas))
+        # Desloca o código de cada reamostragem para a sua faixa de K² posições
+        deslocados = codigos[indices] + (np.arange(fim - inicio) * celulas)[:, None]
+        confusoes[inicio:fim] = np.bincount(deslocados.ravel(), minlength=(fim - inicio) * celulas).reshape(-1, celulas)
+    return confusoes.reshape(reamostragens, n_classes, n_classes)
+
+
+def intervalos(valores: np.ndarray, confianca=CONFIANCA_PADRAO):
+    """Intervalo percentil (inferior, superior) ao longo do eixo das reamostragens."""
+    alfa = (1 - confianca) / 2
+    return np.quantile(valores, alfa, axis=0), np.quantile(valores, 1 - alfa, axis=0)
+
+
+def avaliar_bootstrap(y_real, y_previsto, classes, reamostragens=REAMOSTRAGENS_PADRAO, confianca=CONFIANCA_PADRAO, semente=42):
+    """
+    Retorna (tabela, acuracia): tabela com precisão/recall/F1 de cada classe
+    (e a média macro) nas predições originais e o intervalo de confiança do
+    bootstrap; acuracia = (valor, inferior, superior).
+    """
+    n_classes = len(classes)
+    codigos = codificar_pares(y_real, y_previsto, n_classes)
+    original = metricas_confusao(np.bincount(codigos, minlength=n_classes * n_classes).reshape(n_classes, n_classes))
+    amostras = metricas_confusao(confusoes_bootstrap(codigos, n_classes, reamostragens, semente))
+
+    colunas = {}
+    for metrica in ("precisao", "recall", "f1"):
+        valores = np.append(original[metrica], original[metrica].mean())
+        inferior, superior = intervalos(
+            np.column_stack([amostras[metrica], amostras[metrica].mean(axis=1)]), confianca
+        )
+        colunas[metrica] = valores
+        colunas[f"{metrica}_inf"] = inferior
+        colunas[f"{metrica}_sup"] = superior
+    colunas["suporte"] = np.append(np.bincount(np.asarray(y_real), minlength=n_classes), len(codigos))
+
+    tabela = pd.DataFrame(colunas, index=[*map(str, classes), "macro avg"])
+    inferior, superior = intervalos(amostras["acuracia"], confianca)
+    return tabela, (float(original["acuracia"]), float(inferior), float(superior))
+
+
+# ---------------------------------------------------------------
+# Validação cruzada
+# ---------------------------------------------------------------
+def _treinar_fold(estimador, hiperparametros, X_treino, y_treino, X_validacao):
+    """Ajusta o pipeline em um fold. Retorna (predições na validação, tempo de ajuste)."""
+    pipeline = criar_pipeline(hiperparametros, estimador=estimador)
+    inicio = time.perf_counter()
+    pipeline.fit(X_treino, y_treino)
+    tempo = time.perf_counter() - inicio
+    return pipeline.predict(X_validacao), tempo
+
+
+def validacao_cruzada(X, y, n_classes, estimador, hiperparametros=None, n_folds=N_FOLDS_PADRAO, processos=None, semente=42):
+    """
+    Validação cruzada estratificada com um fold por tarefa do pool de
+    processos. Retorna (confusoes, tempos): as matrizes de confusão dos folds
+    (folds x K x K) e o tempo de ajuste de cada fold.
+    """
+    hiperparametros = dict(hiperparametros or {})
+    if "n_jobs" in ESTIMADORES[estimador]["hiperparametros"]:
+        # Um núcleo por fold: o paralelismo fica entre os folds
+        hiperparametros["n_jobs"] = 1
+    divisor = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=semente)
+    processos = min(processos or os.cpu_count() or 1, n_folds)
+
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        tarefas = [
+            (
+                y[indices_validacao],
+                executor.submit(
+                    _treinar_fold,
+                    estimador,
+                    hiperparametros,
+                    X.iloc[indices_treino],
+                    y[indices_treino],
+                    X.iloc[indices_validacao],
+                ),
+            )
+            for indices_treino, indices_validacao in divisor.split(X, y)
+        ]
+        confusoes, tempos = [], []
+        for y_validacao, tarefa in tarefas:
+            y_previsto, tempo = tarefa.result()
+            codigos = codificar_pares(y_validacao, y_previsto, n_classes)
+            confusoes.append(np.bincount(codigos, minlength=n_classes * n_classes).reshape(n_classes, n_classes))
+            tempos.append(tempo)
+    return np.stack(confusoes), tempos
+
+
+def resumir_folds(confusoes, classes) -> pd.DataFrame:
+    """Média e desvio padrão de precisão/recall/F1 por classe (e macro) entre os folds."""
+    metricas = metricas_confusao(confusoes)
+    colunas = {}
+    for metrica in ("precisao", "recall", "f1"):
+        valores = np.column_stack([metricas[metrica], metricas[metrica].mean(axis=1)])
+        colunas[f"{metrica}_media"] = valores.mean(axis=0)
+        colunas[f"{metrica}_desvio"] = valores.std(axis=0, ddof=1) if len(valores) > 1 else 0.0
+    return pd.DataFrame(colunas, index=[*map(str, classes), "macro avg"])
+
+
+# ---------------------------------------------------------------
+# Relatório
+# ---------------------------------------------------------------
+def executar_avaliacao(
+    caminho_dados=DADOS_TREINO,
+    estimador=None,
+    n_folds=N_FOLDS_PADRAO,
+    reamostragens=REAMOSTRAGENS_PADRAO,
+    confianca=CONFIANCA_PADRAO,
+    processos=None,
+    semente=42,
+) -> dict:
+    """
+    Validação cruzada no dataset processado e bootstrap das predições de
+    teste do modelo do armazenamento (treinado se ainda não existir, sem
+    publicar). Retorna as tabelas, acurácias e tempos.
+    """
+    estimador = estimador or estimador_configurado()
+    df_processado, _ = preprocessar(caminho_dados)
+    X_treino, X_teste, y_treino, y_teste, le = separar_treino_teste(df_processado)
+    X = pd.concat([X_treino, X_teste])
+    y = np.concatenate([y_treino, y_teste])
+    n_classes = len(le.classes_)
+    tempos = {}
+
+    inicio = time.perf_counter()
+    meta = executar_treinamento(caminho_dados, estimador=estimador, publicar=False)
+    pipeline = joblib.load(diretorio_artefato(meta["modelo"]) / "pipeline.joblib")
+    y_previsto = pipeline.predict(X_teste)
+    tempos["modelo_e_predicao_teste"] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    confusoes, tempos_folds = validacao_cruzada(
+        X, y, n_classes, estimador, meta["hiperparametros"], n_folds, processos, semente
+    )
+    tempos["validacao_cruzada"] = time.perf_counter() - inicio
+    tempos["ajuste_por_fold"] = tempos_folds
+
+    inicio = time.perf_counter()
+    tabela_bootstrap, acuracia_teste = avaliar_bootstrap(
+        y_teste, y_previsto, le.classes_, reamostragens, confianca, semente
+    )
+    tempos["bootstrap"] = time.perf_counter() - inicio
+
+    acuracias_folds = metricas_confusao(confusoes)["acuracia"]
+    return {
+        "estimador": estimador,
+        "modelo": meta["modelo"],
+        "n_folds": n_folds,
+        "reamostragens": reamostragens,
+        "confianca": confianca,
+        "bootstrap": tabela_bootstrap,
+        "folds": resumir_folds(confusoes, le.classes_),
+        "acuracia_teste": acuracia_teste,
+        "acuracia_folds": (float(acuracias_folds.mean()), float(acuracias_folds.std(ddof=1))),
+        "tempos": tempos,
+    }
+
+
+def formatar_avaliacao(resultado) -> str:
+    nivel = f"{resultado['confianca']:.0%}"
+    valor, inferior, superior = resultado["acuracia_teste"]
+    media, desvio = resultado["acuracia_folds"]
+    tempos = resultado["tempos"]
+
+    bootstrap = resultado["bootstrap"]
+    por_classe = pd.DataFrame(
+        {
+            metrica: [
+                f"{v:.3f} [{i:.3f}, {s:.3f}]"
+                for v, i, s in zip(bootstrap[metrica], bootstrap[f"{metrica}_inf"], bootstrap[f"{metrica}_sup"])
+            ]
+            for metrica in ("precisao", "recall", "f1")
+        },
+        index=bootstrap.index,
+    )
+    por_classe["suporte"] = bootstrap["suporte"]
+
+    folds = resultado["folds"]
+    por_fold = pd.DataFrame(
+        {
+            metrica: [f"{m:.3f} ± {d:.3f}" for m, d in zip(folds[f"{metrica}_media"], folds[f"{metrica}_desvio"])]
+            for metrica in ("precisao", "recall", "f1")
+        },
+        index=folds.index,
+    )
+
+    return (
+        "=== AVALIAÇÃO DO MODELO COM INTERVALOS DE CONFIANÇA ===\n"
+        f"Estimador: {resultado['estimador']} (modelo {resultado['modelo']})\n"
+        f"Acurácia no teste ({PARAMETROS_DIVISAO['test_size']:.0%} dos dados): "
+        f"{valor * 100:.2f}% (IC {nivel}: {inferior * 100:.2f}% a {superior * 100:.2f}%)\n"
+        f"Acurácia na validação cruzada ({resultado['n_folds']} folds): {media * 100:.2f}% ± {desvio * 100:.2f}%\n"
+        + "-" * 43
+        + f"\nTeste com IC {nivel} do bootstrap ({resultado['reamostragens']} reamostragens):\n"
+        + por_classe.to_string()
+        + f"\n\nValidação cruzada estratificada (média ± desvio entre {resultado['n_folds']} folds):\n"
+        + por_fold.to_string()
+        + "\n\nTempos (s):\n"
+        f"  modelo e predição do teste: {tempos['modelo_e_predicao_teste']:.3f}\n"
+        f"  validação cruzada (parede): {tempos['validacao_cruzada']:.3f} "
+        f"(soma dos ajustes: {sum(tempos['ajuste_por_fold']):.3f})\n"
+        f"  bootstrap: {tempos['bootstrap']:.3f}\n"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Avaliação com validação cruzada e bootstrap.")
+    parser.add_argument("--dados", default=DADOS_TREINO, help="dataset bruto (padrão: %(default)s)")
+    parser.add_argument("--estimador", choices=list(ESTIMADORES), default=None)
+    parser.add_argument("--folds", type=int, default=N_FOLDS_PADRAO)
+    parser.add_argument("--reamostragens", type=int, default=REAMOSTRAGENS_PADRAO)
+    parser.add_argument("--confianca", type=float, default=CONFIANCA_PADRAO)
+    parser.add_argument("--processos", type=int, default=None, help="processos da validação cruzada (padrão: núcleos)")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    resultado = executar_avaliacao(
+        args.dados,
+        args.estimador,
+        args.folds,
+        args.reamostragens,
+        args.confianca,
+        args.processos,
+        args.semente,
+    )
+    texto = formatar_avaliacao(resultado)
+    print("\n" + texto)
+    salvar_relatorio(texto, RELATORIO_AVALIACAO)
+
+
+if __name__ == "__main__":
+    main()
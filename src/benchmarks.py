@@ -0,0 +1,600 @@
+"""
+Benchmarks de desempenho do projeto.
+
+Exemplos:
+    python src/benchmarks.py floresta
+    python src/benchmarks.py codificador --linhas 1 100 10000 1000000
+    python src/benchmarks.py suite --fatores 1 10 100 1000 --saida benchmarks/base.json
+    python src/benchmarks.py suite --base benchmarks/base.json
+    python src/benchmarks.py comparar --atual benchmarks/resultado.json --base benchmarks/base.json
+    python src/benchmarks.py importacao --base benchmarks/base_importacao.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    OBESITY_CSV,
+    MAPA_COLUNAS,
+    MAPA_VALORES_COLUNA,
+    MODEL_FILE,
+    LABEL_ENCODER_FILE,
+    BENCHMARK_RESULTADO,
+    BENCHMARK_IMPORTACAO,
+    BENCHMARK_BASE,
+    ARTEFATO_MMAP_DIR,
+    SRC_DIR,
+)
+from artefatos import carregar_artefatos, alinhar_colunas_modelo
+from preprocessamento import preparar_dados_obesidade
+from utils import ler_json
+
+
+def medir(funcao, repeticoes=5) -> float:
+    """Executa funcao repetidas vezes e retorna o melhor tempo em segundos."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def carregar_dados_processados() -> pd.DataFrame:
+    """Lê o Obesity.csv e aplica o pré-processamento do treinamento, sem prints."""
+    df = pd.read_csv(OBESITY_CSV)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return preparar_dados_obesidade(
+            df, ler_json(MAPA_COLUNAS), ler_json(MAPA_VALORES_COLUNA)
+        )
+
+
+def escalar_linhas(X, n_linhas):
+    """Repete as linhas de X (array ou DataFrame) até completar n_linhas."""
+    indices = np.resize(np.arange(len(X)), n_linhas)
+    if isinstance(X, pd.DataFrame):
+        return X.iloc[indices].reset_index(drop=True)
+    return X[indices]
+
+
+def benchmark_floresta(tamanhos=(1, 100, 10_000, 100_000), repeticoes=5):
+    """
+    Compara o predict_proba do RandomForestClassifier do pipeline salvo com o
+    da FlorestaVetorizada, sobre a saída do preprocessor.
+    """
+    from floresta_vetorizada import FlorestaVetorizada
+
+    pipeline, _ = carregar_artefatos()
+    floresta = pipeline.named_steps["model"]
+    motor = FlorestaVetorizada.de_floresta(floresta)
+
+    df = alinhar_colunas_modelo(carregar_dados_processados(), pipeline)
+    X_base = pipeline.named_steps["preprocessor"].transform(df)
+
+    print(f"{'linhas':>10} {'sklearn (s)':>12} {'vetorizada (s)':>15} {'ganho':>7} {'idênticas':>10}")
+    resultados = []
+    for n_linhas in tamanhos:
+        X = escalar_linhas(X_base, n_linhas)
+        t_sklearn = medir(lambda: floresta.predict_proba(X), repeticoes)
+        t_motor = medir(lambda: motor.predict_proba(X), repeticoes)
+        identicas = np.array_equal(floresta.predict_proba(X), motor.predict_proba(X))
+        print(
+            f"{n_linhas:>10} {t_sklearn:>12.5f} {t_motor:>15.5f} "
+            f"{t_sklearn / t_motor:>6.1f}x {str(identicas):>10}"
+        )
+        resultados.append(
+            {
+                "linhas": n_linhas,
+                "sklearn_s": t_sklearn,
+                "vetorizada_s": t_motor,
+                "identicas": identicas,
+            }
+        )
+    return resultados
+
+
+def benchmark_transformers(tamanhos=(1, 1_000_000), repeticoes=5):
+    """
+    Tempo por chamada do transform de cada transformer customizado, para uma
+    linha (custo fixo) e para 1M linhas (custo por elemento).
+    """
+    from transformers import MtransGrouper, CalcGrouper, RoundingTransformer
+
+    df = carregar_dados_processados()
+    casos = {
+        "MtransGrouper": (MtransGrouper(), ["mtrans"]),
+        "CalcGrouper": (CalcGrouper(), ["calc"]),
+        "RoundingTransformer": (RoundingTransformer(), ["fcvc", "ncp", "ch20", "faf", "tue"]),
+    }
+
+    print(f"{'transformer':>20} {'linhas':>10} {'por chamada (s)':>16} {'ns/linha':>9}")
+    resultados = []
+    for nome, (transformer, colunas) in casos.items():
+        transformer.fit(df[colunas])
+        for n_linhas in tamanhos:
+            X = escalar_linhas(df[colunas], n_linhas)
+            tempo = medir(lambda: transformer.transform(X), repeticoes)
+            print(f"{nome:>20} {n_linhas:>10} {tempo:>16.6f} {tempo / n_linhas * 1e9:>9.1f}")
+            resultados.append({"transformer": nome, "linhas": n_linhas, "tempo_s": tempo})
+    return resultados
+
+
+def benchmark_codificador(tamanhos=(1, 100, 10_000, 1_000_000), repeticoes=5):
+    """
+    Compara o preprocessor do pipeline salvo (convertido para float32, como as
+    árvores usam) com o codificador fundido, com e sem a matriz de saída
+    reaproveitada entre chamadas.
+    """
+    import warnings
+
+    from codificador_fundido import compilar
+
+    pipeline, _ = carregar_artefatos()
+    preprocessor = pipeline.named_steps["preprocessor"]
+    codificador = compilar(preprocessor)
+    df = alinhar_colunas_modelo(carregar_dados_processados(), pipeline)
+
+    print(
+        f"{'linhas':>10} {'sklearn (s)':>12} {'fundido (s)':>12} {'pré-alocado (s)':>16} "
+        f"{'ganho':>7} {'idênticas':>10}"
+    )
+    resultados = []
+    for n_linhas in tamanhos:
+        X = escalar_linhas(df, n_linhas)
+        saida = np.empty((n_linhas, len(codificador.nomes_saida)), dtype=np.float32)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)
+            t_sklearn = medir(lambda: preprocessor.transform(X).astype(np.float32), repeticoes)
+            esperado = preprocessor.transform(X).astype(np.float32)
+        t_fundido = medir(lambda: codificador.transform(X), repeticoes)
+        t_prealocado = medir(lambda: codificador.transform(X, saida=saida), repeticoes)
+        identicas = np.array_equal(esperado.view(np.uint32), codificador.transform(X).view(np.uint32))
+        print(
+            f"{n_linhas:>10} {t_sklearn:>12.6f} {t_fundido:>12.6f} {t_prealocado:>16.6f} "
+            f"{t_sklearn / t_prealocado:>6.1f}x {str(identicas):>10}"
+        )
+        resultados.append(
+            {
+                "linhas": n_linhas,
+                "sklearn_s": t_sklearn,
+                "fundido_s": t_fundido,
+                "prealocado_s": t_prealocado,
+                "identicas": identicas,
+            }
+        )
+    return resultados
+
+
+def _preparar_legado(df, mapa_colunas, mapa_valores_colunas):
+    """Cadeia anterior ao MotorPreprocessamento (cópias + uma passada por coluna)."""
+    from motor_preprocessamento import COLUNAS_POR_MAPEAMENTO
+    from utils import renomear_colunas, transformar_valores_string
+
+    df_processado = renomear_colunas(df.copy(), mapa_colunas)
+    for mapeamento, (colunas, chave) in COLUNAS_POR_MAPEAMENTO.items():
+        for coluna in colunas:
+            transformar_valores_string(
+                df_processado, coluna, mapa_valores_colunas[mapeamento][chave]
+            )
+    return df_processado
+
+
+def benchmark_preprocessamento(
+    tamanhos=(1_000_000, 10_000_000, 30_000_000), repeticoes=3, legado=True
+):
+    """
+    Compara o MotorPreprocessamento (compilado uma vez) com a cadeia anterior
+    de cópias e transformações por coluna, sobre o Obesity.csv escalado.
+    """
+    from motor_preprocessamento import MotorPreprocessamento
+
+    df_bruto = pd.read_csv(OBESITY_CSV)
+    mapa_colunas = ler_json(MAPA_COLUNAS)
+    mapa_valores = ler_json(MAPA_VALORES_COLUNA)
+    motor = MotorPreprocessamento(mapa_colunas, mapa_valores)
+
+    print(f"{'linhas':>11} {'motor (s)':>10} {'legado (s)':>11} {'ganho':>7}")
+    resultados = []
+    for n_linhas in tamanhos:
+        df = escalar_linhas(df_bruto, n_linhas)
+        t_motor = medir(lambda: motor.processar(df), repeticoes)
+
+        t_legado = None
+        if legado:
+            with contextlib.redirect_stdout(io.StringIO()):
+                t_legado = medir(lambda: _preparar_legado(df, mapa_colunas, mapa_valores), repeticoes)
+
+        ganho = f"{t_legado / t_motor:>6.1f}x" if t_legado else f"{'-':>7}"
+        legado_str = f"{t_legado:>11.3f}" if t_legado else f"{'-':>11}"
+        print(f"{n_linhas:>11} {t_motor:>10.3f} {legado_str} {ganho}")
+        resultados.append({"linhas": n_linhas, "motor_s": t_motor, "legado_s": t_legado})
+        del df
+    return resultados
+
+
+# Acima deste tempo (s) a primeira execução de uma etapa já é a medida final
+LIMITE_REPETICAO_S = 2.0
+
+
+def medir_memoria(funcao) -> float:
+    """Pico de memória alocada (MB) durante uma execução de funcao (tracemalloc)."""
+    tracemalloc.start()
+    try:
+        funcao()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return pico / 2**20
+
+
+def medir_etapa(funcao, repeticoes=3) -> dict:
+    """
+    Melhor tempo de funcao em até `repeticoes` execuções (etapas lentas rodam
+    uma vez só) e pico de memória, medido em uma execução separada para que o
+    tracemalloc não afete o tempo.
+    """
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+        if tempos[-1] > LIMITE_REPETICAO_S:
+            break
+    return {"tempo_s": min(tempos), "memoria_pico_mb": medir_memoria(funcao)}
+
+
+def _ambiente() -> dict:
+    """Versões e máquina em que a suíte rodou, gravadas junto dos resultados."""
+    import sklearn
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=OBESITY_CSV.parent,
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "python": sys.version.split()[0],
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+        "commit": commit,
+    }
+
+
+def executar_suite(fatores=(1, 10, 100, 1000), repeticoes=3, fator_maximo_treino=10, chamadas_linha=200):
+    """
+    Mede cada etapa do projeto sobre o Obesity.csv repetido `fator` vezes:
+    preparar_dados_obesidade, cada transformer customizado, o
+    ColumnTransformer.transform, o fit da floresta, o predict_proba em lote e
+    de uma linha e o joblib.load dos artefatos.
+
+    O fit da floresta só roda até fator_maximo_treino; predict_proba de uma
+    linha e o carregamento dos artefatos não dependem do fator e rodam só no
+    fator 1 (ou no menor fator pedido).
+    """
+    import joblib
+    from sklearn.base import clone
+    from transformers import MtransGrouper, CalcGrouper, RoundingTransformer
+
+    pipeline, le = carregar_artefatos()
+    preprocessor = pipeline.named_steps["preprocessor"]
+    df_bruto = pd.read_csv(OBESITY_CSV)
+    mapa_colunas = ler_json(MAPA_COLUNAS)
+    mapa_valores = ler_json(MAPA_VALORES_COLUNA)
+    df_processado = carregar_dados_processados()
+    transformers = {
+        "MtransGrouper": (MtransGrouper().fit(df_processado[["mtrans"]]), ["mtrans"]),
+        "CalcGrouper": (CalcGrouper().fit(df_processado[["calc"]]), ["calc"]),
+        "RoundingTransformer": (
+            RoundingTransformer().fit(df_processado[["fcvc", "ncp", "ch20", "faf", "tue"]]),
+            ["fcvc", "ncp", "ch20", "faf", "tue"],
+        ),
+    }
+
+    resultados = []
+
+    def registrar(etapa, fator, linhas, funcao):
+        medida = medir_etapa(funcao, repeticoes)
+        resultados.append({"etapa": etapa, "fator": fator, "linhas": linhas, **medida})
+        print(
+            f"{etapa:>30} {fator:>6}x {linhas:>10} "
+            f"{medida['tempo_s']:>10.4f} {medida['memoria_pico_mb']:>10.1f}"
+        )
+
+    print(f"{'etapa':>30} {'fator':>7} {'linhas':>10} {'tempo (s)':>10} {'pico (MB)':>10}")
+    for fator in sorted(fatores):
+        n_linhas = len(df_bruto) * fator
+        bruto = escalar_linhas(df_bruto, n_linhas)
+
+        def preparar():
+            with contextlib.redirect_stdout(io.StringIO()):
+                preparar_dados_obesidade(bruto, mapa_colunas, mapa_valores)
+
+        registrar("preparar_dados_obesidade", fator, n_linhas, preparar)
+        del bruto
+
+        processado = escalar_linhas(df_processado, n_linhas)
+        for nome, (transformer, colunas) in transformers.items():
+            X_colunas = processado[colunas]
+            registrar(f"transform_{nome}", fator, n_linhas, lambda: transformer.transform(X_colunas))
+        del X_colunas
+
+        X = alinhar_colunas_modelo(processado, pipeline)
+        registrar("column_transformer", fator, n_linhas, lambda: preprocessor.transform(X))
+
+        if fator <= fator_maximo_treino:
+            X_modelo = preprocessor.transform(X)
+            y = le.transform(processado["classificacao_peso_corporal"])
+            floresta = clone(pipeline.named_steps["model"])
+            registrar("fit_floresta", fator, n_linhas, lambda: floresta.fit(X_modelo, y))
+            del X_modelo, y
+
+        registrar("predict_proba_lote", fator, n_linhas, lambda: pipeline.predict_proba(X))
+
+        if fator == min(fatores):
+            linha = X.iloc[[0]]
+
+            def prever_linhas():
+                for _ in range(chamadas_linha):
+                    pipeline.predict_proba(linha)
+
+            medida = medir_etapa(prever_linhas, repeticoes)
+            medida["tempo_s"] /= chamadas_linha
+            resultados.append({"etapa": "predict_proba_linha", "fator": fator, "linhas": 1, **medida})
+            print(
+                f"{'predict_proba_linha':>30} {fator:>6}x {1:>10} "
+                f"{medida['tempo_s']:>10.4f} {medida['memoria_pico_mb']:>10.1f}"
+            )
+            registrar(
+                "joblib_load_artefatos",
+                fator,
+                0,
+                lambda: (joblib.load(MODEL_FILE), joblib.load(LABEL_ENCODER_FILE)),
+            )
+        del processado, X
+
+    return {"ambiente": _ambiente(), "repeticoes": repeticoes, "resultados": resultados}
+
+
+def salvar_resultados(suite, caminho=BENCHMARK_RESULTADO) -> None:
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(suite, f, ensure_ascii=False, indent=2)
+    print(f"✅ Resultados salvos em: {caminho}")
+
+
+def comparar_resultados(atual, base, tolerancia_tempo=0.25, tolerancia_memoria=0.25) -> list:
+    """
+    Compara duas execuções da suíte (dicts do json) por (etapa, fator).
+    Retorna as regressões: etapas com tempo ou pico de memória acima da base
+    além da tolerância relativa.
+    """
+    indice_base = {(r["etapa"], r["fator"]): r for r in base["resultados"]}
+    regressoes = []
+
+    print(f"{'etapa':>30} {'fator':>7} {'tempo':>9} {'memória':>9}")
+    for r in atual["resultados"]:
+        referencia = indice_base.get((r["etapa"], r["fator"]))
+        if referencia is None:
+            continue
+        razao_tempo = r["tempo_s"] / referencia["tempo_s"] if referencia["tempo_s"] else 1.0
+        razao_memoria = (
+            r["memoria_pico_mb"] / referencia["memoria_pico_mb"] if referencia["memoria_pico_mb"] else 1.0
+        )
+        piorou_tempo = razao_tempo > 1 + tolerancia_tempo
+        piorou_memoria = razao_memoria > 1 + tolerancia_memoria
+        marca = "⚠️" if piorou_tempo or piorou_memoria else ""
+        print(f"{r['etapa']:>30} {r['fator']:>6}x {razao_tempo:>8.2f}x {razao_memoria:>8.2f}x {marca}")
+        if piorou_tempo or piorou_memoria:
+            regressoes.append(
+                {**r, "razao_tempo": razao_tempo, "razao_memoria": razao_memoria}
+            )
+
+    # O commit muda a cada comparação com outra versão do código; não conta como ambiente
+    ambiente_base, ambiente_atual = (
+        {chave: valor for chave, valor in (r.get("ambiente") or {}).items() if chave != "commit"}
+        for r in (base, atual)
+    )
+    if ambiente_base != ambiente_atual:
+        print("⚠️ Ambientes diferentes entre a base e a execução atual; compare com cautela.")
+    if regressoes:
+        print(f"❌ {len(regressoes)} regressões acima da tolerância.")
+    else:
+        print("✅ Nenhuma regressão em relação à base.")
+    return regressoes
+
+
+# Trechos medidos em processos novos pelo perfil de importação. Os do app
+# reproduzem o que ele executa até desenhar a tela e até a primeira predição.
+_CABECALHO_APP = "import time\nfrom typing import TYPE_CHECKING, Tuple, Optional\nimport streamlit as st\nimport config\n"
+_PRIMEIRA_PREDICAO = (
+    "import numpy as np\nimport pandas as pd\n"
+    "from artefatos import alinhar_colunas_modelo\n"
+    "if (config.ARTEFATO_MMAP_DIR / 'manifest.json').exists():\n"
+    "    from artefato_mmap import carregar_artefato_mmap\n"
+    "    pipeline, le = carregar_artefato_mmap()\n"
+    "else:\n"
+    "    from artefatos import carregar_artefatos\n"
+    "    pipeline, le = carregar_artefatos()\n"
+    "X = pd.DataFrame([{'genero': 'feminino', 'idade': 21.0, 'historico_familiar': 'sim', "
+    "'favc': 'nao', 'fcvc': 2.0, 'ncp': 3.0, 'caec': 'as_vezes', 'ch20': 2.0, 'faf': 0.0, "
+    "'tue': 1.0, 'calc': 'nunca', 'mtrans': 'transporte_publico'}])\n"
+    "pipeline.predict_proba(alinhar_colunas_modelo(X, pipeline))\n"
+)
+ALVOS_IMPORTACAO = {
+    "config": "import config\n",
+    "app_primeira_tela": _CABECALHO_APP,
+    "app_primeira_predicao": _CABECALHO_APP + _PRIMEIRA_PREDICAO,
+    "pipeline_treino": "import pipeline_treino\n",
+}
+
+_SCRIPT_IMPORTACAO = """
+import sys, time
+sys.path.insert(0, {src!r})
+print("INICIO", file=sys.stderr, flush=True)
+inicio = time.perf_counter()
+exec({codigo!r})
+tempo = time.perf_counter() - inicio
+# VmHWM é o pico de RSS deste processo (o ru_maxrss herda o do processo pai)
+with open("/proc/self/status") as status:
+    pico = [int(l.split()[1]) for l in status if l.startswith("VmHWM")][0]
+print("TEMPO", tempo, pico / 1024)
+"""
+
+
+def _ler_importtime(stderr) -> dict:
+    """
+    Tempo acumulado (s) de cada import de primeiro nível do relatório do
+    -X importtime, ignorando os imports da inicialização do interpretador.
+    """
+    modulos = {}
+    linhas = stderr.splitlines()
+    for linha in linhas[linhas.index("INICIO") + 1:]:
+        if not linha.startswith("import time:") or "cumulative" in linha:
+            continue
+        _, acumulado, nome = linha[len("import time:"):].split("|")
+        if not nome.startswith("  "):
+            modulos[nome.strip()] = modulos.get(nome.strip(), 0.0) + int(acumulado) / 1e6
+    return modulos
+
+
+def executar_perfil_importacao(repeticoes=5, mais_lentos=15):
+    """
+    Mede em processos novos (python -X importtime) o tempo e o pico de memória
+    (Linux) de cada trecho de ALVOS_IMPORTACAO, com a mediana das repetições, e lista
+    os imports de primeiro nível mais lentos de cada trecho.
+
+    O resultado tem o mesmo formato da suíte (etapa "importacao_<alvo>"), então
+    pode ser comparado com uma base pelo comparar_resultados.
+    """
+    resultados = []
+    print(f"{'alvo':>24} {'tempo (s)':>10} {'imports (s)':>12} {'RSS pico (MB)':>14}")
+    for alvo, codigo in ALVOS_IMPORTACAO.items():
+        script = _SCRIPT_IMPORTACAO.format(src=str(SRC_DIR), codigo=codigo)
+        medidas, modulos = [], {}
+        for _ in range(repeticoes):
+            processo = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", script],
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            linha_tempo = [l for l in processo.stdout.splitlines() if l.startswith("TEMPO")][-1]
+            _, tempo, rss = linha_tempo.split()
+            importados = _ler_importtime(processo.stderr)
+            medidas.append((float(tempo), float(rss), sum(importados.values())))
+            modulos = importados
+        tempo, rss, tempo_imports = np.median(medidas, axis=0)
+        resultados.append(
+            {
+                "etapa": f"importacao_{alvo}",
+                "fator": 1,
+                "linhas": 0,
+                "tempo_s": tempo,
+                "memoria_pico_mb": rss,
+                "imports_s": tempo_imports,
+                "mais_lentos": dict(
+                    sorted(modulos.items(), key=lambda item: -item[1])[:mais_lentos]
+                ),
+            }
+        )
+        print(f"{alvo:>24} {tempo:>10.3f} {tempo_imports:>12.3f} {rss:>14.1f}")
+
+    for r in resultados:
+        print(f"\nImports mais lentos em {r['etapa']}:")
+        for modulo, tempo in r["mais_lentos"].items():
+            print(f"  {tempo:>8.3f}s  {modulo}")
+
+    return {
+        "ambiente": _ambiente(),
+        "repeticoes": repeticoes,
+        "artefato_mmap": (ARTEFATO_MMAP_DIR / "manifest.json").exists(),
+        "resultados": resultados,
+    }
+
+
+BENCHMARKS = {
+    "floresta": benchmark_floresta,
+    "transformers": benchmark_transformers,
+    "codificador": benchmark_codificador,
+    "preprocessamento": benchmark_preprocessamento,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de desempenho.")
+    parser.add_argument("benchmark", choices=sorted([*BENCHMARKS, "suite", "comparar", "importacao"]))
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument(
+        "--linhas",
+        type=int,
+        nargs="+",
+        default=None,
+        help="tamanhos de entrada (padrão: os do próprio benchmark)",
+    )
+    suite = parser.add_argument_group("suite e comparar")
+    suite.add_argument("--fatores", type=int, nargs="+", default=[1, 10, 100, 1000])
+    suite.add_argument("--fator-maximo-treino", type=int, default=10)
+    suite.add_argument(
+        "--saida",
+        type=Path,
+        default=None,
+        help=f"json com os resultados (padrão: {BENCHMARK_RESULTADO} ou {BENCHMARK_IMPORTACAO})",
+    )
+    suite.add_argument("--atual", type=Path, default=BENCHMARK_RESULTADO, help="json a comparar (modo comparar)")
+    suite.add_argument("--base", type=Path, default=None, help=f"json da base (ex: {BENCHMARK_BASE})")
+    suite.add_argument("--tolerancia", type=float, default=0.25, help="aumento relativo tolerado")
+    args = parser.parse_args()
+
+    if args.benchmark in ("suite", "comparar", "importacao"):
+        if args.benchmark == "suite":
+            atual = executar_suite(args.fatores, min(args.repeticoes, 3), args.fator_maximo_treino)
+            salvar_resultados(atual, args.saida or BENCHMARK_RESULTADO)
+        elif args.benchmark == "importacao":
+            atual = executar_perfil_importacao(args.repeticoes)
+            salvar_resultados(atual, args.saida or BENCHMARK_IMPORTACAO)
+        else:
+            if not args.atual.exists():
+                parser.error(f"resultados atuais não encontrados em {args.atual}; rode antes: python src/benchmarks.py suite")
+            atual = ler_json(args.atual)
+        base_caminho = args.base or (BENCHMARK_BASE if args.benchmark == "comparar" else None)
+        if base_caminho:
+            if not base_caminho.exists():
+                parser.error(
+                    f"base não encontrada em {base_caminho}; gere uma com: "
+                    f"python src/benchmarks.py suite --saida {base_caminho} (ou informe --base)"
+                )
+            base = ler_json(base_caminho)
+            if atual is None or base is None:
+                parser.error("não foi possível ler os resultados a comparar (veja o erro acima)")
+            regressoes = comparar_resultados(atual, base, args.tolerancia, args.tolerancia)
+            sys.exit(1 if regressoes else 0)
+        return
+
+    parametros = {"repeticoes": args.repeticoes}
+    if args.linhas:
+        parametros["tamanhos"] = args.linhas
+    BENCHMARKS[args.benchmark](**parametros)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Busca de hiperparâmetros do pipeline_completa_rf por successive halving.
+
+- Validação cruzada estratificada sobre o conjunto de treino (o teste do
+  pipeline_treino.py continua separado).
+- O preprocessor (ColumnTransformer) é ajustado uma única vez por fold; todos
+  os candidatos reutilizam as matrizes já transformadas.
+- A cada rodada os candidatos recebem mais árvores e apenas a fração
+  1/fator com melhor acurácia média segue adiante. As florestas crescem com
+  warm_start: a rodada seguinte só treina as árvores novas.
+- As avaliações (candidato, fold) de uma rodada rodam em paralelo com joblib.
+
+Ao final grava os melhores hiperparâmetros em json (aceito por
+`pipeline_treino.py --hiperparametros`) e a tabela de tempos/acurácias em csv.
+
+Exemplo:
+    python src/busca_hiperparametros.py --folds 5 --processos -1
+    python src/pipeline_treino.py --hiperparametros models/melhores_hiperparametros.json
+"""
+
+import argparse
+import json
+import math
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+
+from config import (
+    DADOS_TREINO,
+    MELHORES_HIPERPARAMETROS_FILE,
+    TABELA_BUSCA_HIPERPARAMETROS,
+    garantir_diretorios,
+)
+from utils import ler_json
+from pipeline_treino import (
+    HIPERPARAMETROS_RF,
+    criar_preprocessador,
+    preprocessar,
+    separar_treino_teste,
+)
+
+GRADE_PADRAO = {
+    "max_depth": [10, 20, None],
+    "min_samples_leaf": [1, 2, 4],
+    "min_samples_split": [2, 5],
+    "max_features": ["sqrt", 0.5],
+}
+
+
+def preparar_folds(X, y, n_folds=5, random_state=42) -> list:
+    """
+    Ajusta o preprocessor em cada fold de treino e guarda as matrizes
+    transformadas: (X_treino, y_treino, X_validacao, y_validacao) por fold.
+    """
+    divisor = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=random_state)
+    folds = []
+    for indices_treino, indices_validacao in divisor.split(X, y):
+        preprocessor = criar_preprocessador()
+        X_treino = preprocessor.fit_transform(X.iloc[indices_treino])
+        X_validacao = preprocessor.transform(X.iloc[indices_validacao])
+        folds.append((X_treino, y[indices_treino], X_validacao, y[indices_validacao]))
+    return folds
+
+
+def _avaliar(floresta, parametros, n_estimators, fold):
+    """
+    Treina (ou continua treinando) a floresta de um candidato em um fold.
+    Retorna (floresta, acurácia na validação, tempo de ajuste em segundos).
+    """
+    X_treino, y_treino, X_validacao, y_validacao = fold
+    if floresta is None:
+        floresta = RandomForestClassifier(
+            **{**HIPERPARAMETROS_RF, **parametros}, warm_start=True
+        )
+    # Um núcleo por tarefa: o paralelismo fica nos pares (candidato, fold)
+    floresta.set_params(n_estimators=n_estimators, n_jobs=1)
+
+    inicio = time.perf_counter()
+    floresta.fit(X_treino, y_treino)
+    tempo = time.perf_counter() - inicio
+
+    return floresta, floresta.score(X_validacao, y_validacao), tempo
+
+
+def rodadas_halving(n_candidatos, min_estimadores, max_estimadores, fator) -> list:
+    """
+    Lista (n_candidatos, n_estimators) de cada rodada. A busca termina quando
+    sobra um candidato ou quando as florestas chegam a max_estimadores.
+    """
+    rodadas = []
+    n_estimators = min_estimadores
+    while True:
+        n_estimators = min(n_estimators, max_estimadores)
+        rodadas.append((n_candidatos, n_estimators))
+        if n_candidatos == 1 or n_estimators == max_estimadores:
+            break
+        n_candidatos = max(1, math.ceil(n_candidatos / fator))
+        n_estimators *= fator
+    return rodadas
+
+
+def buscar_hiperparametros(
+    folds,
+    grade=None,
+    min_estimadores=20,
+    max_estimadores=300,
+    fator=3,
+    n_jobs=-1,
+):
+    """
+    Successive halving sobre os candidatos da grade, usando n_estimators como
+    recurso. Retorna (melhores hiperparâmetros, tabela de resultados).
+    """
+    candidatos = list(ParameterGrid(grade or GRADE_PADRAO))
+    vivos = list(range(len(candidatos)))
+    florestas = {}
+    linhas = []
+
+    print(f"🔎 {len(candidatos)} candidatos, {len(folds)} folds, fator {fator}")
+
+    rodadas = rodadas_halving(len(candidatos), min_estimadores, max_estimadores, fator)
+    # Candidatos promovidos ao fim de cada rodada (na última, só o vencedor)
+    promovidos = [n for n, _ in rodadas[1:]] + [1]
+
+    with Parallel(n_jobs=n_jobs) as paralelo:
+        for rodada, (_, n_estimators) in enumerate(rodadas):
+            tarefas = [(c, f) for c in vivos for f in range(len(folds))]
+            inicio = time.perf_counter()
+            saidas = paralelo(
+                delayed(_avaliar)(florestas.get((c, f)), candidatos[c], n_estimators, folds[f])
+                for c, f in tarefas
+            )
+            tempo_rodada = time.perf_counter() - inicio
+
+            acuracias = {c: [] for c in vivos}
+            tempos = {c: 0.0 for c in vivos}
+            for (c, f), (floresta, acuracia, tempo) in zip(tarefas, saidas):
+                florestas[(c, f)] = floresta
+                acuracias[c].append(acuracia)
+                tempos[c] += tempo
+
+            # Ordena pela acurácia média (desempate: menor desvio, ordem da grade)
+            ordem = sorted(vivos, key=lambda c: (-np.mean(acuracias[c]), np.std(acuracias[c]), c))
+            n_promovidos = promovidos[rodada]
+            for posicao, c in enumerate(ordem):
+                linhas.append(
+                    {
+                        "rodada": rodada,
+                        "candidato": c,
+                        **{f"param_{k}": v for k, v in candidatos[c].items()},
+                        "n_estimators": n_estimators,
+                        "acuracia_media": float(np.mean(acuracias[c])),
+                        "acuracia_desvio": float(np.std(acuracias[c])),
+                        "tempo_ajuste_s": tempos[c],
+                        "promovido": posicao < n_promovidos,
+                    }
+                )
+
+            print(
+                f"  rodada {rodada}: {len(vivos):>3} candidatos x {n_estimators:>4} árvores "
+                f"| melhor {np.mean(acuracias[ordem[0]]) * 100:.2f}% | {tempo_rodada:.1f}s"
+            )
+
+            # Libera as florestas dos candidatos eliminados
+            for c in ordem[n_promovidos:]:
+                for f in range(len(folds)):
+                    florestas.pop((c, f), None)
+            vivos = ordem[:n_promovidos]
+
+    melhor = vivos[0]
+    melhores = {**HIPERPARAMETROS_RF, **candidatos[melhor], "n_estimators": n_estimators}
+    return melhores, pd.DataFrame(linhas)
+
+
+def salvar_resultados(
+    melhores, tabela, caminho_json=MELHORES_HIPERPARAMETROS_FILE, caminho_tabela=TABELA_BUSCA_HIPERPARAMETROS
+) -> None:
+    garantir_diretorios()
+    try:
+        with open(caminho_json, "w", encoding="utf-8") as f:
+            json.dump(melhores, f, ensure_ascii=False, indent=2)
+        tabela.to_csv(caminho_tabela, index=False)
+        print(f"✅ Melhores hiperparâmetros salvos em: {caminho_json}")
+        print(f"✅ Tabela da busca salva em: {caminho_tabela}")
+    except Exception as e:
+        print(f"❌ Erro ao salvar os resultados da busca: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Busca de hiperparâmetros por successive halving.")
+    parser.add_argument("--dados", default=DADOS_TREINO, help="dataset bruto (padrão: %(default)s)")
+    parser.add_argument("--grade", default=None, help="json com a grade de hiperparâmetros")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--fator", type=int, default=3, help="fração 1/fator promovida a cada rodada")
+    parser.add_argument("--min-estimadores", type=int, default=20)
+    parser.add_argument("--max-estimadores", type=int, default=300)
+    parser.add_argument("--processos", type=int, default=-1, help="processos do joblib (-1: todos os núcleos)")
+    parser.add_argument(
+        "--treinar",
+        action="store_true",
+        help="treina e publica o modelo final com os melhores hiperparâmetros",
+    )
+    args = parser.parse_args()
+
+    df_processado, _ = preprocessar(args.dados)
+    X_treino, _, y_treino, _, _ = separar_treino_teste(df_processado)
+
+    inicio = time.perf_counter()
+    folds = preparar_folds(X_treino, y_treino, args.folds)
+    print(f"Preprocessor ajustado em {args.folds} folds em {time.perf_counter() - inicio:.2f}s")
+
+    melhores, tabela = buscar_hiperparametros(
+        folds,
+        grade=ler_json(args.grade) if args.grade else None,
+        min_estimadores=args.min_estimadores,
+        max_estimadores=args.max_estimadores,
+        fator=args.fator,
+        n_jobs=args.processos,
+    )
+    print(f"🏆 Melhores hiperparâmetros: {melhores}")
+    salvar_resultados(melhores, tabela)
+
+    if args.treinar:
+        from pipeline_treino import executar_treinamento
+
+        executar_treinamento(args.dados, melhores, estimador="floresta")
+
+
+if __name__ == "__main__":
+    main()
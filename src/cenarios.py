@@ -0,0 +1,205 @@
+"""
+Cenários "e se": quanto mudaria o risco de obesidade se a pessoa mudasse
+alguns hábitos do questionário.
+
+A partir de uma linha do questionário, gera as combinações de respostas
+alternativas dos campos modificáveis (atividade física, vegetais, água,
+beliscar, álcool, telas, transporte e comida calórica), limitadas a
+`max_alteracoes` campos alterados ao mesmo tempo e a `max_cenarios` linhas, e
+pontua todas de uma vez (uma consulta à tabela pré-calculada ou uma chamada
+ao predict_proba). As opções que o pipeline agrupa na mesma categoria (por
+exemplo, moto, bicicleta e caminhando em mtrans) dão a mesma predição, então
+só a primeira opção de cada grupo é testada.
+
+Exemplo:
+    python src/cenarios.py --linha 0
+    python src/cenarios.py --linha 10 --max-alteracoes 3 --principais 10
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from config import DADOS_PROCESSADOS
+from artefatos import carregar_artefatos, alinhar_colunas_modelo
+from codificador_fundido import fundir_pipeline
+from tabela_probabilidades import DOMINIO_QUESTIONARIO, CAMPOS_ARREDONDADOS, calcular_grupos
+from utils import ler_dataset
+
+# Hábitos que a pessoa pode mudar (os demais campos ficam fixos)
+CAMPOS_MODIFICAVEIS = ["faf", "fcvc", "ch20", "caec", "calc", "tue", "mtrans", "favc"]
+
+# Classes cuja probabilidade somada é o risco reduzido pelos cenários
+CLASSES_OBESIDADE = ("obesidade_tipo_1", "obesidade_tipo_2", "obesidade_tipo_3")
+
+MAX_ALTERACOES_PADRAO = 2
+MAX_CENARIOS_PADRAO = 5_000
+
+
+def alternativas(campo, valor_atual) -> list:
+    """
+    Respostas alternativas de um campo: a primeira opção de cada grupo do
+    pipeline, exceto o grupo da resposta atual.
+    """
+    opcoes = DOMINIO_QUESTIONARIO[campo]
+    grupos = calcular_grupos(campo, opcoes)
+    if campo in CAMPOS_ARREDONDADOS and pd.notna(valor_atual):
+        # O pipeline arredonda os valores sintéticos (ex: 2.45 -> 2)
+        valor_atual = int(np.rint(valor_atual))
+    vistos = {grupos[opcoes.index(valor_atual)]} if valor_atual in opcoes else set()
+
+    resultado = []
+    for opcao, grupo in zip(opcoes, grupos):
+        if grupo not in vistos:
+            vistos.add(grupo)
+            resultado.append(opcao)
+    return resultado
+
+
+class SimuladorCenarios:
+    """
+    Gera e pontua em lote os cenários "e se" de uma linha do questionário.
+    tabela: TabelaProbabilidades opcional; as linhas fora do domínio da tabela
+    são pontuadas pelo pipeline.
+    """
+
+    def __init__(self, pipeline, le, tabela=None, classes_alvo=CLASSES_OBESIDADE):
+        try:
+            # Os cenários são pontuados sem o custo de despacho do ColumnTransformer
+            pipeline = fundir_pipeline(pipeline)
+        except ValueError as e:
+            print(f"⚠️ Codificador fundido desativado: {e}")
+        self.pipeline = pipeline
+        self.tabela = tabela
+        nomes = le.inverse_transform(pipeline.classes_)
+        self.indices_alvo = np.flatnonzero(np.isin(nomes, classes_alvo))
+        if not len(self.indices_alvo):
+            raise ValueError(f"Nenhuma das classes {classes_alvo} está no modelo")
+
+    def gerar(
+        self,
+        linha: pd.DataFrame,
+        campos=CAMPOS_MODIFICAVEIS,
+        max_alteracoes=MAX_ALTERACOES_PADRAO,
+        max_cenarios=MAX_CENARIOS_PADRAO,
+    ):
+        """
+        Retorna (cenarios, escolhas, opcoes): cenarios é um DataFrame com as
+        colunas de `linha`, um cenário por linha (do menor para o maior número
+        de campos alterados); escolhas (cenarios x campos) tem a posição da
+        resposta de cada campo na sua lista em `opcoes` (dict campo -> opções),
+        0 sendo a resposta atual.
+        max_alteracoes=None gera todas as combinações.
+        """
+        linha = linha.iloc[[0]].reset_index(drop=True)
+        campos = [c for c in campos if c in linha.columns]
+        opcoes_por_campo = [[linha.at[0, c]] + alternativas(c, linha.at[0, c]) for c in campos]
+
+        # Grade completa de posições, filtrada pelo número de campos alterados
+        escolhas = np.indices([len(o) for o in opcoes_por_campo]).reshape(len(campos), -1).T
+        n_alteracoes = (escolhas > 0).sum(axis=1)
+        limite = len(campos) if max_alteracoes is None else max_alteracoes
+        ordem = np.argsort(n_alteracoes, kind="stable")
+        ordem = ordem[(n_alteracoes[ordem] >= 1) & (n_alteracoes[ordem] <= limite)]
+        escolhas = escolhas[ordem[:max_cenarios]]
+
+        cenarios = linha.loc[np.zeros(len(escolhas), dtype=np.intp)].reset_index(drop=True)
+        for j, (campo, opcoes) in enumerate(zip(campos, opcoes_por_campo)):
+            cenarios[campo] = pd.Series(opcoes, dtype=linha[campo].dtype).to_numpy()[escolhas[:, j]]
+        return cenarios, escolhas, dict(zip(campos, opcoes_por_campo))
+
+    def pontuar(self, df_input: pd.DataFrame) -> np.ndarray:
+        """Probabilidades de todas as linhas em um único lote."""
+        if self.tabela is not None:
+            probabilidades, validos = self.tabela.consultar(df_input)
+            if not validos.all():
+                probabilidades[~validos] = self.pipeline.predict_proba(df_input[~validos])
+            return probabilidades
+        return self.pipeline.predict_proba(df_input)
+
+    def avaliar(
+        self,
+        linha: pd.DataFrame,
+        campos=CAMPOS_MODIFICAVEIS,
+        max_alteracoes=MAX_ALTERACOES_PADRAO,
+        max_cenarios=MAX_CENARIOS_PADRAO,
+    ):
+        """
+        Retorna (risco_atual, resultado): resultado tem uma linha por cenário
+        com as alterações [(campo, de, para)], o número de campos alterados, o
+        risco (probabilidade somada das classes alvo) e a redução em relação à
+        resposta atual.
+        """
+        linha = linha.iloc[[0]].reset_index(drop=True)
+        cenarios, escolhas, opcoes = self.gerar(linha, campos, max_alteracoes, max_cenarios)
+        probabilidades = self.pontuar(pd.concat([linha, cenarios], ignore_index=True))
+        risco = probabilidades[:, self.indices_alvo].sum(axis=1)
+
+        alteracoes = [
+            [(campo, opcoes[campo][0], opcoes[campo][p]) for campo, p in zip(opcoes, posicoes) if p]
+            for posicoes in escolhas
+        ]
+        resultado = pd.DataFrame(
+            {
+                "alteracoes": alteracoes,
+                "n_alteracoes": (escolhas > 0).sum(axis=1),
+                "risco": risco[1:],
+                "reducao": risco[0] - risco[1:],
+                "classe_prevista": self.pipeline.classes_[np.argmax(probabilidades[1:], axis=1)],
+            }
+        )
+        return float(risco[0]), resultado
+
+    def melhores(self, linha: pd.DataFrame, n=5, **kwargs):
+        """
+        Os n cenários que mais reduzem o risco (só reduções positivas; no
+        empate, os com menos campos alterados). Retorna (risco_atual, melhores).
+        """
+        risco_atual, resultado = self.avaliar(linha, **kwargs)
+        resultado = resultado[resultado["reducao"] > 0]
+        resultado = resultado.sort_values(["reducao", "n_alteracoes"], ascending=[False, True], kind="stable")
+        return risco_atual, resultado.head(n).reset_index(drop=True)
+
+
+def formatar_alteracoes(alteracoes) -> str:
+    return "; ".join(f"{campo}: {de} -> {para}" for campo, de, para in alteracoes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cenários 'e se' de mudança de hábitos.")
+    parser.add_argument("--dados", default=DADOS_PROCESSADOS, help="dataset processado (padrão: %(default)s)")
+    parser.add_argument("--linha", type=int, default=0, help="posição da linha avaliada")
+    parser.add_argument("--max-alteracoes", type=int, default=MAX_ALTERACOES_PADRAO)
+    parser.add_argument("--max-cenarios", type=int, default=MAX_CENARIOS_PADRAO)
+    parser.add_argument("--principais", type=int, default=5)
+    parser.add_argument("--tabela", action="store_true", help="pontua pela tabela pré-calculada")
+    args = parser.parse_args()
+
+    pipeline, le = carregar_artefatos()
+    tabela = None
+    if args.tabela:
+        from tabela_probabilidades import TabelaProbabilidades
+
+        tabela = TabelaProbabilidades.carregar()
+    simulador = SimuladorCenarios(pipeline, le, tabela)
+    df_input = alinhar_colunas_modelo(ler_dataset(args.dados), pipeline)
+    linha = df_input.iloc[[args.linha]]
+
+    inicio = time.perf_counter()
+    risco_atual, melhores = simulador.melhores(
+        linha, n=args.principais, max_alteracoes=args.max_alteracoes, max_cenarios=args.max_cenarios
+    )
+    duracao = time.perf_counter() - inicio
+    print(f"⏱️ Cenários avaliados em {duracao * 1000:.1f} ms")
+
+    print(f"Risco de obesidade atual: {risco_atual:.1%}")
+    if melhores.empty:
+        print("Nenhum cenário reduz o risco.")
+    for _, cenario in melhores.iterrows():
+        print(f"  -{cenario['reducao'] * 100:.1f} p.p. ({cenario['risco']:.1%})  {formatar_alteracoes(cenario['alteracoes'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+"""
+Codificador fundido: o ColumnTransformer ajustado compilado em uma única
+função NumPy.
+
+Em uma predição de uma linha, o preprocessor passa por seis sub-pipelines
+(seleção de colunas do pandas, validações do sklearn e hstack no fim) e esse
+custo fixo é maior que a conta em si. compilar() lê os parâmetros ajustados de
+cada ramo (média e escala do StandardScaler, categorias dos OrdinalEncoder e
+do OneHotEncoder, coluna descartada pelo drop, tabelas dos agrupadores) e
+monta uma lista de operações por coluna de entrada; o transform escreve cada
+uma direto na sua coluna de uma matriz float32 pré-alocada.
+
+A saída é idêntica, bit a bit, a preprocessor.transform(X).astype(np.float32)
+(a entrada que as árvores do sklearn usam), inclusive para nulos, categorias
+desconhecidas e valores numéricos fora das categorias. Por isso o pipeline só
+é fundido com um estimador que converte a entrada para float32 (a floresta);
+o HistGradientBoosting discretiza a entrada em float64 e mudaria de resposta.
+
+Exemplo:
+    python src/codificador_fundido.py verificar
+    python src/benchmarks.py codificador --linhas 1 100 10000 1000000
+"""
+
+import argparse
+import sys
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
+
+from floresta_vetorizada import FlorestaVetorizada
+
+# Estimadores cuja predição usa a entrada convertida para float32
+ESTIMADORES_FLOAT32 = (RandomForestClassifier, FlorestaVetorizada)
+from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder, StandardScaler
+
+from transformers import LIMITE_ENTRADA_PEQUENA, RoundingTransformer, _AgrupadorCategorias
+
+
+@dataclass
+class Operacao:
+    """
+    Codificação de uma coluna de entrada.
+
+    tipo:
+    - "escala": (x - media) / escala;
+    - "arredondada": posição de rint(x) em `categorias` (ou valor_desconhecido);
+    - "ordinal": código da categoria pela tabela (ou valor_desconhecido; como
+      o nulo não é categoria ajustada, o OrdinalEncoder também o trata assim);
+    - "one_hot": 1 na coluna da categoria pela tabela (nenhuma para desconhecidas).
+    """
+
+    tipo: str
+    coluna: str
+    saida: int
+    media: float = 0.0
+    escala: float = 1.0
+    categorias: np.ndarray = None
+    tabela: dict = field(default_factory=dict)
+    valor_desconhecido: float = -1.0
+    largura: int = 1
+
+    def preparar(self):
+        """Índice e valores da tabela para a consulta vetorizada."""
+        self._indice = pd.Index(list(self.tabela), dtype=object)
+        self._codigos = np.array([*self.tabela.values(), -1], dtype=np.int64)
+        return self
+
+    def posicoes(self, valores: np.ndarray) -> np.ndarray:
+        """Código de cada valor na tabela (-1 se não está na tabela)."""
+        if len(valores) < LIMITE_ENTRADA_PEQUENA:
+            return np.fromiter((self.tabela.get(v, -1) for v in valores), np.int64, len(valores))
+        return self._codigos[self._indice.get_indexer(valores)]
+
+
+def _passos(ramo):
+    if isinstance(ramo, Pipeline):
+        return [passo for _, passo in ramo.steps if passo not in (None, "passthrough")]
+    return [ramo]
+
+
+def _tabela_categorias(agrupador, categorias) -> dict:
+    """
+    Tabela valor de entrada -> posição em `categorias`, compondo o agrupador
+    (se houver): o agrupador troca as categorias conhecidas pelo grupo e deixa
+    as demais como vieram, e o encoder procura o resultado em `categorias`.
+    """
+    posicao = {categoria: i for i, categoria in enumerate(categorias)}
+    entradas = list(categorias)
+    if agrupador is not None:
+        entradas = list(dict.fromkeys([*agrupador.categorias_, *entradas]))
+        mapa = dict(zip(agrupador.categorias_, agrupador.grupos_[agrupador.codigos_[:-1]]))
+        destinos = [mapa.get(valor, valor) for valor in entradas]
+    else:
+        destinos = entradas
+    return {valor: posicao[d] for valor, d in zip(entradas, destinos) if d in posicao}
+
+
+def _compilar_ramo(nome, ramo, colunas, inicio) -> list:
+    """Operações de um ramo do ColumnTransformer; ValueError se não suportado."""
+    passos = _passos(ramo)
+    agrupador = passos[0] if isinstance(passos[0], _AgrupadorCategorias) else None
+    arredondador = passos[0] if isinstance(passos[0], RoundingTransformer) else None
+    if agrupador is not None or arredondador is not None:
+        passos = passos[1:]
+    if len(passos) != 1:
+        raise ValueError(f"Ramo '{nome}' não suportado: {[type(p).__name__ for p in _passos(ramo)]}")
+    final = passos[0]
+
+    if isinstance(final, StandardScaler) and agrupador is None and arredondador is None:
+        media = final.mean_ if final.with_mean else np.zeros(len(colunas))
+        escala = final.scale_ if final.with_std else np.ones(len(colunas))
+        return [
+            Operacao("escala", coluna, inicio + j, media=float(media[j]), escala=float(escala[j]))
+            for j, coluna in enumerate(colunas)
+        ]
+
+    if getattr(final, "_infrequent_enabled", False):
+        raise ValueError(f"Ramo '{nome}': categorias infrequentes não são suportadas")
+
+    if isinstance(final, OrdinalEncoder):
+        if final.handle_unknown != "use_encoded_value":
+            raise ValueError(f"Ramo '{nome}': OrdinalEncoder precisa de handle_unknown='use_encoded_value'")
+        operacoes = []
+        for j, (coluna, categorias) in enumerate(zip(colunas, final.categories_)):
+            comum = {"valor_desconhecido": float(final.unknown_value)}
+            if arredondador is not None:
+                if categorias.dtype.kind not in "iuf" or pd.isna(categorias).any():
+                    raise ValueError(f"Ramo '{nome}': categorias não numéricas após o arredondamento")
+                operacoes.append(
+                    Operacao("arredondada", coluna, inicio + j, categorias=categorias.astype(np.float64), **comum)
+                )
+            else:
+                if pd.isna(categorias).any():
+                    raise ValueError(f"Ramo '{nome}': nulo como categoria não é suportado")
+                tabela = _tabela_categorias(agrupador, categorias)
+                operacoes.append(Operacao("ordinal", coluna, inicio + j, tabela=tabela, **comum).preparar())
+        return operacoes
+
+    if isinstance(final, OneHotEncoder) and arredondador is None:
+        if final.handle_unknown != "ignore":
+            raise ValueError(f"Ramo '{nome}': OneHotEncoder precisa de handle_unknown='ignore'")
+        operacoes = []
+        saida = inicio
+        descartadas = final.drop_idx_ if final.drop_idx_ is not None else [None] * len(colunas)
+        for coluna, categorias, descartada in zip(colunas, final.categories_, descartadas):
+            if pd.isna(categorias).any():
+                raise ValueError(f"Ramo '{nome}': nulo como categoria não é suportado")
+            mantidas = [c for i, c in enumerate(categorias) if descartada is None or i != descartada]
+            tabela = {
+                valor: mantidas.index(categorias[posicao])
+                for valor, posicao in _tabela_categorias(agrupador, categorias).items()
+                if categorias[posicao] in mantidas
+            }
+            operacoes.append(Operacao("one_hot", coluna, saida, tabela=tabela, largura=len(mantidas)).preparar())
+            saida += len(mantidas)
+        return operacoes
+
+    raise ValueError(f"Ramo '{nome}' não suportado: {type(final).__name__}")
+
+
+class CodificadorFundido(TransformerMixin, BaseEstimator, auto_wrap_output_keys=None):
+    """
+    Transform compilado de um ColumnTransformer ajustado (use compilar()).
+    transform(X) retorna a matriz float32 (linhas x colunas de saída).
+    """
+
+    def __init__(self, operacoes, colunas_entrada, nomes_saida):
+        self.operacoes = operacoes
+        self.colunas_entrada = colunas_entrada
+        self.nomes_saida = nomes_saida
+
+    @property
+    def feature_names_in_(self):
+        return np.asarray(self.colunas_entrada, dtype=object)
+
+    @property
+    def n_features_in_(self):
+        return len(self.colunas_entrada)
+
+    def get_feature_names_out(self, input_features=None):
+        return np.asarray(self.nomes_saida, dtype=object)
+
+    def fit(self, X=None, y=None):
+        # Os parâmetros vêm do preprocessor já ajustado
+        return self
+
+    def transform(self, X, saida=None) -> np.ndarray:
+        """
+        X: DataFrame (ou dict de arrays) com as colunas de entrada.
+        saida: matriz float32 (linhas x colunas de saída) reaproveitada entre
+        chamadas; por padrão uma nova é alocada.
+        """
+        n_linhas = len(X[self.colunas_entrada[0]]) if len(self.colunas_entrada) else len(X)
+        if saida is None:
+            saida = np.empty((n_linhas, len(self.nomes_saida)), dtype=np.float32)
+
+        for op in self.operacoes:
+            coluna = X[op.coluna]
+            if op.tipo == "escala":
+                valores = np.asarray(coluna, dtype=np.float64)
+                if np.isinf(valores).any():
+                    # Mesma validação do StandardScaler (nulos passam, infinitos não)
+                    raise ValueError(f"Input X contains infinity ('{op.coluna}')")
+                saida[:, op.saida] = (valores - op.media) / op.escala
+            elif op.tipo == "arredondada":
+                valores = np.rint(np.asarray(coluna, dtype=np.float64))
+                posicao = np.searchsorted(op.categorias, valores)
+                posicao_valida = np.minimum(posicao, len(op.categorias) - 1)
+                encontrada = op.categorias[posicao_valida] == valores
+                saida[:, op.saida] = np.where(encontrada, posicao_valida, op.valor_desconhecido)
+            else:
+                if isinstance(getattr(coluna, "dtype", None), pd.CategoricalDtype):
+                    # Consulta só as categorias e indexa pelos códigos (nulo = -1)
+                    categorias = np.asarray(coluna.cat.categories, dtype=object)
+                    codigos = np.append(op.posicoes(categorias), -1)[coluna.cat.codes.to_numpy()]
+                else:
+                    codigos = op.posicoes(np.asarray(coluna, dtype=object))
+                if op.tipo == "ordinal":
+                    saida[:, op.saida] = np.where(codigos >= 0, codigos, op.valor_desconhecido)
+                else:
+                    bloco = saida[:, op.saida : op.saida + op.largura]
+                    bloco[:] = 0.0
+                    linhas = np.flatnonzero(codigos >= 0)
+                    bloco[linhas, codigos[linhas]] = 1.0
+        return saida
+
+
+def compilar(preprocessor: ColumnTransformer) -> CodificadorFundido:
+    """Compila o ColumnTransformer ajustado; ValueError se algum ramo não é suportado."""
+    if preprocessor.remainder != "drop":
+        raise ValueError("Só é suportado remainder='drop'")
+    operacoes = []
+    for nome, ramo, colunas in preprocessor.transformers_:
+        if nome == "remainder" or ramo == "drop":
+            continue
+        fatia = preprocessor.output_indices_[nome]
+        operacoes_ramo = _compilar_ramo(nome, ramo, list(colunas), fatia.start)
+        largura = sum(op.largura for op in operacoes_ramo)
+        if largura != fatia.stop - fatia.start:
+            raise ValueError(f"Ramo '{nome}': {largura} colunas compiladas, {fatia.stop - fatia.start} esperadas")
+        operacoes.extend(operacoes_ramo)
+
+    return CodificadorFundido(
+        operacoes, list(preprocessor.feature_names_in_), list(preprocessor.get_feature_names_out())
+    )
+
+
+def fundir_pipeline(pipeline: Pipeline, passo_preprocessor="preprocessor") -> Pipeline:
+    """
+    Cópia rasa do pipeline com o preprocessor trocado pelo codificador fundido.
+    Levanta ValueError se o último passo não está em ESTIMADORES_FLOAT32: para
+    os demais a saída float32 mudaria as probabilidades.
+    """
+    modelo = pipeline.steps[-1][1]
+    if not isinstance(modelo, ESTIMADORES_FLOAT32):
+        raise ValueError(f"{type(modelo).__name__} não prevê sobre a entrada float32; pipeline mantido")
+    passos = [
+        (nome, compilar(passo) if nome == passo_preprocessor else passo) for nome, passo in pipeline.steps
+    ]
+    return Pipeline(passos)
+
+
+def casos_borda(df: pd.DataFrame, colunas_finitas=()) -> pd.DataFrame:
+    """
+    Linhas com nulos, categorias desconhecidas e números fora das categorias
+    (infinito só nas colunas fora de `colunas_finitas`).
+    """
+    casos = df.head(8).copy().astype(object)
+    casos.iloc[0] = np.nan
+    casos.iloc[1] = None
+    for coluna in casos.columns:
+        if pd.api.types.is_numeric_dtype(df[coluna]):
+            casos.loc[casos.index[2], coluna] = 1e6
+            casos.loc[casos.index[3], coluna] = -3.5
+            casos.loc[casos.index[4], coluna] = np.inf if coluna not in colunas_finitas else 7.0
+            casos.loc[casos.index[5], coluna] = 2.5
+        else:
+            casos.loc[casos.index[2], coluna] = "categoria_nova"
+            casos.loc[casos.index[3], coluna] = ""
+    for coluna in casos.columns:
+        if pd.api.types.is_numeric_dtype(df[coluna]):
+            casos[coluna] = casos[coluna].astype(np.float64)
+    return casos
+
+
+def verificar(pipeline, df: pd.DataFrame) -> list:
+    """Compara o codificador com o preprocessor em df e nos casos de borda."""
+    preprocessor = pipeline.named_steps["preprocessor"]
+    codificador = compilar(preprocessor)
+    escaladas = [op.coluna for op in codificador.operacoes if op.tipo == "escala"]
+    problemas = []
+    for coluna in escaladas:
+        infinito = df.head(1).copy()
+        infinito[coluna] = np.inf
+        for nome, transformacao in {"preprocessor": preprocessor, "codificador": codificador}.items():
+            try:
+                transformacao.transform(infinito)
+                problemas.append(f"{nome} aceitou infinito em '{coluna}'")
+            except ValueError:
+                pass
+
+    for nome, dados in {"dados": df, "casos de borda": casos_borda(df, escaladas)}.items():
+        esperado = preprocessor.transform(dados).astype(np.float32)
+        obtido = codificador.transform(dados)
+        iguais = np.array_equal(esperado.view(np.uint32), obtido.view(np.uint32))
+        if not iguais:
+            diferentes = np.argwhere(esperado.view(np.uint32) != obtido.view(np.uint32))
+            problemas.append(f"{nome}: {len(diferentes)} valores diferentes (ex: linha/coluna {diferentes[0].tolist()})")
+    return problemas
+
+
+def main():
+    from artefatos import carregar_artefatos, alinhar_colunas_modelo
+    from config import DADOS_PROCESSADOS
+    from utils import ler_dataset
+
+    parser = argparse.ArgumentParser(description="Codificador fundido do preprocessor.")
+    parser.add_argument("acao", choices=["verificar"], help="compara com o ColumnTransformer bit a bit")
+    parser.add_argument("--dados", default=DADOS_PROCESSADOS)
+    args = parser.parse_args()
+
+    pipeline, _ = carregar_artefatos()
+    df = alinhar_colunas_modelo(ler_dataset(args.dados), pipeline)
+    problemas = verificar(pipeline, df)
+    if problemas:
+        for problema in problemas:
+            print(f"❌ {problema}")
+        sys.exit(1)
+    print(f"✅ Codificador fundido idêntico ao preprocessor ({len(df)} linhas e casos de borda)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,427 @@
+"""
+Compactação do Random Forest treinado pelo pipeline_treino.py.
+
+Etapas (todas opcionais e combináveis):
+- poda por custo-complexidade (ccp_alpha): a floresta é reajustada com o
+  mesmo random_state (mesmas amostras bootstrap) e as árvores são podadas;
+- destilação: uma floresta menor (menos árvores e/ou mais rasa) aprende as
+  probabilidades da floresta original, em dados de treino mais linhas do
+  gerador_sintetico.py rotuladas pelo modelo original;
+- fusão de folhas: nós cujos dois filhos são folhas com probabilidades
+  iguais (até `tolerancia_fusao`) viram uma folha só;
+- armazenamento compacto: limiares em float32, features em uint8, filhos em
+  int32 e probabilidades das folhas em float32 ou uint8.
+
+O resultado é um Pipeline (mesmo preprocessor + FlorestaCompacta) salvo com
+joblib, carregável pelo app.py, pela pontuação em lote e pelo artefato_mmap.py.
+O relatório compara acurácia, latência e tamanho com o modelo original no
+formato do RELATORIO_MODELO. Com --publicar o compacto é registrado como uma
+versão no armazenamento de artefatos e publicado como o pipeline_treino.py.
+
+Exemplo:
+    python src/compactacao_floresta.py --ccp-alpha 0.001 --tolerancia-fusao 0.05
+    python src/compactacao_floresta.py --destilar --arvores 30 --profundidade 12
+    python src/compactacao_floresta.py --destilar --publicar
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import accuracy_score, classification_report
+from sklearn.pipeline import Pipeline
+
+from config import (
+    DADOS_TREINO,
+    MODEL_FILE,
+    MODELO_COMPACTO_FILE,
+    RELATORIO_COMPACTACAO,
+    MAPA_COLUNAS,
+    MAPA_VALORES_COLUNA,
+)
+from artefatos import carregar_artefatos, alinhar_colunas_modelo, hash_arquivo
+from floresta_vetorizada import FlorestaVetorizada, FlorestaCompacta, arredondar_limiar_float32
+from utils import ler_json, ler_dataset
+
+TIPOS_VALORES = {"float64": np.float64, "float32": np.float32, "uint8": np.uint8}
+
+# Opções da linha de comando que só valem com --destilar
+ESPECIFICOS_DESTILACAO = ("arvores", "profundidade", "folhas_minimas", "linhas_sinteticas")
+
+
+def extrair_arvores(estimadores) -> list:
+    """
+    Copia a estrutura de cada árvore (sklearn) para dicionários de arrays que
+    podem ser modificados. Funciona com árvores de classificação (valores por
+    classe) e de regressão multi-saída (uma saída por classe, na destilação).
+    """
+    arvores = []
+    for estimador in estimadores:
+        arvore = estimador.tree_
+        if arvore.value.shape[1] == 1:
+            valor = arvore.value[:, 0, :]
+        else:
+            valor = arvore.value[:, :, 0]
+        normalizador = valor.sum(axis=1, keepdims=True)
+        normalizador[normalizador == 0.0] = 1.0
+        arvores.append(
+            {
+                "esquerda": arvore.children_left.copy(),
+                "direita": arvore.children_right.copy(),
+                "feature": arvore.feature.copy(),
+                "limiar": arvore.threshold.copy(),
+                "nan_esquerda": arvore.missing_go_to_left.astype(bool),
+                "valores": valor / normalizador,
+                "amostras": arvore.weighted_n_node_samples.copy(),
+            }
+        )
+    return arvores
+
+
+def fundir_folhas(arvore, tolerancia=0.0, mesma_classe=False) -> int:
+    """
+    Funde, de baixo para cima, os pares de folhas irmãs redundantes. O pai
+    vira uma folha com a média ponderada pelo número de amostras.
+    - padrão: folhas cujas probabilidades diferem no máximo `tolerancia` (em
+      valor absoluto, classe a classe); com tolerancia=0 só funde folhas
+      idênticas, sem mudar as predições;
+    - mesma_classe=True: também funde folhas com a mesma classe mais provável
+      (o voto da árvore não muda, só as probabilidades).
+    Retorna o número de fusões; os nós descartados são removidos por _reindexar.
+    """
+    esquerda, direita = arvore["esquerda"], arvore["direita"]
+    valores, amostras = arvore["valores"], arvore["amostras"]
+    fusoes = 0
+    # No sklearn os filhos têm índice maior que o pai, então a ordem
+    # decrescente visita os filhos (já fundidos) antes do pai
+    for no in range(len(esquerda) - 1, -1, -1):
+        e, d = esquerda[no], direita[no]
+        if e == -1 or esquerda[e] != -1 or esquerda[d] != -1:
+            continue
+        if np.abs(valores[e] - valores[d]).max() <= tolerancia or (
+            mesma_classe and valores[e].argmax() == valores[d].argmax()
+        ):
+            valores[no] = (valores[e] * amostras[e] + valores[d] * amostras[d]) / (
+                amostras[e] + amostras[d]
+            )
+            esquerda[no] = direita[no] = -1
+            fusoes += 1
+    return fusoes
+
+
+def _reindexar(arvore) -> dict:
+    """Remove os nós inalcançáveis e recalcula a profundidade da árvore."""
+    esquerda, direita = arvore["esquerda"], arvore["direita"]
+    ordem, profundidades = [0], [0]
+    for no, profundidade in zip(ordem, profundidades):
+        if esquerda[no] != -1:
+            ordem += [esquerda[no], direita[no]]
+            profundidades += [profundidade + 1, profundidade + 1]
+
+    ordem = np.array(ordem)
+    novo_indice = np.full(len(esquerda), -1)
+    novo_indice[ordem] = np.arange(len(ordem))
+    folha = esquerda[ordem] == -1
+
+    reindexada = {chave: valor[ordem] for chave, valor in arvore.items()}
+    reindexada["esquerda"] = np.where(folha, -1, novo_indice[esquerda[ordem]])
+    reindexada["direita"] = np.where(folha, -1, novo_indice[direita[ordem]])
+    reindexada["profundidade"] = max(profundidades)
+    return reindexada
+
+
+def empacotar(arvores, classes, n_features, tipo_valores="uint8", **kwargs) -> FlorestaCompacta:
+    """Monta a FlorestaCompacta a partir das árvores (dicionários de arrays)."""
+    arvores = [_reindexar(arvore) for arvore in arvores]
+    tamanhos = np.array([len(arvore["esquerda"]) for arvore in arvores])
+    deslocamentos = np.concatenate(([0], np.cumsum(tamanhos)[:-1]))
+    if tamanhos.sum() >= np.iinfo(np.int32).max // 2:
+        raise ValueError("Floresta grande demais para índices int32.")
+
+    features, limiares, filhos, nan_esquerda, valores = [], [], [], [], []
+    for arvore, deslocamento in zip(arvores, deslocamentos):
+        # Mesma convenção da FlorestaVetorizada: folhas apontam para si mesmas
+        folha = arvore["esquerda"] == -1
+        proprio = np.arange(len(folha)) + deslocamento
+        features.append(np.where(folha, 0, arvore["feature"]))
+        limiares.append(np.where(folha, np.inf, arvore["limiar"]))
+        esquerda = np.where(folha, proprio, arvore["esquerda"] + deslocamento)
+        direita = np.where(folha, proprio, arvore["direita"] + deslocamento)
+        filhos.append(np.column_stack([esquerda, direita]).ravel())
+        nan_esquerda.append(arvore["nan_esquerda"])
+        valores.append(arvore["valores"])
+
+    valores = np.concatenate(valores)
+    if tipo_valores == "uint8":
+        valores = np.rint(valores * 255)
+
+    floresta = FlorestaCompacta(**kwargs)
+    floresta.feature_ = np.concatenate(features).astype(np.min_scalar_type(max(n_features - 1, 0)))
+    floresta.limiar_ = arredondar_limiar_float32(np.concatenate(limiares))
+    floresta.filhos_ = np.concatenate(filhos).astype(np.int32)
+    floresta.nan_esquerda_ = np.concatenate(nan_esquerda)
+    floresta.valores_ = np.ascontiguousarray(valores, dtype=TIPOS_VALORES[tipo_valores])
+    floresta.raizes_ = deslocamentos.astype(np.intp)
+    floresta.profundidades_ = np.array([arvore["profundidade"] for arvore in arvores], dtype=np.intp)
+    floresta.classes_ = np.asarray(classes)
+    floresta.n_classes_ = len(classes)
+    floresta.n_features_in_ = n_features
+    return floresta
+
+
+def tamanho_floresta(floresta) -> dict:
+    """Número de nós e bytes ocupados pelas árvores (RandomForest ou FlorestaVetorizada)."""
+    if isinstance(floresta, FlorestaVetorizada):
+        arrays = [getattr(floresta, nome) for nome in ("feature_", "limiar_", "filhos_", "nan_esquerda_", "valores_")]
+        return {"nos": int(len(floresta.feature_)), "bytes": int(sum(a.nbytes for a in arrays))}
+    arvores = [estimador.tree_ for estimador in floresta.estimators_]
+    return {
+        "nos": int(sum(arvore.node_count for arvore in arvores)),
+        # Estrutura de nós do sklearn (64 bytes por nó) + array de valores
+        "bytes": int(sum(arvore.node_count * 64 + arvore.value.nbytes for arvore in arvores)),
+    }
+
+
+def dados_destilacao(pipeline, X_treino, linhas_sinteticas=20_000, semente=42):
+    """
+    Entradas (já transformadas pelo preprocessor) e probabilidades do modelo
+    original para a destilação: o treino real mais linhas sintéticas.
+    """
+    preprocessor = pipeline.named_steps["preprocessor"]
+    entradas = [X_treino]
+
+    if linhas_sinteticas:
+        from gerador_sintetico import GeradorSintetico
+        from motor_preprocessamento import MotorPreprocessamento
+
+        mapa_colunas = ler_json(MAPA_COLUNAS)
+        mapa_valores = ler_json(MAPA_VALORES_COLUNA)
+        gerador = GeradorSintetico.ajustar(ler_dataset(DADOS_TREINO), mapa_colunas, mapa_valores)
+        bruto = gerador.gerar_bloco(linhas_sinteticas, np.random.SeedSequence(semente))
+        processado = MotorPreprocessamento(mapa_colunas, mapa_valores).processar(bruto).df
+        entradas.append(alinhar_colunas_modelo(processado, pipeline))
+
+    X = np.vstack([preprocessor.transform(entrada) for entrada in entradas])
+    return X, pipeline.named_steps["model"].predict_proba(X)
+
+
+def compactar_floresta(
+    pipeline,
+    X_treino,
+    y_treino,
+    ccp_alpha=0.0,
+    tolerancia_fusao=0.0,
+    fundir_mesma_classe=False,
+    tipo_valores="uint8",
+    destilar=False,
+    arvores=30,
+    profundidade=12,
+    folhas_minimas=5,
+    linhas_sinteticas=20_000,
+) -> Pipeline:
+    """
+    Retorna um novo Pipeline com o mesmo preprocessor e a floresta compactada.
+    X_treino/y_treino devem ser os mesmos do treinamento do pipeline.
+    """
+    preprocessor = pipeline.named_steps["preprocessor"]
+    modelo = pipeline.named_steps["model"]
+
+    if destilar:
+        X, alvo = dados_destilacao(pipeline, X_treino, linhas_sinteticas)
+        aluno = RandomForestRegressor(
+            n_estimators=arvores,
+            max_depth=profundidade,
+            min_samples_leaf=folhas_minimas,
+            ccp_alpha=ccp_alpha,
+            random_state=42,
+            n_jobs=-1,
+        ).fit(X, alvo)
+        estimadores = aluno.estimators_
+        print(f"Destilação: {arvores} árvores (profundidade {profundidade}) em {len(X)} linhas.")
+    elif ccp_alpha > 0:
+        podada = clone(modelo).set_params(ccp_alpha=ccp_alpha)
+        podada.fit(preprocessor.transform(X_treino), y_treino)
+        estimadores = podada.estimators_
+        print(f"Poda por custo-complexidade com ccp_alpha={ccp_alpha}.")
+    else:
+        estimadores = modelo.estimators_
+
+    extraidas = extrair_arvores(estimadores)
+    fusoes = sum(
+        fundir_folhas(arvore, tolerancia_fusao, fundir_mesma_classe) for arvore in extraidas
+    )
+    print(f"Fusão de folhas: {fusoes} nós viraram folhas.")
+
+    compacta = empacotar(extraidas, modelo.classes_, modelo.n_features_in_, tipo_valores)
+    return Pipeline(steps=[("preprocessor", preprocessor), ("model", compacta)])
+
+
+def avaliar_modelo(pipeline, X_teste, y_teste, le, repeticoes=5, linhas_lote=100_000) -> dict:
+    """Acurácia, relatório de classificação, latências e tamanho de um pipeline."""
+    from benchmarks import medir, escalar_linhas
+
+    y_prev = pipeline.predict(X_teste)
+    linha = X_teste.iloc[[0]]
+    lote = escalar_linhas(X_teste, linhas_lote)
+    return {
+        "acuracia": accuracy_score(y_teste, y_prev),
+        "relatorio": classification_report(y_teste, y_prev, target_names=le.classes_),
+        "metricas": classification_report(y_teste, y_prev, target_names=le.classes_, output_dict=True),
+        "latencia_linha_ms": medir(lambda: pipeline.predict_proba(linha), repeticoes * 10) * 1e3,
+        "latencia_lote_ms": medir(lambda: pipeline.predict_proba(lote), max(1, repeticoes // 2)) * 1e3,
+        "linhas_lote": linhas_lote,
+        **tamanho_floresta(pipeline.named_steps["model"]),
+    }
+
+
+def formatar_relatorio_compactacao(original, compacto, descricao) -> str:
+    from pipeline_treino import formatar_relatorio
+
+    def delta(chave, formato):
+        return f"{original[chave]:{formato}} -> {compacto[chave]:{formato}}"
+
+    comparacao = (
+        "=== COMPARAÇÃO ORIGINAL x COMPACTO ===\n"
+        f"Compactação: {descricao}\n"
+        f"Acurácia Geral: {delta('acuracia', '.2%')} "
+        f"({(compacto['acuracia'] - original['acuracia']) * 100:+.2f} p.p.)\n"
+        f"Latência 1 linha (ms): {delta('latencia_linha_ms', '.3f')} "
+        f"({original['latencia_linha_ms'] / compacto['latencia_linha_ms']:.1f}x)\n"
+        f"Latência {original['linhas_lote']} linhas (ms): {delta('latencia_lote_ms', '.1f')} "
+        f"({original['latencia_lote_ms'] / compacto['latencia_lote_ms']:.1f}x)\n"
+        f"Nós: {delta('nos', 'd')}\n"
+        f"Bytes das árvores: {delta('bytes', ',d')} "
+        f"({original['bytes'] / compacto['bytes']:.1f}x menor)\n"
+    )
+    return (
+        comparacao
+        + "\n--- Modelo original ---\n"
+        + formatar_relatorio(original["acuracia"], original["relatorio"])
+        + "\n--- Modelo compacto ---\n"
+        + formatar_relatorio(compacto["acuracia"], compacto["relatorio"])
+    )
+
+
+def registrar_compacto(compacto, le, hash_original, identificador_dados, X_treino, avaliacao, parametros, texto):
+    """
+    Registra o pipeline compacto como uma versão no armazenamento de artefatos
+    (com meta.json e referência de drift) e retorna o diretório da versão.
+    """
+    from monitor_drift import construir_referencia
+    from pipeline_treino import diretorio_artefato, hash_conteudo, registrar_artefato
+
+    identificador_modelo = hash_conteudo("compactacao", hash_original, identificador_dados, sorted(parametros.items()))
+    meta = {
+        "modelo": identificador_modelo,
+        "dados": identificador_dados,
+        "estimador": "floresta",
+        "hiperparametros": parametros,
+        "acuracia": avaliacao["acuracia"],
+        "metricas": avaliacao["metricas"],
+        "tempo_treino": avaliacao["tempo_compactacao"],
+        "classes": [str(classe) for classe in le.classes_],
+        "compactacao": {"modelo_base": hash_original, **tamanho_floresta(compacto.named_steps["model"])},
+    }
+    diretorio_modelo = diretorio_artefato(identificador_modelo)
+    registrar_artefato(diretorio_modelo, compacto, le, texto, construir_referencia(X_treino), meta)
+    return diretorio_modelo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compactação do Random Forest treinado.")
+    parser.add_argument("--ccp-alpha", type=float, default=0.0, help="poda por custo-complexidade")
+    parser.add_argument(
+        "--tolerancia-fusao",
+        type=float,
+        default=0.0,
+        help="diferença máxima de probabilidade para fundir folhas irmãs (0: só idênticas)",
+    )
+    parser.add_argument(
+        "--fundir-mesma-classe",
+        action="store_true",
+        help="funde também folhas irmãs com a mesma classe mais provável",
+    )
+    parser.add_argument("--valores", choices=sorted(TIPOS_VALORES), default="uint8")
+    parser.add_argument("--destilar", action="store_true", help="destila em uma floresta menor")
+    parser.add_argument("--arvores", type=int, default=30, help="árvores da floresta destilada")
+    parser.add_argument("--profundidade", type=int, default=12, help="profundidade da floresta destilada")
+    parser.add_argument(
+        "--folhas-minimas", type=int, default=5, help="min_samples_leaf da floresta destilada"
+    )
+    parser.add_argument("--linhas-sinteticas", type=int, default=20_000)
+    parser.add_argument("--saida", type=Path, default=MODELO_COMPACTO_FILE)
+    parser.add_argument(
+        "--publicar",
+        action="store_true",
+        help=(
+            f"registra o modelo compacto como versão em artefatos/ e o publica em {MODEL_FILE.name}, "
+            "usado pelo app (o original pode ser republicado com python src/pipeline_treino.py)"
+        ),
+    )
+    args = parser.parse_args()
+
+    from pipeline_treino import _publicar_artefatos, preprocessar, separar_treino_teste, salvar_relatorio
+
+    hash_original = hash_arquivo(MODEL_FILE)
+    pipeline, le = carregar_artefatos()
+    df_processado, identificador_dados = preprocessar()
+    X_treino, X_teste, y_treino, y_teste, _ = separar_treino_teste(df_processado)
+
+    inicio = time.perf_counter()
+    compacto = compactar_floresta(
+        pipeline,
+        X_treino,
+        y_treino,
+        ccp_alpha=args.ccp_alpha,
+        tolerancia_fusao=args.tolerancia_fusao,
+        fundir_mesma_classe=args.fundir_mesma_classe,
+        tipo_valores=args.valores,
+        destilar=args.destilar,
+        arvores=args.arvores,
+        profundidade=args.profundidade,
+        folhas_minimas=args.folhas_minimas,
+        linhas_sinteticas=args.linhas_sinteticas,
+    )
+    tempo_compactacao = time.perf_counter() - inicio
+    print(f"✅ Floresta compactada em {tempo_compactacao:.1f}s")
+
+    descricao = (
+        f"ccp_alpha={args.ccp_alpha}, tolerancia_fusao={args.tolerancia_fusao}, "
+        f"fundir_mesma_classe={args.fundir_mesma_classe}, valores={args.valores}"
+        + (f", destilação {args.arvores} árvores/profundidade {args.profundidade}" if args.destilar else "")
+    )
+    avaliacao = avaliar_modelo(compacto, X_teste, y_teste, le)
+    texto = formatar_relatorio_compactacao(avaliar_modelo(pipeline, X_teste, y_teste, le), avaliacao, descricao)
+    print(texto)
+    salvar_relatorio(texto, RELATORIO_COMPACTACAO)
+
+    Path(args.saida).parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(compacto, args.saida)
+    print(f"✅ Modelo compacto salvo em: {args.saida}")
+    if args.publicar:
+        parametros = {
+            chave: valor
+            for chave, valor in vars(args).items()
+            if chave not in ("saida", "publicar") and (args.destilar or chave not in ESPECIFICOS_DESTILACAO)
+        }
+        diretorio_modelo = registrar_compacto(
+            compacto,
+            le,
+            hash_original,
+            identificador_dados,
+            X_treino,
+            {**avaliacao, "tempo_compactacao": tempo_compactacao},
+            parametros,
+            texto,
+        )
+        # Troca atômica dos arquivos publicados, inclusive o relatório do modelo
+        _publicar_artefatos(diretorio_modelo)
+        print(f"✅ Modelo compacto {diretorio_modelo.name} registrado e publicado")
+
+
+if __name__ == "__main__":
+    main()
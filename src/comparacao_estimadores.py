@@ -0,0 +1,155 @@
+"""
+Comparação entre os estimadores do pipeline_treino.py (ESTIMADORES).
+
+Treina cada estimador com os mesmos dados e a mesma divisão treino/teste
+(reaproveitando o armazenamento de artefatos quando nada mudou) e mede:
+- tempo de ajuste;
+- latência do predict_proba de uma linha e de um lote;
+- tamanho do pipeline.joblib;
+- acurácia e F1 do classification_report no teste.
+
+Promove (publica para o app) o estimador mais rápido entre os que ficam a até
+`tolerancia` da melhor acurácia; os demais só ficam no armazenamento.
+
+Exemplo:
+    python src/comparacao_estimadores.py
+    python src/comparacao_estimadores.py --tolerancia 0.005 --criterio lote
+    python src/comparacao_estimadores.py --sem-promover
+"""
+
+import argparse
+
+import joblib
+import pandas as pd
+
+from config import DADOS_TREINO, RELATORIO_COMPARACAO_ESTIMADORES
+from benchmarks import medir, escalar_linhas
+from pipeline_treino import (
+    ESTIMADORES,
+    diretorio_artefato,
+    executar_treinamento,
+    preprocessar,
+    salvar_relatorio,
+    separar_treino_teste,
+)
+
+# Perda máxima de acurácia (absoluta) aceita para promover um estimador mais rápido
+TOLERANCIA_ACURACIA_PADRAO = 0.01
+
+# Medida de velocidade usada na escolha -> coluna da tabela de comparação
+CRITERIOS = {
+    "linha": "latencia_linha_ms",
+    "lote": "latencia_lote_us_linha",
+    "treino": "tempo_treino_s",
+}
+
+LINHAS_LOTE_PADRAO = 10_000
+
+
+def medir_latencias(pipeline, X, linhas_lote=LINHAS_LOTE_PADRAO, repeticoes_linha=200, repeticoes_lote=3) -> dict:
+    """Melhor tempo do predict_proba de uma linha (ms) e de um lote (µs por linha)."""
+    linha = X.iloc[[0]]
+    lote = escalar_linhas(X, linhas_lote)
+    pipeline.predict_proba(linha)  # aquecimento
+    return {
+        "latencia_linha_ms": medir(lambda: pipeline.predict_proba(linha), repeticoes_linha) * 1000,
+        "latencia_lote_us_linha": medir(lambda: pipeline.predict_proba(lote), repeticoes_lote) / linhas_lote * 1e6,
+    }
+
+
+def comparar_estimadores(
+    caminho_dados=DADOS_TREINO, estimadores=tuple(ESTIMADORES), forcar=False, linhas_lote=LINHAS_LOTE_PADRAO
+):
+    """
+    Retorna (tabela, f1_por_classe): tabela com uma linha por estimador
+    (métricas, tempos, tamanho e identificador do artefato) e o F1 de cada
+    classe (classes x estimadores).
+    """
+    df_processado, _ = preprocessar(caminho_dados)
+    _, X_teste, _, _, le = separar_treino_teste(df_processado)
+
+    linhas, f1_por_classe = [], {}
+    for estimador in estimadores:
+        meta = executar_treinamento(caminho_dados, forcar=forcar, estimador=estimador, publicar=False)
+        caminho_pipeline = diretorio_artefato(meta["modelo"]) / "pipeline.joblib"
+        pipeline = joblib.load(caminho_pipeline)
+        metricas = meta["metricas"]
+
+        linhas.append(
+            {
+                "estimador": estimador,
+                "acuracia": meta["acuracia"],
+                "f1_macro": metricas["macro avg"]["f1-score"],
+                "f1_ponderado": metricas["weighted avg"]["f1-score"],
+                "tempo_treino_s": meta["tempo_treino"],
+                **medir_latencias(pipeline, X_teste, linhas_lote),
+                "tamanho_mb": caminho_pipeline.stat().st_size / 1e6,
+                "modelo": meta["modelo"],
+            }
+        )
+        f1_por_classe[estimador] = {classe: metricas[classe]["f1-score"] for classe in le.classes_}
+
+    return pd.DataFrame(linhas).set_index("estimador"), pd.DataFrame(f1_por_classe)
+
+
+def escolher_estimador(tabela: pd.DataFrame, tolerancia=TOLERANCIA_ACURACIA_PADRAO, criterio="linha"):
+    """
+    O mais rápido (pela coluna de CRITERIOS[criterio]) entre os estimadores
+    com acurácia >= melhor acurácia - tolerancia. Retorna (nome, motivo).
+    """
+    coluna = CRITERIOS[criterio]
+    mais_preciso = tabela["acuracia"].idxmax()
+    aceitos = tabela[tabela["acuracia"] >= tabela.at[mais_preciso, "acuracia"] - tolerancia]
+    escolhido = aceitos[coluna].idxmin()
+
+    if escolhido == mais_preciso:
+        motivo = f"{escolhido} tem a melhor acurácia"
+        rejeitados = tabela.index[(tabela[coluna] < tabela.at[escolhido, coluna]) & ~tabela.index.isin(aceitos.index)]
+        if len(rejeitados):
+            motivo += f"; {', '.join(rejeitados)} é mais rápido mas perde mais que {tolerancia:.2%} de acurácia"
+    else:
+        perda = tabela.at[mais_preciso, "acuracia"] - tabela.at[escolhido, "acuracia"]
+        motivo = f"{escolhido} é mais rápido ({coluna}) e perde {perda:.2%} de acurácia (tolerância {tolerancia:.2%})"
+    return escolhido, motivo
+
+
+def formatar_comparacao(tabela, f1_por_classe, escolhido, motivo) -> str:
+    return (
+        "=== COMPARAÇÃO DE ESTIMADORES ===\n"
+        + tabela.to_string(float_format=lambda v: f"{v:.4f}")
+        + "\n\nF1 por classe:\n"
+        + f1_por_classe.to_string(float_format=lambda v: f"{v:.4f}")
+        + f"\n\nEstimador escolhido: {escolhido}\nMotivo: {motivo}\n"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara os estimadores do pipeline e promove o escolhido.")
+    parser.add_argument("--dados", default=DADOS_TREINO, help="dataset bruto (padrão: %(default)s)")
+    parser.add_argument("--estimadores", nargs="+", choices=list(ESTIMADORES), default=list(ESTIMADORES))
+    parser.add_argument(
+        "--tolerancia",
+        type=float,
+        default=TOLERANCIA_ACURACIA_PADRAO,
+        help="perda de acurácia aceita para promover o mais rápido (padrão: %(default)s)",
+    )
+    parser.add_argument("--criterio", choices=list(CRITERIOS), default="linha", help="medida de velocidade")
+    parser.add_argument("--linhas-lote", type=int, default=LINHAS_LOTE_PADRAO)
+    parser.add_argument("--forcar", action="store_true", help="retreina mesmo com artefatos em cache")
+    parser.add_argument("--sem-promover", action="store_true", help="só compara, sem publicar o escolhido")
+    args = parser.parse_args()
+
+    tabela, f1_por_classe = comparar_estimadores(args.dados, args.estimadores, args.forcar, args.linhas_lote)
+    escolhido, motivo = escolher_estimador(tabela, args.tolerancia, args.criterio)
+    texto = formatar_comparacao(tabela, f1_por_classe, escolhido, motivo)
+    print("\n" + texto)
+    salvar_relatorio(texto, RELATORIO_COMPARACAO_ESTIMADORES)
+
+    if not args.sem_promover:
+        # Modelo já está no armazenamento: só publica
+        executar_treinamento(args.dados, estimador=escolhido)
+        print(f"🏆 Estimador promovido: {escolhido}")
+
+
+if __name__ == "__main__":
+    main()
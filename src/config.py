@@ -1,7 +1,9 @@
 from pathlib import Path
-from datetime import datetime
 
-data_hoje = datetime.now().strftime("%Y_%m_%d")
+# Este módulo é importado por todos os scripts e pelo app: nada aqui deve
+# tocar o disco ou importar bibliotecas pesadas. As constantes que dependem da
+# data de hoje são calculadas no acesso (ver __getattr__ no fim do arquivo) e as
+# pastas são criadas por garantir_diretorios() por quem vai gravar arquivos.
 
 # Raiz do Projeto
 ROOT_DIR = Path(__file__).resolve().parent.parent
@@ -15,11 +17,71 @@ SRC_DIR = ROOT_DIR / "src"
 OBESITY_CSV = DATA_DIR / "Obesity.csv"
 MAPA_COLUNAS = DATA_DIR / "mapa_colunas.json"
 MAPA_VALORES_COLUNA = DATA_DIR / "mapa_valores_colunas.json"
-RELATORIO_MODELO = DATA_DIR / f"relatorio_classificacao_{data_hoje}.txt"
+DESCRICAO_DADOS = DATA_DIR / "descricao_dados_obesidade.json"
+
+# Dataset de treino e dataset processado: o formato (csv, parquet ou feather)
+# é definido pela extensão do arquivo
+DADOS_TREINO = OBESITY_CSV
+DADOS_PROCESSADOS = DATA_DIR / "obesidade_processado_pipeline.csv"
 
 # caminhos pasta models
 LABEL_ENCODER_FILE = MODELS_DIR / "label_encoder_rf.joblib"
 MODEL_FILE = MODELS_DIR / "pipeline_completa_rf.joblib"
+TABELA_PROBABILIDADES_FILE = MODELS_DIR / "tabela_probabilidades.bin"
+TABELA_PROBABILIDADES_META = MODELS_DIR / "tabela_probabilidades.json"
+MELHORES_HIPERPARAMETROS_FILE = MODELS_DIR / "melhores_hiperparametros.json"
+MODELO_COMPACTO_FILE = MODELS_DIR / "pipeline_compacta_rf.joblib"
+# Distribuição das variáveis de entrada no treino (monitor_drift.py)
+REFERENCIA_DRIFT_FILE = MODELS_DIR / "referencia_drift.json"
+
+# Artefato do modelo com os arrays da floresta em .npy (carregados via memory-map)
+ARTEFATO_MMAP_DIR = MODELS_DIR / "artefato_mmap"
+
+# Artefatos do treinamento endereçados pelo hash de dados, mapas e hiperparâmetros
+ARTEFATOS_DIR = MODELS_DIR / "artefatos"
+# Cache do joblib.Memory usado pelo Pipeline(memory=...) no treinamento
+CACHE_PIPELINE_DIR = MODELS_DIR / "cache_pipeline"
+
+# Resultados da suíte de benchmarks (json) e base para detectar regressões
+BENCHMARKS_DIR = ROOT_DIR / "benchmarks"
+BENCHMARK_BASE = BENCHMARKS_DIR / "base.json"
+
+# Métricas de latência por etapa gravadas com OBESIDADE_INSTRUMENTACAO=1 (instrumentacao.py)
+METRICAS_DIR = ROOT_DIR / "metricas"
+# Contadores do monitor de drift no app e na pontuação em lote
+ESTADO_DRIFT_APP = METRICAS_DIR / "drift_app.json"
+ESTADO_DRIFT_LOTE = METRICAS_DIR / "drift_pontuacao_lote.json"
+
+# Registro de auditoria das predições do app em Parquet (auditoria.py)
+AUDITORIA_DIR = ROOT_DIR / "auditoria"
+
+
+def garantir_diretorios() -> None:
+    """Garante que as pastas essenciais existam."""
+    MODELS_DIR.mkdir(parents=True, exist_ok=True)
+
+
+def _data_hoje() -> str:
+    from datetime import datetime
+
+    return datetime.now().strftime("%Y_%m_%d")
+
+
+# Constantes calculadas no acesso (ex: from config import RELATORIO_MODELO)
+_CONSTANTES_DATADAS = {
+    "data_hoje": _data_hoje,
+    "RELATORIO_MODELO": lambda: DATA_DIR / f"relatorio_classificacao_{_data_hoje()}.txt",
+    "RELATORIO_COMPACTACAO": lambda: DATA_DIR / f"relatorio_compactacao_{_data_hoje()}.txt",
+    "RELATORIO_RETREINO": lambda: DATA_DIR / f"relatorio_retreino_incremental_{_data_hoje()}.txt",
+    "RELATORIO_AVALIACAO": lambda: DATA_DIR / f"relatorio_avaliacao_{_data_hoje()}.txt",
+    "RELATORIO_COMPARACAO_ESTIMADORES": lambda: DATA_DIR / f"comparacao_estimadores_{_data_hoje()}.txt",
+    "TABELA_BUSCA_HIPERPARAMETROS": lambda: DATA_DIR / f"busca_hiperparametros_{_data_hoje()}.csv",
+    "BENCHMARK_RESULTADO": lambda: BENCHMARKS_DIR / f"resultado_{_data_hoje()}.json",
+    "BENCHMARK_IMPORTACAO": lambda: BENCHMARKS_DIR / f"importacao_{_data_hoje()}.json",
+}
+
 
-# Garante que as pastas essenciais existam
-MODELS_DIR.mkdir(parents=True, exist_ok=True)
+def __getattr__(nome):
+    if nome in _CONSTANTES_DATADAS:
+        return _CONSTANTES_DATADAS[nome]()
+    raise AttributeError(f"module 'config' has no attribute '{nome}'")
@@ -0,0 +1,376 @@
+"""
+Contrato de dados do questionário de obesidade.
+
+As regras são montadas a partir do mapa_colunas.json, do
+mapa_valores_colunas.json e do descricao_dados_obesidade.json:
+- colunas esperadas (nomes originais ou já renomeados, conforme a fase);
+- tipo de cada coluna (numérica ou categórica);
+- conjunto de categorias permitidas (valores originais na fase "bruto",
+  valores novos na fase "processado");
+- faixa válida das colunas numéricas (idade, altura, peso, fcvc, ncp, ...);
+- taxa máxima de nulos por coluna;
+- linhas duplicadas.
+
+Cada bloco é avaliado em uma passada vetorizada por coluna e o resultado é
+acumulado em contadores, então o mesmo contrato valida um arquivo inteiro, um
+arquivo lido em blocos ou os blocos da pontuação em lote conforme chegam.
+As duplicadas entre blocos são detectadas pelo hash de cada linha (8 bytes
+por linha).
+
+Exemplo:
+    python src/contrato_dados.py dados/Obesity.csv
+    python src/contrato_dados.py dados/obesidade_processado_pipeline.csv --fase processado
+    python src/contrato_dados.py populacao.parquet --tamanho-bloco 100000 --json /tmp/contrato.json
+"""
+
+import argparse
+import json
+import sys
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import MAPA_COLUNAS, MAPA_VALORES_COLUNA, DESCRICAO_DADOS
+from motor_preprocessamento import COLUNAS_POR_MAPEAMENTO
+from utils import ler_json, ler_dataset_em_blocos
+
+# Faixas válidas das respostas numéricas (nomes após a renomeação)
+FAIXAS_NUMERICAS = {
+    "idade": (1, 120),
+    "altura": (0.5, 2.5),
+    "peso": (10, 350),
+    "fcvc": (1, 3),
+    "ncp": (1, 4),
+    "ch20": (1, 3),
+    "faf": (0, 3),
+    "tue": (0, 2),
+}
+
+# Colunas que podem faltar na entrada (a pontuação em lote não tem o alvo)
+COLUNAS_OPCIONAIS = {"classificacao_peso_corporal"}
+
+# Quantidade máxima de exemplos de valores inválidos guardados por regra de cada coluna
+MAX_EXEMPLOS = 10
+
+FASES = ("bruto", "processado")
+
+
+@dataclass
+class RegraColuna:
+    """Regras de uma coluna do contrato."""
+
+    coluna: str
+    tipo: str  # "numerica" ou "categorica"
+    permitidos: tuple = ()
+    minimo: float = None
+    maximo: float = None
+    max_nulos: float = 0.0
+    obrigatoria: bool = True
+    descricao: str = ""
+
+
+@dataclass
+class ResultadoColuna:
+    """Contagens acumuladas de uma coluna."""
+
+    nulos: int = 0
+    tipo_invalido: int = 0
+    fora_da_faixa: int = 0
+    categoria_invalida: int = 0
+    exemplos: dict = field(default_factory=dict)
+
+
+@dataclass
+class RelatorioContrato:
+    """
+    Resultado da validação. violacoes lista as regras quebradas, cada uma com
+    regra, coluna, quantidade de linhas e exemplos de valores.
+    """
+
+    fase: str
+    linhas: int = 0
+    blocos: int = 0
+    colunas_ausentes: list = field(default_factory=list)
+    colunas_extras: list = field(default_factory=list)
+    duplicadas: int = 0
+    colunas: dict = field(default_factory=dict)
+    violacoes: list = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.violacoes
+
+    def para_dict(self) -> dict:
+        return {**asdict(self), "ok": self.ok}
+
+    def formatar(self) -> str:
+        linhas = [
+            f"Contrato de dados ({self.fase}): {self.linhas} linhas em {self.blocos} bloco(s), "
+            f"{self.duplicadas} duplicadas"
+        ]
+        if self.ok:
+            linhas.append("✅ Todas as regras atendidas.")
+        for violacao in self.violacoes:
+            exemplos = f" ex: {violacao['exemplos']}" if violacao.get("exemplos") else ""
+            linhas.append(
+                f"❌ {violacao['regra']}: {violacao['coluna']} ({violacao['quantidade']} linhas){exemplos}"
+            )
+        return "\n".join(linhas)
+
+
+class ContratoDados:
+    """Conjunto de regras por coluna para uma fase (dados brutos ou processados)."""
+
+    def __init__(self, regras, fase="bruto", max_duplicadas=None):
+        self.regras = {regra.coluna: regra for regra in regras}
+        self.fase = fase
+        # None: duplicadas só são reportadas, sem violar o contrato
+        self.max_duplicadas = max_duplicadas
+
+    @classmethod
+    def de_mapas(
+        cls,
+        mapa_colunas: dict,
+        mapa_valores_colunas: dict,
+        descricao: dict = None,
+        fase="bruto",
+        max_nulos=0.0,
+        max_duplicadas=None,
+        opcionais=COLUNAS_OPCIONAIS,
+    ) -> "ContratoDados":
+        """
+        Monta o contrato a partir dos mapas JSON do projeto. `opcionais` são as
+        colunas (nomes renomeados) que podem faltar na entrada.
+        """
+        if fase not in FASES:
+            raise ValueError(f"fase deve ser uma de {FASES}, recebido '{fase}'")
+        descricao = descricao or {}
+
+        permitidos = {}
+        for mapeamento, (colunas, chave) in COLUNAS_POR_MAPEAMENTO.items():
+            if mapeamento not in (mapa_valores_colunas or {}):
+                continue
+            mapa = mapa_valores_colunas[mapeamento][chave]
+            valores = list(mapa) if fase == "bruto" else list(dict.fromkeys(mapa.values()))
+            for coluna in colunas:
+                permitidos[coluna] = tuple(valores)
+
+        regras = []
+        for original, renomeada in mapa_colunas.items():
+            nome = original if fase == "bruto" else renomeada
+            comum = {
+                "coluna": nome,
+                "max_nulos": max_nulos,
+                "obrigatoria": renomeada not in opcionais,
+                "descricao": descricao.get(original, ""),
+            }
+            if renomeada in FAIXAS_NUMERICAS:
+                minimo, maximo = FAIXAS_NUMERICAS[renomeada]
+                regras.append(RegraColuna(tipo="numerica", minimo=minimo, maximo=maximo, **comum))
+            elif renomeada in permitidos:
+                regras.append(RegraColuna(tipo="categorica", permitidos=permitidos[renomeada], **comum))
+        return cls(regras, fase, max_duplicadas)
+
+    @classmethod
+    def carregar(cls, fase="bruto", **kwargs) -> "ContratoDados":
+        """Contrato dos mapas padrão do projeto (pasta dados)."""
+        return cls.de_mapas(
+            ler_json(MAPA_COLUNAS), ler_json(MAPA_VALORES_COLUNA), ler_json(DESCRICAO_DADOS), fase, **kwargs
+        )
+
+    def validador(self) -> "ValidadorContrato":
+        return ValidadorContrato(self)
+
+    def validar(self, df: pd.DataFrame) -> RelatorioContrato:
+        """Valida um DataFrame inteiro (um único bloco)."""
+        validador = self.validador()
+        validador.atualizar(df)
+        return validador.finalizar()
+
+    def validar_arquivo(self, caminho, tamanho_bloco=100_000) -> RelatorioContrato:
+        """Valida um arquivo (csv, parquet ou feather) lido em blocos."""
+        validador = self.validador()
+        for bloco in ler_dataset_em_blocos(caminho, tamanho_bloco):
+            validador.atualizar(bloco)
+        return validador.finalizar()
+
+
+def _exemplos(resultado: ResultadoColuna, regra: str, valores) -> None:
+    acumulados = resultado.exemplos.setdefault(regra, [])
+    for valor in valores:
+        if len(acumulados) >= MAX_EXEMPLOS:
+            break
+        if str(valor) not in acumulados:
+            acumulados.append(str(valor))
+
+
+def _codificar(serie: pd.Series):
+    """Códigos (-1 para nulo) e valores distintos da coluna, em uma passada."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.codes.to_numpy(), serie.cat.categories
+    return pd.factorize(serie)
+
+
+def _hash_codigos(codigos: np.ndarray, valores) -> np.ndarray:
+    """Hash de cada linha pelo hash dos valores distintos (estável entre blocos)."""
+    hashes = pd.util.hash_array(np.asarray(valores, dtype=object))
+    return np.append(hashes, _HASH_NULO)[codigos]
+
+
+# Constantes da combinação dos hashes das colunas em um hash por linha
+_HASH_NULO = np.uint64(0x9E3779B97F4A7C15)
+_HASH_MULTIPLICADOR = np.uint64(0x100000001B3)
+
+
+class ValidadorContrato:
+    """
+    Acumula a validação bloco a bloco (modo streaming). atualizar() avalia
+    todas as regras do bloco; finalizar() calcula duplicadas e violações.
+    """
+
+    def __init__(self, contrato: ContratoDados):
+        self.contrato = contrato
+        self.linhas = 0
+        self.blocos = 0
+        self.resultados = {coluna: ResultadoColuna() for coluna in contrato.regras}
+        self.colunas_vistas = None
+        self.colunas_extras = set()
+        self._hashes = []
+
+    def atualizar(self, df: pd.DataFrame) -> None:
+        if self.colunas_vistas is None:
+            self.colunas_vistas = set(df.columns)
+        else:
+            self.colunas_vistas &= set(df.columns)
+        self.colunas_extras |= set(df.columns) - set(self.contrato.regras)
+        self.linhas += len(df)
+        self.blocos += 1
+
+        # Cada coluna é lida uma vez: os mesmos códigos/valores servem às
+        # regras e ao hash da linha (as duplicadas entre blocos são contadas no fim)
+        hash_linhas = np.zeros(len(df), dtype=np.uint64)
+        for coluna in df.columns:
+            serie = df[coluna]
+            regra = self.contrato.regras.get(coluna)
+
+            if regra is not None and regra.tipo == "numerica" and pd.api.types.is_numeric_dtype(serie.dtype):
+                numeros = serie.to_numpy(dtype=float)
+                nulos = np.isnan(numeros)
+                tipo_invalido = np.zeros(len(df), dtype=bool)
+                hash_coluna = pd.util.hash_array(numeros)
+            else:
+                codigos, valores = _codificar(serie)
+                nulos = codigos < 0
+                hash_coluna = _hash_codigos(codigos, valores)
+                if regra is not None and regra.tipo == "numerica":
+                    numeros_distintos = pd.to_numeric(pd.Series(valores, dtype=object), errors="coerce")
+                    numeros = np.append(numeros_distintos.to_numpy(dtype=float), np.nan)[codigos]
+                    tipo_invalido = np.isnan(numeros) & ~nulos
+            hash_linhas = hash_linhas * _HASH_MULTIPLICADOR ^ hash_coluna
+
+            if regra is None:
+                continue
+            resultado = self.resultados[coluna]
+            resultado.nulos += int(nulos.sum())
+
+            if regra.tipo == "numerica":
+                fora = (numeros < regra.minimo) | (numeros > regra.maximo)
+                resultado.tipo_invalido += int(tipo_invalido.sum())
+                resultado.fora_da_faixa += int(fora.sum())
+                if tipo_invalido.any():
+                    _exemplos(resultado, "tipo_invalido", pd.unique(serie[tipo_invalido]))
+                if fora.any():
+                    _exemplos(resultado, "fora_da_faixa", pd.unique(numeros[fora]))
+            else:
+                # Compara só os valores distintos e indexa pelos códigos
+                distintos_invalidos = ~pd.Index(valores).isin(regra.permitidos)
+                invalidos = np.append(distintos_invalidos, False)[codigos]
+                resultado.categoria_invalida += int(invalidos.sum())
+                if invalidos.any():
+                    _exemplos(resultado, "categoria_invalida", np.asarray(valores)[distintos_invalidos])
+
+        self._hashes.append(hash_linhas)
+
+    def finalizar(self) -> RelatorioContrato:
+        contrato = self.contrato
+        colunas_vistas = self.colunas_vistas or set()
+        relatorio = RelatorioContrato(
+            fase=contrato.fase,
+            linhas=self.linhas,
+            blocos=self.blocos,
+            colunas_ausentes=[
+                c for c, r in contrato.regras.items() if r.obrigatoria and c not in colunas_vistas
+            ],
+            colunas_extras=sorted(self.colunas_extras),
+        )
+        if self._hashes:
+            hashes = np.concatenate(self._hashes)
+            relatorio.duplicadas = int(len(hashes) - len(np.unique(hashes)))
+
+        for coluna in relatorio.colunas_ausentes:
+            relatorio.violacoes.append({"regra": "coluna_ausente", "coluna": coluna, "quantidade": self.linhas})
+
+        for coluna, resultado in self.resultados.items():
+            regra = contrato.regras[coluna]
+            relatorio.colunas[coluna] = {
+                "tipo": regra.tipo,
+                "descricao": regra.descricao,
+                **asdict(resultado),
+                "taxa_nulos": resultado.nulos / self.linhas if self.linhas else 0.0,
+            }
+            if coluna not in colunas_vistas:
+                continue
+            contagens = {
+                "tipo_invalido": resultado.tipo_invalido,
+                "fora_da_faixa": resultado.fora_da_faixa,
+                "categoria_invalida": resultado.categoria_invalida,
+            }
+            if self.linhas and resultado.nulos / self.linhas > regra.max_nulos:
+                contagens["nulos_acima_do_limite"] = resultado.nulos
+            for nome_regra, quantidade in contagens.items():
+                if quantidade:
+                    relatorio.violacoes.append(
+                        {
+                            "regra": nome_regra,
+                            "coluna": coluna,
+                            "quantidade": quantidade,
+                            "exemplos": resultado.exemplos.get(nome_regra, []),
+                        }
+                    )
+
+        if contrato.max_duplicadas is not None and relatorio.duplicadas > contrato.max_duplicadas:
+            relatorio.violacoes.append(
+                {"regra": "duplicadas", "coluna": "*", "quantidade": relatorio.duplicadas}
+            )
+        return relatorio
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Valida um arquivo contra o contrato de dados.")
+    parser.add_argument("arquivo", help="csv, parquet ou feather")
+    parser.add_argument("--fase", choices=FASES, default="bruto")
+    parser.add_argument("--tamanho-bloco", type=int, default=100_000)
+    parser.add_argument("--max-nulos", type=float, default=0.0, help="taxa máxima de nulos por coluna")
+    parser.add_argument(
+        "--max-duplicadas", type=int, default=None, help="quantidade máxima de linhas duplicadas"
+    )
+    parser.add_argument("--json", default=None, help="grava o relatório estruturado em json")
+    args = parser.parse_args()
+
+    contrato = ContratoDados.carregar(args.fase, max_nulos=args.max_nulos, max_duplicadas=args.max_duplicadas)
+    relatorio = contrato.validar_arquivo(args.arquivo, args.tamanho_bloco)
+    print(relatorio.formatar())
+
+    if args.json:
+        Path(args.json).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(relatorio.para_dict(), f, ensure_ascii=False, indent=2)
+        print(f"✅ Relatório salvo em: {args.json}")
+    if not relatorio.ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
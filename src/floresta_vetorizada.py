@@ -0,0 +1,282 @@
+import numpy as np
+from sklearn.base import BaseEstimator, ClassifierMixin, clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
+
+
+def arredondar_limiar_float32(limiar):
+    """
+    Converte limiares float64 para o maior float32 que não os ultrapassa.
+
+    Como a entrada das árvores é float32, para qualquer x float32 vale
+    x <= limiar  <=>  x <= arredondar_limiar_float32(limiar), então a
+    comparação pode ser feita toda em float32 sem mudar nenhuma decisão.
+    """
+    limiar = np.asarray(limiar, dtype=np.float64)
+    limiar32 = limiar.astype(np.float32)
+    acima = limiar32.astype(np.float64) > limiar
+    limiar32[acima] = np.nextafter(limiar32[acima], np.float32(-np.inf))
+    return limiar32
+
+
+class FlorestaVetorizada(ClassifierMixin, BaseEstimator):
+    """
+    Motor de inferência para RandomForestClassifier.
+
+    Todas as árvores da floresta são empacotadas em arrays NumPy contíguos
+    (feature, limiar, filhos e probabilidades de cada nó) e as linhas descem
+    as árvores de forma vetorizada, um nível por iteração:
+    - lotes pequenos percorrem todas as árvores ao mesmo tempo, o que elimina
+      o custo fixo por árvore do sklearn (principal custo em uma predição);
+    - lotes grandes percorrem uma árvore por vez, com todas as linhas juntas,
+      mantendo os arrays da árvore no cache.
+
+    As probabilidades são idênticas às do RandomForestClassifier original
+    (mesma conversão para float32, mesma normalização e mesma ordem de soma
+    das árvores do sklearn com n_jobs=1).
+
+    floresta: RandomForestClassifier (não treinado) usado como molde no fit.
+    Para reaproveitar uma floresta já treinada use FlorestaVetorizada.de_floresta.
+
+    tamanho_bloco: quantidade de linhas processadas por vez, limita a memória
+    dos arrays intermediários.
+
+    limite_simultaneo: até quantos pares (linha, árvore) o bloco é percorrido
+    com todas as árvores ao mesmo tempo.
+    """
+
+    def __init__(self, floresta=None, tamanho_bloco=65536, limite_simultaneo=200_000):
+        self.floresta = floresta
+        self.tamanho_bloco = tamanho_bloco
+        self.limite_simultaneo = limite_simultaneo
+
+    @classmethod
+    def de_floresta(cls, floresta: RandomForestClassifier, **kwargs):
+        """Cria o motor a partir de um RandomForestClassifier já treinado."""
+        if not isinstance(floresta, RandomForestClassifier):
+            raise ValueError(f"Esperado RandomForestClassifier, recebido {type(floresta).__name__}")
+        motor = cls(**kwargs)
+        motor._empacotar(floresta)
+        return motor
+
+    def fit(self, X, y):
+        floresta = clone(self.floresta) if self.floresta is not None else RandomForestClassifier()
+        floresta.fit(X, y)
+        self._empacotar(floresta)
+        return self
+
+    def _empacotar(self, floresta):
+        arvores = [estimador.tree_ for estimador in floresta.estimators_]
+        tamanhos = np.array([arvore.node_count for arvore in arvores])
+        deslocamentos = np.concatenate(([0], np.cumsum(tamanhos)[:-1]))
+
+        features, limiares, filhos, nan_esquerda, valores = [], [], [], [], []
+        for arvore, deslocamento in zip(arvores, deslocamentos):
+            folha = arvore.children_left == -1
+            proprio = np.arange(arvore.node_count) + deslocamento
+
+            # Nas folhas o limiar é +inf e os dois filhos apontam para a própria
+            # folha, assim as linhas que chegam cedo ficam paradas
+            features.append(np.where(folha, 0, arvore.feature))
+            limiares.append(np.where(folha, np.inf, arvore.threshold))
+            esquerda = np.where(folha, proprio, arvore.children_left + deslocamento)
+            direita = np.where(folha, proprio, arvore.children_right + deslocamento)
+            filhos.append(np.column_stack([esquerda, direita]).ravel())
+            nan_esquerda.append(arvore.missing_go_to_left.astype(bool))
+
+            # Mesma normalização do DecisionTreeClassifier.predict_proba
+            valor = arvore.value[:, 0, :]
+            normalizador = valor.sum(axis=1, keepdims=True)
+            normalizador[normalizador == 0.0] = 1.0
+            valores.append(valor / normalizador)
+
+        self.feature_ = np.ascontiguousarray(np.concatenate(features), dtype=np.intp)
+        self.limiar_ = arredondar_limiar_float32(np.concatenate(limiares))
+        # filhos_[2 * no] é o filho da esquerda e filhos_[2 * no + 1] o da direita
+        self.filhos_ = np.ascontiguousarray(np.concatenate(filhos), dtype=np.intp)
+        self.nan_esquerda_ = np.concatenate(nan_esquerda)
+        self.valores_ = np.ascontiguousarray(np.concatenate(valores), dtype=np.float64)
+        self.raizes_ = deslocamentos.astype(np.intp)
+        self.profundidades_ = np.array([arvore.max_depth for arvore in arvores], dtype=np.intp)
+
+        self.classes_ = floresta.classes_
+        self.n_classes_ = floresta.n_classes_
+        self.n_features_in_ = floresta.n_features_in_
+        if hasattr(floresta, "feature_names_in_"):
+            self.feature_names_in_ = floresta.feature_names_in_
+        return self
+
+    @property
+    def n_arvores_(self):
+        return len(self.raizes_)
+
+    def _validar_X(self, X):
+        # O sklearn converte a entrada das árvores para float32
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"X deve ter {self.n_features_in_} colunas, recebido shape {X.shape}"
+            )
+        return X
+
+    def _ir_direita(self, x, nos, tem_nan):
+        ir_direita = x > self.limiar_[nos]
+        if tem_nan:
+            ir_direita |= np.isnan(x) & ~self.nan_esquerda_[nos]
+        return ir_direita
+
+    def _folhas_simultaneas(self, X):
+        """Percorre todas as árvores ao mesmo tempo; retorna folhas (linhas x árvores)."""
+        n_linhas, n_features = X.shape
+        X_plano = X.ravel()
+        tem_nan = bool(np.isnan(X_plano).any())
+        base = np.repeat(np.arange(n_linhas) * n_features, self.n_arvores_)
+        nos = np.tile(self.raizes_, n_linhas)
+
+        for _ in range(self.profundidades_.max(initial=0)):
+            x = X_plano[base + self.feature_[nos]]
+            # filhos_ pode estar guardado em int32 (FlorestaCompacta)
+            nos = self.filhos_[2 * nos + self._ir_direita(x, nos, tem_nan)]
+            nos = nos.astype(np.intp, copy=False)
+        return nos.reshape(n_linhas, self.n_arvores_)
+
+    def _folhas_por_arvore(self, X):
+        """Percorre uma árvore de cada vez; gera as folhas (globais) de cada árvore."""
+        n_linhas = len(X)
+        X_colunas = np.ascontiguousarray(X.T).ravel()
+        tem_nan = bool(np.isnan(X_colunas).any())
+        linhas = np.arange(n_linhas)
+
+        for raiz, profundidade in zip(self.raizes_, self.profundidades_):
+            nos = np.full(n_linhas, raiz, dtype=np.intp)
+            for _ in range(profundidade):
+                # np.intp evita estouro quando feature_ é guardado em um inteiro pequeno
+                x = X_colunas[self.feature_[nos] * np.intp(n_linhas) + linhas]
+                # filhos_ pode estar guardado em int32 (FlorestaCompacta)
+                nos = self.filhos_[2 * nos + self._ir_direita(x, nos, tem_nan)]
+                nos = nos.astype(np.intp, copy=False)
+            yield nos
+
+    def _iterar_folhas(self, X):
+        """Gera, para cada árvore em ordem, as folhas alcançadas pelas linhas de X."""
+        if len(X) * self.n_arvores_ <= self.limite_simultaneo:
+            folhas = self._folhas_simultaneas(X)
+            for t in range(self.n_arvores_):
+                yield folhas[:, t]
+        else:
+            yield from self._folhas_por_arvore(X)
+
+    def _blocos(self, X):
+        for inicio in range(0, len(X), self.tamanho_bloco):
+            yield slice(inicio, inicio + self.tamanho_bloco)
+
+    def aplicar(self, X):
+        """Retorna o índice global da folha alcançada em cada árvore (linhas x árvores)."""
+        X = self._validar_X(X)
+        folhas = np.empty((len(X), self.n_arvores_), dtype=np.intp)
+        for bloco in self._blocos(X):
+            for t, folhas_arvore in enumerate(self._iterar_folhas(X[bloco])):
+                folhas[bloco, t] = folhas_arvore
+        return folhas
+
+    def predict_proba(self, X):
+        X = self._validar_X(X)
+        proba = np.empty((len(X), self.n_classes_), dtype=np.float64)
+
+        for bloco in self._blocos(X):
+            # Soma árvore a árvore, na mesma ordem do RandomForestClassifier
+            acumulado = np.zeros((len(X[bloco]), self.n_classes_), dtype=np.float64)
+            for folhas_arvore in self._iterar_folhas(X[bloco]):
+                acumulado += self.valores_[folhas_arvore]
+            acumulado /= self.n_arvores_
+            proba[bloco] = acumulado
+
+        return proba
+
+    def predict(self, X):
+        proba = self.predict_proba(X)
+        return self.classes_.take(np.argmax(proba, axis=1), axis=0)
+
+    def contribuicoes(self, X):
+        """
+        Decomposição de cada predição pelos caminhos percorridos nas árvores:
+        em cada divisão, a variação das probabilidades do nó para o filho
+        escolhido é atribuída à feature da divisão.
+
+        Retorna (base, contribuicoes): base (n_classes,) é a média das raízes
+        (a distribuição das classes no treino) e contribuicoes tem shape
+        (linhas, features, n_classes), com
+        base + contribuicoes.sum(axis=1) == predict_proba(X)
+        (a menos de arredondamento de ponto flutuante).
+        """
+        X = self._validar_X(X)
+        valores = np.asarray(self.valores_, dtype=np.float64)
+        base = valores[self.raizes_].mean(axis=0)
+        contribuicoes = np.zeros((len(X), X.shape[1], self.n_classes_), dtype=np.float64)
+
+        # Todas as árvores ao mesmo tempo, em blocos de até limite_simultaneo pares
+        linhas_por_bloco = max(1, self.limite_simultaneo // self.n_arvores_)
+        for inicio in range(0, len(X), linhas_por_bloco):
+            bloco = X[inicio : inicio + linhas_por_bloco]
+            contribuicoes[inicio : inicio + len(bloco)] = self._contribuicoes_bloco(bloco, valores)
+        return base, contribuicoes
+
+    def _contribuicoes_bloco(self, X, valores):
+        n_linhas, n_features = X.shape
+        X_plano = X.ravel()
+        tem_nan = bool(np.isnan(X_plano).any())
+        base = np.repeat(np.arange(n_linhas) * n_features, self.n_arvores_)
+        nos = np.tile(self.raizes_, n_linhas)
+        tamanho = n_linhas * n_features
+        acumulado = np.zeros((self.n_classes_, tamanho), dtype=np.float64)
+
+        for _ in range(self.profundidades_.max(initial=0)):
+            posicoes = base + self.feature_[nos].astype(np.intp, copy=False)
+            filhos = self.filhos_[2 * nos + self._ir_direita(X_plano[posicoes], nos, tem_nan)]
+            filhos = filhos.astype(np.intp, copy=False)
+            # Pares que já chegaram a uma folha (filho == nó) não contribuem
+            ativos = np.flatnonzero(filhos != nos)
+            variacao = valores[filhos[ativos]] - valores[nos[ativos]]
+            # Um bincount por classe é bem mais rápido que np.add.at
+            for classe in range(self.n_classes_):
+                acumulado[classe] += np.bincount(
+                    posicoes[ativos], weights=variacao[:, classe], minlength=tamanho
+                )
+            nos = filhos
+        return acumulado.T.reshape(n_linhas, n_features, self.n_classes_) / self.n_arvores_
+
+
+class FlorestaCompacta(FlorestaVetorizada):
+    """
+    FlorestaVetorizada com armazenamento reduzido (features em uint8, filhos
+    em int32, probabilidades em float32 ou uint8), montada pelo
+    compactacao_floresta.py. Com as probabilidades quantizadas em uint8
+    (0 a 255) a soma de cada linha não é exatamente 1, então o predict_proba
+    normaliza as linhas ao final.
+    """
+
+    def predict_proba(self, X):
+        proba = super().predict_proba(X)
+        proba /= proba.sum(axis=1, keepdims=True)
+        return proba
+
+    def contribuicoes(self, X):
+        """
+        Como em FlorestaVetorizada.contribuicoes, com a mesma normalização
+        por linha do predict_proba aplicada à base e às contribuições: aqui a
+        base tem shape (linhas, n_classes).
+        """
+        base, contribuicoes = super().contribuicoes(X)
+        total = base.sum() + contribuicoes.sum(axis=(1, 2))
+        return base / total[:, None], contribuicoes / total[:, None, None]
+
+
+def acoplar_floresta_vetorizada(pipeline: Pipeline, passo="model") -> Pipeline:
+    """
+    Retorna um novo Pipeline com o RandomForestClassifier do passo informado
+    substituído pela FlorestaVetorizada. Os passos anteriores são reaproveitados.
+    """
+    passos = list(pipeline.steps)
+    indice = [nome for nome, _ in passos].index(passo)
+    passos[indice] = (passo, FlorestaVetorizada.de_floresta(passos[indice][1]))
+    return Pipeline(steps=passos)
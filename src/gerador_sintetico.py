@@ -0,0 +1,324 @@
+"""
+Gerador de dados sintéticos no formato do Obesity.csv, para testes de carga.
+
+O GeradorSintetico aprende do dataset bruto, por classe de peso:
+- a distribuição conjunta das colunas categóricas (cada combinação observada
+  de gênero, hábitos e transporte é sorteada com a sua frequência na classe);
+- média e covariância das colunas numéricas por classe e gênero, sorteadas de
+  uma normal multivariada e limitadas ao intervalo observado no grupo.
+
+As colunas e os vocabulários de cada coluna categórica são os do
+mapa_colunas.json e do mapa_valores_colunas.json, então a saída passa pelo
+mesmo pré-processamento do treinamento e da pontuação em lote.
+
+A geração é feita em blocos vetorizados. Cada bloco tem a sua própria semente
+derivada (SeedSequence) da semente principal, então o resultado é o mesmo com
+qualquer número de processos.
+
+Exemplo:
+    python src/gerador_sintetico.py populacao.parquet --linhas 100000000
+    python src/gerador_sintetico.py carga.csv --linhas 50000 --proporcoes obesidade_tipo_3=0.5,peso_normal=0.5
+"""
+
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from config import DADOS_TREINO, MAPA_COLUNAS, MAPA_VALORES_COLUNA
+from motor_preprocessamento import COLUNAS_POR_MAPEAMENTO
+from utils import ler_json, ler_dataset, EscritorDataset
+
+TAMANHO_BLOCO_PADRAO = 1_000_000
+COLUNA_ALVO = "classificacao_peso_corporal"
+COLUNA_GRUPO_NUMERICO = "genero"
+
+# Gerador de cada processo do pool, recebido uma única vez no initializer
+_estado_worker = {}
+
+
+class GeradorSintetico:
+    """
+    Modelo gerador por classe, ajustado com GeradorSintetico.ajustar.
+
+    proporcoes: dicionário classe -> peso (nomes do dataset bruto ou já
+    transformados, ex: "Obesity_Type_I" ou "obesidade_tipo_1"). Classes
+    ausentes recebem peso 0; sem proporcoes, usa a frequência do dataset.
+    """
+
+    def __init__(self, mapa_colunas, mapa_valores_colunas):
+        self.colunas = list(mapa_colunas)
+        original_por_nova = {nova: original for original, nova in mapa_colunas.items()}
+        self.coluna_alvo = original_por_nova[COLUNA_ALVO]
+        self.coluna_grupo = original_por_nova[COLUNA_GRUPO_NUMERICO]
+
+        # Vocabulário de cada coluna categórica bruta (chaves do mapeamento)
+        self.vocabularios = {}
+        self.traducoes = {}
+        for mapeamento, (colunas, chave) in COLUNAS_POR_MAPEAMENTO.items():
+            valores = mapa_valores_colunas[mapeamento][chave]
+            for coluna in colunas:
+                if coluna in original_por_nova:
+                    self.vocabularios[original_por_nova[coluna]] = list(valores)
+                    self.traducoes[original_por_nova[coluna]] = valores
+
+        self.categoricas = [
+            c for c in self.colunas if c in self.vocabularios and c != self.coluna_alvo
+        ]
+        self.numericas = [c for c in self.colunas if c not in self.vocabularios]
+
+    @classmethod
+    def ajustar(cls, df, mapa_colunas, mapa_valores_colunas, proporcoes=None):
+        gerador = cls(mapa_colunas, mapa_valores_colunas)
+        gerador._ajustar(df)
+        if proporcoes:
+            gerador.definir_proporcoes(proporcoes)
+        return gerador
+
+    def _codificar(self, df, coluna) -> np.ndarray:
+        vocabulario = self.vocabularios[coluna]
+        codigos = pd.Categorical(df[coluna], categories=vocabulario).codes
+        desconhecidos = pd.unique(df[coluna][(codigos < 0) & df[coluna].notna()])
+        if len(desconhecidos):
+            raise ValueError(
+                f"Valores fora do mapa_valores_colunas na coluna '{coluna}': {list(desconhecidos)}"
+            )
+        return codigos
+
+    def _ajustar(self, df):
+        df = df.dropna(subset=self.colunas)
+        classes = self._codificar(df, self.coluna_alvo)
+        categoricas = np.column_stack([self._codificar(df, c) for c in self.categoricas])
+        numericas = df[self.numericas].to_numpy(dtype=np.float64)
+        posicao_grupo = self.categoricas.index(self.coluna_grupo)
+        n_grupos = len(self.vocabularios[self.coluna_grupo])
+
+        n_classes = len(self.vocabularios[self.coluna_alvo])
+        contagem = np.bincount(classes, minlength=n_classes)
+        self.pesos_classes_ = contagem / contagem.sum()
+        self.combinacoes_ = []
+        self.probabilidades_combinacoes_ = []
+        # Parâmetros numéricos por (classe, grupo): média, fator de Cholesky, mínimo e máximo
+        self.normais_ = {}
+
+        for classe in range(n_classes):
+            da_classe = classes == classe
+            if not da_classe.any():
+                self.combinacoes_.append(np.zeros((0, len(self.categoricas)), dtype=np.int8))
+                self.probabilidades_combinacoes_.append(np.zeros(0))
+                continue
+
+            combinacoes, frequencias = np.unique(
+                categoricas[da_classe], axis=0, return_counts=True
+            )
+            self.combinacoes_.append(combinacoes.astype(np.int8))
+            self.probabilidades_combinacoes_.append(frequencias / frequencias.sum())
+
+            parametros_classe = self._normal(numericas[da_classe])
+            for grupo in range(n_grupos):
+                linhas = numericas[da_classe & (categoricas[:, posicao_grupo] == grupo)]
+                # Grupos pequenos demais para uma covariância usam a da classe inteira
+                self.normais_[(classe, grupo)] = (
+                    self._normal(linhas) if len(linhas) > 2 * len(self.numericas) else parametros_classe
+                )
+        return self
+
+    @staticmethod
+    def _normal(valores):
+        media = valores.mean(axis=0)
+        covariancia = np.cov(valores, rowvar=False)
+        # Pequeno reforço na diagonal para a decomposição existir com colunas quase constantes
+        covariancia += np.eye(len(media)) * 1e-9 * max(np.trace(covariancia), 1.0)
+        return media, np.linalg.cholesky(covariancia), valores.min(axis=0), valores.max(axis=0)
+
+    def definir_proporcoes(self, proporcoes: dict) -> None:
+        vocabulario = self.vocabularios[self.coluna_alvo]
+        traducao = self.traducoes[self.coluna_alvo]
+        original_por_nova = {nova: original for original, nova in traducao.items()}
+        pesos = np.zeros(len(vocabulario))
+        for classe, peso in proporcoes.items():
+            classe = original_por_nova.get(classe, classe)
+            if classe not in vocabulario:
+                raise ValueError(f"Classe desconhecida em proporcoes: '{classe}'")
+            if not len(self.combinacoes_[vocabulario.index(classe)]):
+                raise ValueError(f"Classe sem exemplos no dataset: '{classe}'")
+            pesos[vocabulario.index(classe)] = peso
+        if pesos.sum() <= 0:
+            raise ValueError("As proporções das classes devem somar um valor positivo.")
+        self.pesos_classes_ = pesos / pesos.sum()
+
+    def gerar_bloco(self, n_linhas, semente) -> pd.DataFrame:
+        """Gera n_linhas com um np.random.Generator criado a partir de `semente`."""
+        rng = np.random.default_rng(semente)
+        classes = rng.choice(len(self.pesos_classes_), size=n_linhas, p=self.pesos_classes_)
+        categoricas = np.empty((n_linhas, len(self.categoricas)), dtype=np.int8)
+        numericas = np.empty((n_linhas, len(self.numericas)), dtype=np.float64)
+        posicao_grupo = self.categoricas.index(self.coluna_grupo)
+
+        for classe in np.flatnonzero(self.pesos_classes_):
+            linhas = np.flatnonzero(classes == classe)
+            if not len(linhas):
+                continue
+            combinacoes = self.combinacoes_[classe]
+            sorteio = rng.choice(
+                len(combinacoes), size=len(linhas), p=self.probabilidades_combinacoes_[classe]
+            )
+            categoricas[linhas] = combinacoes[sorteio]
+
+            grupos = categoricas[linhas, posicao_grupo]
+            for grupo in np.unique(grupos):
+                do_grupo = linhas[grupos == grupo]
+                media, cholesky, minimo, maximo = self.normais_[(classe, grupo)]
+                amostra = rng.standard_normal((len(do_grupo), len(media))) @ cholesky.T
+                amostra += media
+                numericas[do_grupo] = np.clip(amostra, minimo, maximo)
+
+        colunas = {
+            self.coluna_alvo: pd.Categorical.from_codes(
+                classes.astype(np.int8), categories=self.vocabularios[self.coluna_alvo]
+            )
+        }
+        for posicao, coluna in enumerate(self.categoricas):
+            colunas[coluna] = pd.Categorical.from_codes(
+                categoricas[:, posicao], categories=self.vocabularios[coluna]
+            )
+        for posicao, coluna in enumerate(self.numericas):
+            colunas[coluna] = numericas[:, posicao]
+        return pd.DataFrame(colunas)[self.colunas]
+
+
+def semente_bloco(semente, indice_bloco) -> np.random.SeedSequence:
+    """Semente independente do bloco, igual com qualquer número de processos."""
+    return np.random.SeedSequence(semente, spawn_key=(indice_bloco,))
+
+
+def tamanhos_blocos(n_linhas, tamanho_bloco):
+    for inicio in range(0, n_linhas, tamanho_bloco):
+        yield min(tamanho_bloco, n_linhas - inicio)
+
+
+def gerar_blocos(gerador, n_linhas, tamanho_bloco=TAMANHO_BLOCO_PADRAO, semente=42):
+    """Gera os blocos em sequência, no processo atual."""
+    for indice, tamanho in enumerate(tamanhos_blocos(n_linhas, tamanho_bloco)):
+        yield gerador.gerar_bloco(tamanho, semente_bloco(semente, indice))
+
+
+def _inicializar_worker(gerador):
+    _estado_worker["gerador"] = gerador
+
+
+def _gerar_bloco_worker(tamanho, semente) -> pd.DataFrame:
+    return _estado_worker["gerador"].gerar_bloco(tamanho, semente)
+
+
+def gerar_arquivo(
+    gerador,
+    caminho_saida,
+    n_linhas,
+    tamanho_bloco=TAMANHO_BLOCO_PADRAO,
+    semente=42,
+    processos=None,
+) -> int:
+    """
+    Gera n_linhas em caminho_saida (csv, parquet ou feather), distribuindo os
+    blocos entre processos e gravando na ordem conforme ficam prontos.
+    Retorna o número de linhas gravadas.
+    """
+    processos = processos or os.cpu_count() or 1
+    # No máximo 2 blocos por processo ficam em memória (em fila ou em execução)
+    max_pendentes = 2 * processos
+    total_linhas = 0
+    inicio = time.perf_counter()
+
+    with ProcessPoolExecutor(
+        max_workers=processos, initializer=_inicializar_worker, initargs=(gerador,)
+    ) as executor, EscritorDataset(caminho_saida, gerador.gerar_bloco(0, semente_bloco(semente, 0))) as saida:
+        pendentes = deque()
+
+        def gravar_proximo():
+            nonlocal total_linhas
+            df_bloco = pendentes.popleft().result()
+            saida.escrever(df_bloco)
+            total_linhas += len(df_bloco)
+
+        for indice, tamanho in enumerate(tamanhos_blocos(n_linhas, tamanho_bloco)):
+            pendentes.append(
+                executor.submit(_gerar_bloco_worker, tamanho, semente_bloco(semente, indice))
+            )
+            if len(pendentes) >= max_pendentes:
+                gravar_proximo()
+
+        while pendentes:
+            gravar_proximo()
+
+    duracao = time.perf_counter() - inicio
+    print(
+        f"✅ {total_linhas} linhas sintéticas geradas em {duracao:.2f}s "
+        f"({processos} processos) -> '{caminho_saida}'"
+    )
+    return total_linhas
+
+
+def _ler_proporcoes(texto) -> dict:
+    """'classe=peso,classe=peso' -> {classe: peso}"""
+    proporcoes = {}
+    for item in texto.split(","):
+        classe, peso = item.split("=")
+        proporcoes[classe.strip()] = float(peso)
+    return proporcoes
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Gera dados sintéticos no formato do Obesity.csv."
+    )
+    parser.add_argument("saida", help="arquivo de saída (csv, parquet ou feather)")
+    parser.add_argument("--linhas", type=int, required=True)
+    parser.add_argument(
+        "--dados",
+        default=DADOS_TREINO,
+        help="dataset bruto usado para ajustar o gerador (padrão: %(default)s)",
+    )
+    parser.add_argument(
+        "--tamanho-bloco",
+        type=int,
+        default=TAMANHO_BLOCO_PADRAO,
+        help="linhas por bloco (padrão: %(default)s)",
+    )
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument(
+        "--processos",
+        type=int,
+        default=None,
+        help="número de processos do pool (padrão: número de CPUs)",
+    )
+    parser.add_argument(
+        "--proporcoes",
+        type=_ler_proporcoes,
+        default=None,
+        help="mistura de classes, ex: obesidade_tipo_1=0.3,peso_normal=0.7 (padrão: a do dataset)",
+    )
+    args = parser.parse_args()
+
+    gerador = GeradorSintetico.ajustar(
+        ler_dataset(args.dados),
+        ler_json(MAPA_COLUNAS),
+        ler_json(MAPA_VALORES_COLUNA),
+        args.proporcoes,
+    )
+    gerar_arquivo(
+        gerador,
+        args.saida,
+        args.linhas,
+        tamanho_bloco=args.tamanho_bloco,
+        semente=args.semente,
+        processos=args.processos,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,398 @@
+"""
+Instrumentação opcional de latência por etapa do pipeline.
+
+instrumentar(pipeline) percorre o Pipeline, cada passo e cada ramo do
+ColumnTransformer (cont, arredondada_ord, ord_limpa, calc_pipe, nom_bin,
+nom_multi) até o modelo, e troca a classe de cada estimador por uma subclasse
+cujos fit/transform/fit_transform/predict/predict_proba medem o tempo com
+time.perf_counter. As medidas vão para histogramas com baldes fixos, com
+contagem de chamadas, soma dos tempos e linhas processadas.
+
+- Funciona igual no treinamento, na pontuação em lote e no app: a subclasse
+  sobrevive ao clone() do sklearn (Pipeline(memory=...) e ColumnTransformer
+  clonam os passos antes do fit), e o pickle grava a classe original, então o
+  modelo salvo de um pipeline instrumentado é idêntico ao de um não instrumentado.
+- Sem instrumentar nada continua igual; instrumentado, o custo é de ~1µs por
+  chamada de método (as chamadas são por bloco de linhas, não por linha).
+- Os tempos são inclusivos: o fit_transform de um passo inclui o fit e o
+  transform internos, e o tempo de um Pipeline inclui o dos seus passos.
+
+A instrumentação é ativada com a variável de ambiente OBESIDADE_INSTRUMENTACAO=1
+(ou ativar()). As métricas são exportadas em texto no formato do Prometheus
+(exportar_prometheus) e em JSON (exportar_json), ou servidas por HTTP em
+/metrics e /metrics.json (iniciar_servidor_metricas).
+
+Exemplo:
+    OBESIDADE_INSTRUMENTACAO=1 python src/pipeline_treino.py --forcar
+    OBESIDADE_INSTRUMENTACAO=1 python src/pontuacao_lote.py dados/Obesity.csv /tmp/saida.csv
+    OBESIDADE_INSTRUMENTACAO=1 OBESIDADE_METRICAS_PORTA=9100 streamlit run src/app.py
+"""
+
+import bisect
+import copyreg
+import json
+import os
+import threading
+import time
+import types
+from contextlib import nullcontext
+from functools import wraps
+from pathlib import Path
+
+# Limites superiores (em segundos) dos baldes dos histogramas; o último balde é +Inf
+BALDES_SEGUNDOS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+METODOS_INSTRUMENTADOS = ("fit", "transform", "fit_transform", "predict", "predict_proba")
+PREFIXO_METRICAS = "obesidade_etapa"
+
+_VERDADEIRO = ("1", "true", "sim")
+_ativo = os.environ.get("OBESIDADE_INSTRUMENTACAO", "").lower() in _VERDADEIRO
+
+
+def ativar(ativo=True) -> None:
+    """Liga (ou desliga) a instrumentação neste processo."""
+    global _ativo
+    _ativo = ativo
+
+
+def instrumentacao_ativa() -> bool:
+    return _ativo
+
+
+class Histograma:
+    """Contagens por balde, soma dos tempos e linhas processadas de uma série."""
+
+    __slots__ = ("contagens", "soma", "linhas")
+
+    def __init__(self):
+        self.contagens = [0] * (len(BALDES_SEGUNDOS) + 1)
+        self.soma = 0.0
+        self.linhas = 0
+
+    @property
+    def chamadas(self) -> int:
+        return sum(self.contagens)
+
+    def quantil(self, q) -> float:
+        """
+        Estimativa do quantil q por interpolação linear dentro do balde, como o
+        histogram_quantile do Prometheus.
+        """
+        total = self.chamadas
+        if total == 0:
+            return 0.0
+        alvo = q * total
+        acumulado = 0
+        for posicao, contagem in enumerate(self.contagens):
+            if acumulado + contagem >= alvo and contagem:
+                if posicao == len(BALDES_SEGUNDOS):
+                    return BALDES_SEGUNDOS[-1]
+                inferior = BALDES_SEGUNDOS[posicao - 1] if posicao else 0.0
+                fracao = (alvo - acumulado) / contagem
+                return inferior + (BALDES_SEGUNDOS[posicao] - inferior) * fracao
+            acumulado += contagem
+        return BALDES_SEGUNDOS[-1]
+
+
+class RegistroMetricas:
+    """Histogramas de latência por (etapa, método), seguros entre threads."""
+
+    def __init__(self):
+        self._series = {}
+        self._trava = threading.Lock()
+
+    def registrar(self, etapa, metodo, segundos, linhas=0) -> None:
+        posicao = bisect.bisect_left(BALDES_SEGUNDOS, segundos)
+        with self._trava:
+            histograma = self._series.get((etapa, metodo))
+            if histograma is None:
+                histograma = self._series[(etapa, metodo)] = Histograma()
+            histograma.contagens[posicao] += 1
+            histograma.soma += segundos
+            histograma.linhas += linhas
+
+    def medir(self, etapa, metodo="total", linhas=0):
+        """Context manager que registra a duração do bloco (nulo se inativo)."""
+        if not _ativo:
+            return nullcontext()
+        return _Medicao(self, etapa, metodo, linhas)
+
+    def capturar(self, zerar=False) -> dict:
+        """
+        Cópia serializável das séries ({(etapa, metodo): (contagens, soma, linhas)}),
+        usada para juntar as métricas de processos diferentes com mesclar().
+        """
+        with self._trava:
+            copia = {
+                chave: (list(h.contagens), h.soma, h.linhas) for chave, h in self._series.items()
+            }
+            if zerar:
+                self._series.clear()
+        return copia
+
+    def mesclar(self, captura) -> None:
+        with self._trava:
+            for chave, (contagens, soma, linhas) in captura.items():
+                histograma = self._series.get(chave)
+                if histograma is None:
+                    histograma = self._series[chave] = Histograma()
+                for posicao, contagem in enumerate(contagens):
+                    histograma.contagens[posicao] += contagem
+                histograma.soma += soma
+                histograma.linhas += linhas
+
+    def zerar(self) -> None:
+        with self._trava:
+            self._series.clear()
+
+    def series(self) -> list:
+        """Lista ordenada de (etapa, metodo, Histograma) com cópias dos histogramas."""
+        with self._trava:
+            itens = []
+            for (etapa, metodo), h in sorted(self._series.items()):
+                copia = Histograma()
+                copia.contagens, copia.soma, copia.linhas = list(h.contagens), h.soma, h.linhas
+                itens.append((etapa, metodo, copia))
+        return itens
+
+
+class _Medicao:
+    __slots__ = ("registro", "etapa", "metodo", "linhas", "inicio")
+
+    def __init__(self, registro, etapa, metodo, linhas):
+        self.registro, self.etapa, self.metodo, self.linhas = registro, etapa, metodo, linhas
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *_):
+        self.registro.registrar(
+            self.etapa, self.metodo, time.perf_counter() - self.inicio, self.linhas
+        )
+
+
+# Registro padrão do processo
+REGISTRO = RegistroMetricas()
+
+
+# -------------------------------------------------------------------
+# Instrumentação dos estimadores
+# -------------------------------------------------------------------
+def _linhas(argumentos) -> int:
+    forma = getattr(argumentos[0], "shape", None) if argumentos else None
+    return int(forma[0]) if forma else 0
+
+
+def _medir_metodo(funcao, metodo):
+    @wraps(funcao)
+    def medido(self, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return funcao(self, *args, **kwargs)
+        finally:
+            etapa, registro = type(self)._instrumentacao[1:]
+            registro.registrar(etapa, metodo, time.perf_counter() - inicio, _linhas(args))
+
+    return medido
+
+
+def _reduzir_como_original(self, protocolo):
+    # O pickle grava a classe original: o modelo salvo não depende deste módulo
+    # (copyreg._reconstructor faz object.__new__(original) e o estado é
+    # restaurado pelo __setstate__ do estimador, como num pickle normal)
+    original = type(self)._instrumentacao[0]
+    reduzido = super(type(self), self).__reduce_ex__(protocolo)
+    return (copyreg._reconstructor, (original, object, None)) + tuple(reduzido[2:])
+
+
+_classes_instrumentadas = {}
+
+
+def _classe_instrumentada(classe, etapa, metodos, registro):
+    chave = (classe, etapa, metodos, id(registro))
+    if chave in _classes_instrumentadas:
+        return _classes_instrumentadas[chave]
+
+    def corpo(namespace):
+        namespace["_instrumentacao"] = (classe, etapa, registro)
+        namespace["__reduce_ex__"] = _reduzir_como_original
+        namespace["__module__"] = classe.__module__
+        namespace["__qualname__"] = classe.__qualname__
+        for metodo in metodos:
+            namespace[metodo] = _medir_metodo(getattr(classe, metodo), metodo)
+
+    try:
+        # Os transformers do sklearn já têm o transform embrulhado pelo
+        # set_output; sem isto a subclasse o embrulharia de novo
+        nova = types.new_class(
+            classe.__name__, (classe,), {"auto_wrap_output_keys": None}, corpo
+        )
+    except TypeError:
+        nova = types.new_class(classe.__name__, (classe,), {}, corpo)
+    _classes_instrumentadas[chave] = nova
+    return nova
+
+
+def _percorrer(estimador, caminho):
+    """Gera (estimador, caminho) para o estimador e todos os seus subestimadores."""
+    if estimador is None or isinstance(estimador, str):
+        return
+    yield estimador, caminho
+    for nome, passo in getattr(estimador, "steps", None) or []:
+        yield from _percorrer(passo, f"{caminho}/{nome}")
+    # transformers: especificação (clonada no fit); transformers_: os ajustados
+    for atributo in ("transformers", "transformers_"):
+        for nome, transformer, _ in getattr(estimador, atributo, None) or []:
+            yield from _percorrer(transformer, f"{caminho}/{nome}")
+
+
+def _instrumentado(estimador) -> bool:
+    return "_instrumentacao" in type(estimador).__dict__
+
+
+def instrumentar(estimador, nome="pipeline", registro=REGISTRO):
+    """
+    Instrumenta o estimador e seus subestimadores (no lugar) e o retorna.
+    Cada série é identificada pelo caminho do passo, por exemplo
+    "pipeline/preprocessor/calc_pipe/encoder", e pelo método.
+    Pode ser chamado de novo após o fit para cobrir passos recém-criados.
+    """
+    for objeto, caminho in _percorrer(estimador, nome):
+        if _instrumentado(objeto):
+            continue
+        classe = type(objeto)
+        # Só os métodos disponíveis nesta instância (ex: Pipeline.transform
+        # não existe quando o último passo é um classificador)
+        metodos = tuple(m for m in METODOS_INSTRUMENTADOS if hasattr(objeto, m))
+        objeto.__class__ = _classe_instrumentada(classe, caminho, metodos, registro)
+    return estimador
+
+
+def desinstrumentar(estimador):
+    """Restaura a classe original do estimador e dos seus subestimadores."""
+    for objeto, _ in _percorrer(estimador, ""):
+        while _instrumentado(objeto):
+            objeto.__class__ = type(objeto)._instrumentacao[0]
+    return estimador
+
+
+def instrumentar_se_ativo(estimador, nome="pipeline", registro=REGISTRO):
+    """instrumentar() quando a instrumentação está ativa; senão, não faz nada."""
+    if _ativo and estimador is not None:
+        instrumentar(estimador, nome, registro)
+    return estimador
+
+
+# -------------------------------------------------------------------
+# Exportação
+# -------------------------------------------------------------------
+def _formatar_limite(limite) -> str:
+    return f"{limite:.6g}"
+
+
+def exportar_prometheus(registro=REGISTRO) -> str:
+    """Texto no formato de exposição do Prometheus (version 0.0.4)."""
+    nome_hist = f"{PREFIXO_METRICAS}_duracao_segundos"
+    nome_linhas = f"{PREFIXO_METRICAS}_linhas_total"
+    linhas = [
+        f"# HELP {nome_hist} Duração das chamadas por etapa do pipeline e método.",
+        f"# TYPE {nome_hist} histogram",
+    ]
+    series = registro.series()
+    for etapa, metodo, h in series:
+        rotulos = f'etapa="{etapa}",metodo="{metodo}"'
+        acumulado = 0
+        for limite, contagem in zip(BALDES_SEGUNDOS, h.contagens):
+            acumulado += contagem
+            linhas.append(f'{nome_hist}_bucket{{{rotulos},le="{_formatar_limite(limite)}"}} {acumulado}')
+        linhas.append(f'{nome_hist}_bucket{{{rotulos},le="+Inf"}} {h.chamadas}')
+        linhas.append(f"{nome_hist}_sum{{{rotulos}}} {h.soma:.9f}")
+        linhas.append(f"{nome_hist}_count{{{rotulos}}} {h.chamadas}")
+    linhas.append(f"# HELP {nome_linhas} Linhas processadas por etapa do pipeline e método.")
+    linhas.append(f"# TYPE {nome_linhas} counter")
+    for etapa, metodo, h in series:
+        linhas.append(f'{nome_linhas}{{etapa="{etapa}",metodo="{metodo}"}} {h.linhas}')
+    return "\n".join(linhas) + "\n"
+
+
+def exportar_json(registro=REGISTRO) -> list:
+    """Resumo por série: chamadas, linhas, tempos (ms) e contagens por balde."""
+    return [
+        {
+            "etapa": etapa,
+            "metodo": metodo,
+            "chamadas": h.chamadas,
+            "linhas": h.linhas,
+            "total_ms": h.soma * 1000,
+            "media_ms": h.soma * 1000 / h.chamadas if h.chamadas else 0.0,
+            "p50_ms": h.quantil(0.50) * 1000,
+            "p95_ms": h.quantil(0.95) * 1000,
+            "p99_ms": h.quantil(0.99) * 1000,
+            "baldes_s": [*BALDES_SEGUNDOS, "+Inf"],
+            "contagens": h.contagens,
+        }
+        for etapa, metodo, h in registro.series()
+    ]
+
+
+def salvar_metricas(caminho_base, registro=REGISTRO) -> tuple:
+    """Grava <caminho_base>.json e <caminho_base>.prom e retorna os dois caminhos."""
+    caminho_base = Path(caminho_base)
+    caminho_base.parent.mkdir(parents=True, exist_ok=True)
+    caminho_json = caminho_base.with_suffix(".json")
+    caminho_prom = caminho_base.with_suffix(".prom")
+    with open(caminho_json, "w", encoding="utf-8") as f:
+        json.dump(exportar_json(registro), f, ensure_ascii=False, indent=2)
+    caminho_prom.write_text(exportar_prometheus(registro), encoding="utf-8")
+    return caminho_json, caminho_prom
+
+
+def resumo_texto(registro=REGISTRO) -> str:
+    """Tabela legível com chamadas, linhas e tempos de cada série."""
+    linhas = [
+        f"{'etapa':<48} {'método':<14} {'chamadas':>9} {'linhas':>10} "
+        f"{'total (ms)':>11} {'média (ms)':>11} {'p95 (ms)':>9}"
+    ]
+    for serie in exportar_json(registro):
+        linhas.append(
+            f"{serie['etapa']:<48} {serie['metodo']:<14} {serie['chamadas']:>9} "
+            f"{serie['linhas']:>10} {serie['total_ms']:>11.2f} {serie['media_ms']:>11.3f} "
+            f"{serie['p95_ms']:>9.3f}"
+        )
+    return "\n".join(linhas)
+
+
+def iniciar_servidor_metricas(porta, endereco="127.0.0.1", registro=REGISTRO):
+    """
+    Serve /metrics (texto do Prometheus) e /metrics.json em uma thread daemon.
+    Retorna o servidor (servidor.server_address traz a porta efetiva).
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                corpo = exportar_prometheus(registro).encode("utf-8")
+                tipo = "text/plain; version=0.0.4; charset=utf-8"
+            elif self.path == "/metrics.json":
+                corpo = json.dumps(exportar_json(registro), ensure_ascii=False).encode("utf-8")
+                tipo = "application/json; charset=utf-8"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", tipo)
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *_):
+            pass
+
+    servidor = ThreadingHTTPServer((endereco, porta), _Handler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
@@ -0,0 +1,344 @@
+"""
+Monitor de drift das variáveis de entrada do modelo.
+
+No fim do treinamento (pipeline_treino.py) é gravada uma referência com a
+distribuição de cada variável de X_treino:
+- contínuas (idade, fcvc, ncp, ch20, faf, tue): limites dos decis do treino e
+  contagem por faixa, mais uma faixa para valores ausentes;
+- categóricas (genero, mtrans, caec, ...): contagem por categoria, mais uma
+  posição para categorias fora do treino e ausentes.
+
+O MonitorDrift mantém, para cada variável, um vetor de contagens do mesmo
+tamanho da referência (memória constante, independente do número de linhas) e
+é atualizado a cada bloco pontuado no app e na pontuação em lote. PSI e KL são
+calculados sob demanda a partir das contagens, sem reler dados históricos.
+
+Exemplo:
+    python src/monitor_drift.py referencia
+    python src/monitor_drift.py relatorio --estado metricas/drift_app.json
+    python src/monitor_drift.py relatorio --estado metricas/drift_pontuacao_lote.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import REFERENCIA_DRIFT_FILE, DADOS_PROCESSADOS
+
+VERSAO_REFERENCIA = 1
+FAIXAS_PADRAO = 10
+OUTRAS = "__outras__"
+AUSENTES = "__ausentes__"
+
+# Faixas usuais de interpretação do PSI
+LIMITE_PSI_MODERADO = 0.1
+LIMITE_PSI_ALTO = 0.25
+
+# Suavização das proporções (evita log(0) em faixas vazias)
+_EPSILON = 1e-4
+
+
+def construir_referencia(X: pd.DataFrame, faixas=FAIXAS_PADRAO) -> dict:
+    """
+    Distribuição de referência de cada coluna de X (o X_treino, na ordem das
+    colunas do modelo). Colunas numéricas viram faixas pelos quantis;
+    as demais, tabelas de frequência.
+    """
+    variaveis = {}
+    for coluna in X.columns:
+        serie = X[coluna]
+        if pd.api.types.is_numeric_dtype(serie) and not isinstance(serie.dtype, pd.CategoricalDtype):
+            valores = serie.to_numpy(dtype=float)
+            validos = valores[~np.isnan(valores)]
+            quantis = np.linspace(0, 1, faixas + 1)[1:-1]
+            limites = np.unique(np.quantile(validos, quantis)) if len(validos) else np.array([])
+            variavel = {"tipo": "numerica", "limites": limites.tolist()}
+        else:
+            categorias = sorted(str(c) for c in serie.dropna().unique())
+            variavel = {"tipo": "categorica", "categorias": categorias}
+        variavel["contagens"] = _contar(variavel, serie).tolist()
+        variaveis[coluna] = variavel
+
+    return {"versao": VERSAO_REFERENCIA, "linhas": int(len(X)), "variaveis": variaveis}
+
+
+def acumular_referencia(referencia: dict, X: pd.DataFrame) -> dict:
+    """
+    Nova referência com as mesmas faixas/categorias e as contagens de X
+    somadas (retreino incremental: o treino passa a incluir o lote novo).
+    """
+    variaveis = {}
+    for coluna, variavel in referencia["variaveis"].items():
+        contagens = np.asarray(variavel["contagens"], dtype=np.int64) + _contar(variavel, X[coluna])
+        variaveis[coluna] = {**variavel, "contagens": contagens.tolist()}
+    return {**referencia, "linhas": int(referencia["linhas"] + len(X)), "variaveis": variaveis}
+
+
+def _posicoes(variavel, serie: pd.Series) -> np.ndarray:
+    """Índice da faixa/categoria de cada valor da série."""
+    if variavel["tipo"] == "numerica":
+        valores = pd.to_numeric(serie, errors="coerce").to_numpy(dtype=float)
+        limites = np.asarray(variavel["limites"], dtype=float)
+        posicoes = np.searchsorted(limites, valores, side="right")
+        # Última posição: ausentes
+        posicoes[np.isnan(valores)] = len(limites) + 1
+        return posicoes
+    codigos = pd.Categorical(serie.astype("string"), categories=variavel["categorias"]).codes
+    # Última posição: categorias fora do treino e ausentes
+    return np.where(codigos < 0, len(variavel["categorias"]), codigos)
+
+
+def _tamanho(variavel) -> int:
+    if variavel["tipo"] == "numerica":
+        return len(variavel["limites"]) + 2
+    return len(variavel["categorias"]) + 1
+
+
+def _contar(variavel, serie) -> np.ndarray:
+    return np.bincount(_posicoes(variavel, serie), minlength=_tamanho(variavel)).astype(np.int64)
+
+
+def rotulos_faixas(variavel) -> list:
+    """Rótulo legível de cada posição do vetor de contagens."""
+    if variavel["tipo"] == "categorica":
+        return [*variavel["categorias"], OUTRAS]
+    limites = variavel["limites"]
+    bordas = [-np.inf, *limites, np.inf]
+    return [f"[{bordas[i]:.4g}, {bordas[i + 1]:.4g})" for i in range(len(bordas) - 1)] + [AUSENTES]
+
+
+def psi_kl(contagens_referencia, contagens_atuais) -> tuple:
+    """
+    Population Stability Index e divergência KL(atual || referência) entre
+    dois vetores de contagens.
+    """
+    referencia = np.asarray(contagens_referencia, dtype=float)
+    atual = np.asarray(contagens_atuais, dtype=float)
+    p_ref = np.maximum(referencia / max(referencia.sum(), 1), _EPSILON)
+    p_atual = np.maximum(atual / max(atual.sum(), 1), _EPSILON)
+    p_ref /= p_ref.sum()
+    p_atual /= p_atual.sum()
+    razao = np.log(p_atual / p_ref)
+    return float(np.sum((p_atual - p_ref) * razao)), float(np.sum(p_atual * razao))
+
+
+def salvar_referencia(referencia, caminho=REFERENCIA_DRIFT_FILE) -> None:
+    Path(caminho).parent.mkdir(parents=True, exist_ok=True)
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(referencia, f, ensure_ascii=False, indent=2)
+
+
+def carregar_referencia(caminho=REFERENCIA_DRIFT_FILE) -> dict:
+    with open(caminho, "r", encoding="utf-8") as f:
+        referencia = json.load(f)
+    if referencia.get("versao") != VERSAO_REFERENCIA:
+        raise ValueError(
+            f"Referência de drift '{caminho}' na versão {referencia.get('versao')}, "
+            f"esperado {VERSAO_REFERENCIA}. Execute novamente o treinamento."
+        )
+    return referencia
+
+
+def identificador_referencia(referencia) -> str:
+    """Hash das faixas e contagens da referência (estados de outra referência são descartados)."""
+    conteudo = json.dumps(referencia["variaveis"], sort_keys=True).encode("utf-8")
+    return hashlib.sha256(conteudo).hexdigest()[:16]
+
+
+class MonitorDrift:
+    """
+    Contadores online por variável, comparáveis com a referência do treino.
+
+    caminho_estado: se informado, o estado anterior é retomado desse arquivo
+    e gravado nele a cada `salvar_a_cada` linhas ou, havendo linhas novas, a
+    cada `intervalo_salvamento` segundos (o app reinicia sem perder a
+    contagem, e o relatório pode ser gerado por outro processo).
+    """
+
+    def __init__(self, referencia: dict, caminho_estado=None, salvar_a_cada=None, intervalo_salvamento=None):
+        self.referencia = referencia
+        self.variaveis = referencia["variaveis"]
+        self.identificador = identificador_referencia(referencia)
+        self.caminho_estado = Path(caminho_estado) if caminho_estado else None
+        self.salvar_a_cada = salvar_a_cada
+        self.intervalo_salvamento = intervalo_salvamento
+        self._contagens = {
+            nome: np.zeros(_tamanho(variavel), dtype=np.int64)
+            for nome, variavel in self.variaveis.items()
+        }
+        self.linhas = 0
+        self._desde_salvo = 0
+        self._salvo_em = time.monotonic()
+        self._trava = threading.Lock()
+        # Serializa as gravações do estado (várias sessões do app salvam ao mesmo tempo)
+        self._trava_gravacao = threading.Lock()
+        if self.caminho_estado is not None and self.caminho_estado.exists():
+            self.carregar_estado(self.caminho_estado)
+
+    @classmethod
+    def carregar(cls, caminho_referencia=REFERENCIA_DRIFT_FILE, **kwargs) -> "MonitorDrift":
+        return cls(carregar_referencia(caminho_referencia), **kwargs)
+
+    def atualizar(self, df: pd.DataFrame) -> None:
+        """Soma as linhas de df (colunas de entrada do modelo) aos contadores."""
+        parciais = {
+            nome: _contar(variavel, df[nome])
+            for nome, variavel in self.variaveis.items()
+            if nome in df.columns
+        }
+        with self._trava:
+            for nome, contagem in parciais.items():
+                self._contagens[nome] += contagem
+            self.linhas += len(df)
+            self._desde_salvo += len(df)
+            salvar = self.caminho_estado is not None and (
+                (self.salvar_a_cada and self._desde_salvo >= self.salvar_a_cada)
+                or (
+                    self.intervalo_salvamento is not None
+                    and time.monotonic() - self._salvo_em >= self.intervalo_salvamento
+                )
+            )
+        if salvar:
+            try:
+                self.salvar_estado()
+            except OSError as e:
+                # A contagem continua em memória e é gravada na próxima vez
+                print(f"⚠️ Estado de drift não salvo: {e}")
+
+    def capturar(self, zerar=False) -> dict:
+        """Cópia serializável dos contadores, para juntar processos com mesclar()."""
+        with self._trava:
+            captura = {
+                "linhas": self.linhas,
+                "contagens": {nome: c.tolist() for nome, c in self._contagens.items()},
+            }
+            if zerar:
+                for contagem in self._contagens.values():
+                    contagem[:] = 0
+                self.linhas = 0
+        return captura
+
+    def mesclar(self, captura) -> None:
+        with self._trava:
+            for nome, contagem in captura["contagens"].items():
+                if nome in self._contagens and len(contagem) == len(self._contagens[nome]):
+                    self._contagens[nome] += np.asarray(contagem, dtype=np.int64)
+            self.linhas += captura["linhas"]
+
+    def salvar_estado(self, caminho=None) -> None:
+        """
+        Grava os contadores em um temporário único e faz rename sobre o
+        arquivo; uma gravação por vez, então o arquivo final é sempre a
+        captura mais recente e completa.
+        """
+        caminho = Path(caminho or self.caminho_estado)
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        with self._trava_gravacao:
+            captura = self.capturar()
+            with self._trava:
+                self._desde_salvo = 0
+                self._salvo_em = time.monotonic()
+            descritor, temporario = tempfile.mkstemp(dir=caminho.parent, prefix=f".{caminho.name}.", suffix=".tmp")
+            try:
+                with os.fdopen(descritor, "w", encoding="utf-8") as f:
+                    json.dump({"referencia": self.identificador, **captura}, f)
+                os.replace(temporario, caminho)
+            except BaseException:
+                Path(temporario).unlink(missing_ok=True)
+                raise
+
+    def salvar_pendente(self) -> None:
+        """Grava o estado só se houver linhas contadas depois da última gravação."""
+        with self._trava:
+            pendente = self._desde_salvo > 0
+        if pendente:
+            self.salvar_estado()
+
+    def carregar_estado(self, caminho) -> None:
+        with open(caminho, "r", encoding="utf-8") as f:
+            estado = json.load(f)
+        if estado.get("referencia") != self.identificador:
+            print(f"⚠️ Estado de drift '{caminho}' é de outra referência (modelo retreinado); recomeçando a contagem.")
+            return
+        self.mesclar(estado)
+
+    def pontuacoes(self) -> pd.DataFrame:
+        """PSI e KL de cada variável contra a referência, do maior PSI para o menor."""
+        captura = self.capturar()
+        linhas = []
+        for nome, variavel in self.variaveis.items():
+            psi, kl = psi_kl(variavel["contagens"], captura["contagens"][nome])
+            contagem = np.asarray(captura["contagens"][nome])
+            maior = int(np.argmax(contagem)) if contagem.sum() else None
+            linhas.append(
+                {
+                    "variavel": nome,
+                    "psi": psi,
+                    "kl": kl,
+                    "linhas": captura["linhas"],
+                    "faixa_mais_frequente": rotulos_faixas(variavel)[maior] if maior is not None else None,
+                }
+            )
+        return pd.DataFrame(linhas).sort_values("psi", ascending=False, ignore_index=True)
+
+
+def status_psi(psi) -> str:
+    if psi >= LIMITE_PSI_ALTO:
+        return "❌ drift alto"
+    if psi >= LIMITE_PSI_MODERADO:
+        return "⚠️ drift moderado"
+    return "✅ estável"
+
+
+def formatar_relatorio_drift(pontuacoes: pd.DataFrame) -> str:
+    linhas_avaliadas = int(pontuacoes["linhas"].iloc[0]) if len(pontuacoes) else 0
+    linhas = [
+        f"Drift das variáveis de entrada ({linhas_avaliadas} linhas avaliadas)",
+        f"{'variável':<20} {'PSI':>8} {'KL':>8}  status",
+    ]
+    for _, linha in pontuacoes.iterrows():
+        linhas.append(
+            f"{linha['variavel']:<20} {linha['psi']:>8.4f} {linha['kl']:>8.4f}  {status_psi(linha['psi'])}"
+        )
+    return "\n".join(linhas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monitor de drift das variáveis de entrada.")
+    parser.add_argument("acao", choices=["referencia", "relatorio"])
+    parser.add_argument(
+        "--dados",
+        type=Path,
+        default=DADOS_PROCESSADOS,
+        help="referencia: dataset processado usado no treino (padrão: %(default)s)",
+    )
+    parser.add_argument("--referencia", type=Path, default=REFERENCIA_DRIFT_FILE)
+    parser.add_argument("--estado", type=Path, help="relatorio: estado gravado pelo app ou pela pontuação em lote")
+    parser.add_argument("--faixas", type=int, default=FAIXAS_PADRAO)
+    args = parser.parse_args()
+
+    if args.acao == "referencia":
+        from pipeline_treino import separar_treino_teste
+        from utils import ler_dataset
+
+        X_treino, _, _, _, _ = separar_treino_teste(ler_dataset(args.dados))
+        salvar_referencia(construir_referencia(X_treino, args.faixas), args.referencia)
+        print(f"✅ Referência de drift ({len(X_treino)} linhas) salva em: {args.referencia}")
+        return
+
+    if args.estado is None or not args.estado.exists():
+        parser.error("relatorio requer --estado com um arquivo existente")
+    monitor = MonitorDrift.carregar(args.referencia, caminho_estado=args.estado)
+    print(formatar_relatorio_drift(monitor.pontuacoes()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+# Colunas (já renomeadas) transformadas por cada mapeamento do
+# mapa_valores_colunas.json e a chave com o dicionário valor original -> novo
+COLUNAS_POR_MAPEAMENTO = {
+    "mapeamento_classificacao_peso_corporal": (
+        ["classificacao_peso_corporal"],
+        "valores_novos_classificacao_peso_corporal",
+    ),
+    "mapeamento_mtrans": (["mtrans"], "valores_novos_mtrans"),
+    "mapeamento_frequencia": (["caec", "calc"], "valores_novos_frequencia"),
+    "mapeamento_genero": (["genero"], "transformacao_genero"),
+    "mapeamento_sim_nao": (
+        ["historico_familiar", "favc", "fumante", "scc"],
+        "transformacao_sim_nao",
+    ),
+}
+
+
+@dataclass
+class TabelaValores:
+    """Tabela compilada de uma coluna: valor original -> código da categoria nova."""
+
+    mapeamento: str
+    indice: pd.Index
+    codigos: np.ndarray
+    dtype: pd.CategoricalDtype
+
+    @classmethod
+    def compilar(cls, mapeamento, mapa_valores: dict):
+        novos = list(dict.fromkeys(mapa_valores.values()))
+        # O último código (-1) é a sentinela dos valores não mapeados
+        codigos = [novos.index(novo) for novo in mapa_valores.values()] + [-1]
+        return cls(
+            mapeamento=mapeamento,
+            indice=pd.Index(list(mapa_valores), dtype=object),
+            codigos=np.array(codigos, dtype=np.int8),
+            dtype=pd.CategoricalDtype(novos),
+        )
+
+
+@dataclass
+class ResultadoPreprocessamento:
+    """
+    Resultado do MotorPreprocessamento.processar.
+
+    valores_nao_mapeados: coluna -> valores sem mapeamento (viram NaN no df)
+    colunas_ausentes: colunas do mapa_colunas que não existem na entrada
+    colunas_ignoradas: colunas com mapeamento que não são texto/categoria
+    """
+
+    df: pd.DataFrame
+    valores_nao_mapeados: dict = field(default_factory=dict)
+    colunas_ausentes: list = field(default_factory=list)
+    colunas_ignoradas: list = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not (self.valores_nao_mapeados or self.colunas_ausentes or self.colunas_ignoradas)
+
+
+class MotorPreprocessamento:
+    """
+    Compila o mapa_colunas.json e o mapa_valores_colunas.json uma única vez em
+    tabelas por coluna e aplica renomeação e transformação de valores em uma
+    só passada, sem cópias intermediárias do DataFrame.
+
+    As colunas com mapeamento de valores saem como pandas Categorical (códigos
+    int8); as demais colunas são repassadas sem cópia.
+    """
+
+    def __init__(self, mapa_colunas: dict, mapa_valores_colunas: dict = None):
+        self.mapa_colunas = dict(mapa_colunas or {})
+        self.tabelas = {}
+
+        for mapeamento, (colunas, chave) in COLUNAS_POR_MAPEAMENTO.items():
+            if not mapa_valores_colunas or mapeamento not in mapa_valores_colunas:
+                continue
+            tabela = TabelaValores.compilar(mapeamento, mapa_valores_colunas[mapeamento][chave])
+            for coluna in colunas:
+                self.tabelas[coluna] = tabela
+
+    def _mapear(self, serie: pd.Series, tabela: TabelaValores):
+        """Retorna (Categorical, valores não mapeados) para uma coluna."""
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            # Mapeia só as categorias e reaproveita os códigos da coluna
+            posicao_categorias = tabela.indice.get_indexer(serie.cat.categories)
+            codigos_categorias = np.append(tabela.codigos[posicao_categorias], -1)
+            codigos_serie = serie.cat.codes.to_numpy()
+            codigos = codigos_categorias[codigos_serie]
+            usadas = np.bincount(
+                codigos_serie[codigos_serie >= 0], minlength=len(posicao_categorias)
+            ) > 0
+            nao_mapeados = serie.cat.categories[(posicao_categorias < 0) & usadas].tolist()
+        else:
+            valores = serie.to_numpy()
+            posicao = tabela.indice.get_indexer(valores)
+            codigos = tabela.codigos[posicao]
+            sem_mapa = posicao < 0
+            nao_mapeados = []
+            if sem_mapa.any():
+                sem_mapa &= pd.notna(valores)
+                nao_mapeados = pd.unique(valores[sem_mapa]).tolist()
+
+        return pd.Categorical.from_codes(codigos, dtype=tabela.dtype), list(nao_mapeados)
+
+    def processar(self, df: pd.DataFrame) -> ResultadoPreprocessamento:
+        resultado = ResultadoPreprocessamento(df=None)
+        colunas = {}
+
+        for coluna in df.columns:
+            destino = self.mapa_colunas.get(coluna, coluna)
+            serie = df[coluna]
+            tabela = self.tabelas.get(destino)
+
+            if tabela is None:
+                colunas[destino] = serie
+            elif not (
+                pd.api.types.is_object_dtype(serie.dtype)
+                or pd.api.types.is_string_dtype(serie.dtype)
+                or isinstance(serie.dtype, pd.CategoricalDtype)
+            ):
+                resultado.colunas_ignoradas.append(destino)
+                colunas[destino] = serie
+            else:
+                colunas[destino], nao_mapeados = self._mapear(serie, tabela)
+                if nao_mapeados:
+                    resultado.valores_nao_mapeados[destino] = nao_mapeados
+
+        resultado.colunas_ausentes = [
+            destino for origem, destino in self.mapa_colunas.items()
+            if origem not in df.columns and destino not in df.columns
+        ]
+        resultado.df = pd.DataFrame(colunas, index=df.index, copy=False)
+        return resultado
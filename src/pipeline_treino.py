@@ -1,4 +1,39 @@
-import pandas as pd
+"""
+Treinamento do pipeline de classificação de obesidade.
+
+Pode ser executado como script (CLI) ou importado: cada etapa é uma função.
+Os resultados intermediários ficam em um armazenamento endereçado por conteúdo
+(ARTEFATOS_DIR):
+- o dataset processado é identificado pelo hash dos dados brutos, dos mapas
+  JSON e do código de pré-processamento;
+- o modelo treinado é identificado pelo hash do dataset processado, dos
+  hiperparâmetros e do código do pipeline.
+Se nada mudou desde a última execução, o pré-processamento e o treinamento são
+pulados e os artefatos existentes são reaproveitados. O ajuste do
+ColumnTransformer também é reaproveitado entre execuções pelo cache do
+Pipeline(memory=CACHE_PIPELINE_DIR).
+
+O estimador é escolhido por nome (ESTIMADORES): "floresta" (Random Forest,
+padrão) ou "hgb" (HistGradientBoosting com suporte nativo às colunas
+categóricas), pelo --estimador ou pela variável OBESIDADE_ESTIMADOR.
+A comparação entre os dois fica em comparacao_estimadores.py.
+
+Exemplos:
+    python src/pipeline_treino.py
+    python src/pipeline_treino.py --estimador hgb
+    python src/pipeline_treino.py --dados dados/Obesity.parquet --forcar
+    python src/pipeline_treino.py --hiperparametros melhores_parametros.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
 import joblib
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import (
@@ -9,202 +44,585 @@ from sklearn.preprocessing import (
 )
 from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
 from sklearn.metrics import accuracy_score
 from sklearn.metrics import classification_report
 
 
 from config import (
-    OBESITY_CSV,
+    DADOS_TREINO,
+    DADOS_PROCESSADOS,
     MODEL_FILE,
-    DATA_DIR,
     MAPA_COLUNAS,
     MAPA_VALORES_COLUNA,
     LABEL_ENCODER_FILE,
+    REFERENCIA_DRIFT_FILE,
+    ARTEFATOS_DIR,
+    CACHE_PIPELINE_DIR,
+    METRICAS_DIR,
+    SRC_DIR,
+    garantir_diretorios,
+)
+from utils import (
+    ler_json,
+    validar_processamento,
+    ler_dataset,
+    salvar_dataset,
+)
+from artefatos import hash_arquivo
+from monitor_drift import construir_referencia, salvar_referencia
+from instrumentacao import (
+    REGISTRO,
+    instrumentar_se_ativo,
+    instrumentacao_ativa,
+    resumo_texto,
+    salvar_metricas,
 )
-from utils import ler_json, validar_processamento, criar_csv_de_dataframe
 from transformers import RoundingTransformer, MtransGrouper, CalcGrouper
 from preprocessamento import preparar_dados_obesidade
 from config import RELATORIO_MODELO
 
 
-# ETAPA 1 - importação de dados
-
-df = pd.read_csv(OBESITY_CSV)
-mapa_colunas = ler_json(MAPA_COLUNAS)
-mapa_valores_colunas = ler_json(MAPA_VALORES_COLUNA)
-
-print("DataFrame e mapas JSON carregados com sucesso.")
-
-# ETAPA 2: PRÉ-PROCESSAMENTO
-df_processado = preparar_dados_obesidade(df, mapa_colunas, mapa_valores_colunas)
-
-# ETAPA 3: VALIDAÇÃO (Chamada simples)
-validar_processamento(df, df_processado, mapa_colunas, mapa_valores_colunas)
-
-# ETAPA 4: Criação arquivo df_processado.csv
-
-caminho_csv_proc = DATA_DIR / "obesidade_processado_pipeline.csv"
-criar_csv_de_dataframe(df_processado, caminho_csv_proc)
-
-print("Pré-processamentos iniciais aplicados e df_processado criado.")
-
-# ETAPA 5: PREPARAÇÃO PARA O MODELO
-
-print("Iniciando prepação do modelo")
-
 coluna_alvo = "classificacao_peso_corporal"
 
 # Remover variaveis com vazamento ou risco extremo e colunas que não serão usadas no pipeline
 variaveis_a_remover_de_X_antes_do_pipeline = ["peso", "altura", "fumante", "scc"]
 
-X = df_processado.drop(
-    columns=[coluna_alvo] + variaveis_a_remover_de_X_antes_do_pipeline
-)
-y = df_processado[coluna_alvo]
-
-# Codificar o Alvo (y) de texto para números
-le = LabelEncoder()
-y_codificada = le.fit_transform(y)
-
-# Separar dados em treino e teste
-X_treino, X_teste, y_treino, y_teste = train_test_split(
-    X, y_codificada, test_size=0.2, random_state=42, stratify=y_codificada
-)
-
-print("Dados preparados: X, y definidos, y codificado e dividido em treino/teste.")
-
 variaveis_continuas = ["idade"]
 variaveis_bin_nominal = ["genero", "historico_familiar", "favc"]
 variaveis_multi_nominal = ["mtrans"]
 variaveis_clean_ordenadas = ["caec"]
 variaveis_para_arredondar_e_codificar = ["fcvc", "ncp", "ch20", "faf", "tue"]
 
-pipeline_continua = Pipeline(steps=[("scaler", StandardScaler())])
-
-# Pipeline que primeiro arredonda e depois codifica ordinalmente
-pipeline_arrredonamento_ordenacao = Pipeline(
-    steps=[
-        ("rounder", RoundingTransformer()),
-        (
-            "encoder",
-            OrdinalEncoder(handle_unknown="use_encoded_value", unknown_value=-1),
-        ),
-    ]
-)
+HIPERPARAMETROS_RF = {
+    "random_state": 42,
+    "n_jobs": -1,
+    "max_depth": 20,
+    "min_samples_leaf": 1,
+    "min_samples_split": 2,
+    "n_estimators": 100,
+}
+
+HIPERPARAMETROS_HGB = {
+    "random_state": 42,
+    "learning_rate": 0.2,
+    "max_iter": 100,
+    "max_leaf_nodes": 31,
+    "l2_regularization": 0.0,
+    "early_stopping": False,
+}
+
+# Estimadores disponíveis: classe, hiperparâmetros padrão e descrição usada nos
+# relatórios. "categorias_nativas" troca o one-hot do preprocessor por códigos
+# ordinais e marca as colunas nominais como categóricas no estimador.
+ESTIMADORES = {
+    "floresta": {
+        "classe": RandomForestClassifier,
+        "hiperparametros": HIPERPARAMETROS_RF,
+        "descricao": "Random Forest",
+        "categorias_nativas": False,
+    },
+    "hgb": {
+        "classe": HistGradientBoostingClassifier,
+        "hiperparametros": HIPERPARAMETROS_HGB,
+        "descricao": "HistGradientBoosting",
+        "categorias_nativas": True,
+    },
+}
+ESTIMADOR_PADRAO = "floresta"
+
+# Colunas codificadas sem ordem significativa (o OrdinalEncoder ordena as
+# categorias alfabeticamente), tratadas como categóricas pelo HistGradientBoosting
+variaveis_categoricas_nativas = ["caec", "calc"] + variaveis_bin_nominal + variaveis_multi_nominal
+
+# Separação treino/teste (faz parte da identidade do modelo treinado)
+PARAMETROS_DIVISAO = {"test_size": 0.2, "random_state": 42}
+
+# Código que define cada etapa; alterações invalidam os artefatos em cache
+CODIGO_PREPROCESSAMENTO = ["preprocessamento.py", "motor_preprocessamento.py", "utils.py"]
+CODIGO_PIPELINE = ["pipeline_treino.py", "transformers.py"]
+
+
+def hash_conteudo(*partes) -> str:
+    """sha256 (hex, 16 primeiros caracteres) de uma sequência de textos."""
+    sha = hashlib.sha256()
+    for parte in partes:
+        sha.update(str(parte).encode("utf-8"))
+        sha.update(b"\0")
+    return sha.hexdigest()[:16]
+
+
+def _hash_codigo(arquivos) -> list:
+    return [hash_arquivo(SRC_DIR / arquivo) for arquivo in arquivos]
 
-pipeline_ordenada_limpa = Pipeline(
-    steps=[
-        (
-            "encoder",
-            OrdinalEncoder(handle_unknown="use_encoded_value", unknown_value=-1),
-        )
-    ]
-)
-
-pipeline_calc = Pipeline(
-    steps=[
-        ("grouper", CalcGrouper()),
-        (
-            "encoder",
-            OrdinalEncoder(handle_unknown="use_encoded_value", unknown_value=-1),
-        ),
-    ]
-)
 
-pipeline_nominal_bin = Pipeline(
-    steps=[
-        (
-            "encoder",
-            OrdinalEncoder(handle_unknown="use_encoded_value", unknown_value=-1),
-        )
-    ]
-)
-
-pipeline_nominal_multi = Pipeline(
-    steps=[
-        ("grouper", MtransGrouper()),
-        ("encoder", OneHotEncoder(handle_unknown="ignore", drop="first")),
-    ]
-)
-
-preprocessador = ColumnTransformer(
-    transformers=[
-        ("cont", pipeline_continua, variaveis_continuas),
-        (
-            "arredondada_ord",
-            pipeline_arrredonamento_ordenacao,
-            variaveis_para_arredondar_e_codificar,
-        ),
-        ("ord_limpa", pipeline_ordenada_limpa, variaveis_clean_ordenadas),
-        ("calc_pipe", pipeline_calc, ["calc"]),
-        ("nom_bin", pipeline_nominal_bin, variaveis_bin_nominal),
-        ("nom_multi", pipeline_nominal_multi, variaveis_multi_nominal),
-    ],
-    remainder="drop",
-)
-
-modelo_rf = RandomForestClassifier(
-    random_state=42,
-    n_jobs=-1,
-    max_depth=20,
-    min_samples_leaf=1,
-    min_samples_split=2,
-    n_estimators=100,
-)
-
-pipeline_completa_rf = Pipeline(
-    steps=[("preprocessor", preprocessador), ("model", modelo_rf)]
-)
-
-print(
-    "Pipelines de pré-processamento e o modelo Random Forest definidos e combinados no pipeline completo."
-)
-
-# ETAPA 6 - treinameto
-print("Iniciando o treinamento do pipeline Random Forest")
-
-pipeline_completa_rf.fit(X_treino, y_treino)
-
-y_prev_rf = pipeline_completa_rf.predict(X_teste)
-rf_acuracia = accuracy_score(y_teste, y_prev_rf)
-print(f"Acurácia do Pipeline Random Forest: {rf_acuracia * 100:.2f}%")
-
-nomes_classes = le.classes_
-
-# ETAPA 8 - Relatório
-
-report_str = classification_report(y_teste, y_prev_rf, target_names=nomes_classes)
-
-
-print("\nRelatório de Classificação:")
-print(report_str)
-
-
-print(f"📄 Salvando relatório em: {RELATORIO_MODELO}")
-
-try:
-    with open(RELATORIO_MODELO, "w", encoding="utf-8") as f:
-        f.write("=== RELATÓRIO DE PERFORMANCE DO MODELO ===\n")
-        f.write(f"Acurácia Geral: {rf_acuracia * 100:.2f}%\n")
-        f.write("-" * 43 + "\n")
-        f.write(report_str)
-    print("✅ Relatório salvo com sucesso!")
-except Exception as e:
-    print(f"❌ Erro ao salvar o relatório: {e}")
-
-# Etapa 8 - salvando os artefatos
-print("\n💾 Salvando artefatos na pasta models...")
-
-try:
-    # Salva o Pipeline completo (Preprocessamento + Modelo)
-    joblib.dump(pipeline_completa_rf, MODEL_FILE)
-
-    # Salva o LabelEncoder para decodificar as previsões no Streamlit
-    joblib.dump(le, LABEL_ENCODER_FILE)
+# ETAPA 1 - importação de dados
+def carregar_dados(caminho_dados=DADOS_TREINO):
+    """
+    Lê os mapas JSON e todas as colunas mapeadas: o dataset processado
+    (DADOS_PROCESSADOS) segue o contrato completo, e as colunas fora do modelo
+    só são removidas ao montar o X em separar_treino_teste.
 
-    print(f"✅ Artefatos salvos com sucesso em: {MODEL_FILE.parent}")
-    print(f"📦 Classes mapeadas no LabelEncoder: {list(le.classes_)}")
+    Retorna (df, mapa_colunas, mapa_valores_colunas).
+    """
+    mapa_colunas = ler_json(MAPA_COLUNAS)
+    mapa_valores_colunas = ler_json(MAPA_VALORES_COLUNA)
 
-except Exception as e:
-    print(f"❌ Erro ao salvar os artefatos: {e}")
+    df = ler_dataset(caminho_dados, colunas=list(mapa_colunas))
+
+    print("DataFrame e mapas JSON carregados com sucesso.")
+    return df, mapa_colunas, mapa_valores_colunas
+
+
+def hash_dados(caminho_dados=DADOS_TREINO) -> str:
+    """Identidade do dataset processado: dados brutos, mapas JSON e código."""
+    return hash_conteudo(
+        hash_arquivo(caminho_dados),
+        hash_arquivo(MAPA_COLUNAS),
+        hash_arquivo(MAPA_VALORES_COLUNA),
+        *_hash_codigo(CODIGO_PREPROCESSAMENTO),
+    )
+
+
+def estimador_configurado() -> str:
+    """Estimador da variável OBESIDADE_ESTIMADOR (padrão: ESTIMADOR_PADRAO)."""
+    estimador = os.environ.get("OBESIDADE_ESTIMADOR", ESTIMADOR_PADRAO)
+    if estimador not in ESTIMADORES:
+        raise ValueError(f"OBESIDADE_ESTIMADOR={estimador!r} inválido; opções: {list(ESTIMADORES)}")
+    return estimador
+
+
+def hash_modelo(identificador_dados, hiperparametros, estimador=ESTIMADOR_PADRAO) -> str:
+    """Identidade do modelo treinado: dataset processado, estimador, hiperparâmetros e código."""
+    return hash_conteudo(
+        identificador_dados,
+        estimador,
+        json.dumps(hiperparametros, sort_keys=True),
+        json.dumps(PARAMETROS_DIVISAO, sort_keys=True),
+        *_hash_codigo(CODIGO_PIPELINE),
+    )
+
+
+# ETAPAS 2 a 4 - pré-processamento, validação e dataset processado
+def preprocessar(caminho_dados=DADOS_TREINO, usar_cache=True):
+    """
+    Retorna o dataset processado, reaproveitando o parquet em ARTEFATOS_DIR
+    quando dados, mapas e código não mudaram.
+    """
+    identificador = hash_dados(caminho_dados)
+    caminho_cache = ARTEFATOS_DIR / f"processado_{identificador}.parquet"
+
+    if usar_cache and caminho_cache.exists():
+        print(f"♻️ Dataset processado reaproveitado do cache: {caminho_cache.name}")
+        return ler_dataset(caminho_cache), identificador
+
+    df, mapa_colunas, mapa_valores_colunas = carregar_dados(caminho_dados)
+
+    # ETAPA 2: PRÉ-PROCESSAMENTO
+    df_processado = preparar_dados_obesidade(df, mapa_colunas, mapa_valores_colunas)
+
+    # ETAPA 3: VALIDAÇÃO (Chamada simples)
+    validar_processamento(df, df_processado, mapa_colunas, mapa_valores_colunas)
+
+    # ETAPA 4: Criação arquivo df_processado (csv, parquet ou feather)
+    salvar_dataset(df_processado, DADOS_PROCESSADOS)
+
+    ARTEFATOS_DIR.mkdir(parents=True, exist_ok=True)
+    salvar_dataset(df_processado, caminho_cache)
+
+    print("Pré-processamentos iniciais aplicados e df_processado criado.")
+    return df_processado, identificador
+
+
+# ETAPA 5 - preparação para o modelo
+def separar_treino_teste(df_processado):
+    """
+    Separa X e y, codifica o alvo e divide em treino e teste.
+    Retorna (X_treino, X_teste, y_treino, y_teste, le).
+    """
+    print("Iniciando prepação do modelo")
+
+    X = df_processado.drop(
+        columns=[coluna_alvo] + variaveis_a_remover_de_X_antes_do_pipeline,
+        errors="ignore",
+    )
+    y = df_processado[coluna_alvo]
+
+    # Codificar o Alvo (y) de texto para números
+    le = LabelEncoder()
+    y_codificada = le.fit_transform(y)
+
+    # Separar dados em treino e teste
+    X_treino, X_teste, y_treino, y_teste = train_test_split(
+        X, y_codificada, stratify=y_codificada, **PARAMETROS_DIVISAO
+    )
+
+    print("Dados preparados: X, y definidos, y codificado e dividido em treino/teste.")
+    return X_treino, X_teste, y_treino, y_teste, le
+
+
+def criar_preprocessador(categorias_nativas=False) -> ColumnTransformer:
+    """
+    categorias_nativas: mtrans sai como um código ordinal (uma coluna) em vez
+    do one-hot, para estimadores que tratam categorias diretamente.
+    """
+    pipeline_continua = Pipeline(steps=[("scaler", StandardScaler())])
+
+    # Pipeline que primeiro arredonda e depois codifica ordinalmente
+    pipeline_arrredonamento_ordenacao = Pipeline(
+        steps=[
+            ("rounder", RoundingTransformer()),
+            (
+                "encoder",
+                OrdinalEncoder(handle_unknown="use_encoded_value", unknown_value=-1),
+            ),
+        ]
+    )
+
+    pipeline_ordenada_limpa = Pipeline(
+        steps=[
+            (
+                "encoder",
+                OrdinalEncoder(handle_unknown="use_encoded_value", unknown_value=-1),
+            )
+        ]
+    )
+
+    pipeline_calc = Pipeline(
+        steps=[
+            ("grouper", CalcGrouper()),
+            (
+                "encoder",
+                OrdinalEncoder(handle_unknown="use_encoded_value", unknown_value=-1),
+            ),
+        ]
+    )
+
+    pipeline_nominal_bin = Pipeline(
+        steps=[
+            (
+                "encoder",
+                OrdinalEncoder(handle_unknown="use_encoded_value", unknown_value=-1),
+            )
+        ]
+    )
+
+    if categorias_nativas:
+        codificador_multi = OrdinalEncoder(handle_unknown="use_encoded_value", unknown_value=-1)
+    else:
+        codificador_multi = OneHotEncoder(handle_unknown="ignore", drop="first")
+    pipeline_nominal_multi = Pipeline(
+        steps=[
+            ("grouper", MtransGrouper()),
+            ("encoder", codificador_multi),
+        ]
+    )
+
+    return ColumnTransformer(
+        transformers=[
+            ("cont", pipeline_continua, variaveis_continuas),
+            (
+                "arredondada_ord",
+                pipeline_arrredonamento_ordenacao,
+                variaveis_para_arredondar_e_codificar,
+            ),
+            ("ord_limpa", pipeline_ordenada_limpa, variaveis_clean_ordenadas),
+            ("calc_pipe", pipeline_calc, ["calc"]),
+            ("nom_bin", pipeline_nominal_bin, variaveis_bin_nominal),
+            ("nom_multi", pipeline_nominal_multi, variaveis_multi_nominal),
+        ],
+        remainder="drop",
+    )
+
+
+def indices_categoricos(preprocessor: ColumnTransformer) -> list:
+    """
+    Posições das variaveis_categoricas_nativas na saída do preprocessor
+    montado com categorias_nativas=True (uma coluna de saída por entrada).
+    """
+    colunas_saida = [coluna for _, _, colunas in preprocessor.transformers for coluna in colunas]
+    return [colunas_saida.index(coluna) for coluna in variaveis_categoricas_nativas]
+
+
+def criar_pipeline(hiperparametros=None, memory=None, estimador=ESTIMADOR_PADRAO) -> Pipeline:
+    """
+    Monta o pipeline completo (preprocessor + estimador de ESTIMADORES).
+
+    memory: diretório (ou joblib.Memory) usado para reaproveitar o ajuste do
+    preprocessor entre execuções com os mesmos dados.
+    """
+    definicao = ESTIMADORES[estimador]
+    preprocessor = criar_preprocessador(definicao["categorias_nativas"])
+    parametros = {**definicao["hiperparametros"], **(hiperparametros or {})}
+    if definicao["categorias_nativas"]:
+        parametros.setdefault("categorical_features", indices_categoricos(preprocessor))
+    modelo = definicao["classe"](**parametros)
+
+    return Pipeline(
+        steps=[("preprocessor", preprocessor), ("model", modelo)],
+        memory=memory,
+    )
+
+
+def descrever_estimador(pipeline) -> str:
+    modelo = pipeline.named_steps["model"]
+    return next(
+        (d["descricao"] for d in ESTIMADORES.values() if isinstance(modelo, d["classe"])),
+        type(modelo).__name__,
+    )
+
+
+# ETAPA 6 - treinamento
+def treinar(pipeline, X_treino, y_treino) -> Pipeline:
+    print(f"Iniciando o treinamento do pipeline {descrever_estimador(pipeline)}")
+    pipeline.fit(X_treino, y_treino)
+    # O artefato salvo não depende do diretório de cache local
+    pipeline.set_params(memory=None)
+    return pipeline
+
+
+# ETAPA 7 - Relatório
+def avaliar(pipeline, X_teste, y_teste, le):
+    """
+    Retorna (acurácia, relatório de classificação em texto, relatório em dict)
+    no conjunto de teste.
+    """
+    y_prev_rf = pipeline.predict(X_teste)
+    rf_acuracia = accuracy_score(y_teste, y_prev_rf)
+    print(f"Acurácia do Pipeline {descrever_estimador(pipeline)}: {rf_acuracia * 100:.2f}%")
+
+    report_str = classification_report(y_teste, y_prev_rf, target_names=le.classes_)
+
+    print("\nRelatório de Classificação:")
+    print(report_str)
+    metricas = classification_report(y_teste, y_prev_rf, target_names=le.classes_, output_dict=True)
+    return rf_acuracia, report_str, metricas
+
+
+def formatar_relatorio(rf_acuracia, report_str) -> str:
+    return (
+        "=== RELATÓRIO DE PERFORMANCE DO MODELO ===\n"
+        f"Acurácia Geral: {rf_acuracia * 100:.2f}%\n"
+        + "-" * 43
+        + "\n"
+        + report_str
+    )
+
+
+def salvar_relatorio(texto, caminho=RELATORIO_MODELO) -> None:
+    print(f"📄 Salvando relatório em: {caminho}")
+
+    try:
+        Path(caminho).parent.mkdir(parents=True, exist_ok=True)
+        with open(caminho, "w", encoding="utf-8") as f:
+            f.write(texto)
+        print("✅ Relatório salvo com sucesso!")
+    except Exception as e:
+        print(f"❌ Erro ao salvar o relatório: {e}")
+        raise
+
+
+# ETAPA 8 - salvando os artefatos
+def salvar_artefatos(pipeline, le, caminho_modelo=MODEL_FILE, caminho_encoder=LABEL_ENCODER_FILE) -> None:
+    print("\n💾 Salvando artefatos na pasta models...")
+
+    try:
+        for caminho in (caminho_modelo, caminho_encoder):
+            Path(caminho).parent.mkdir(parents=True, exist_ok=True)
+        # Salva o Pipeline completo (Preprocessamento + Modelo)
+        joblib.dump(pipeline, caminho_modelo)
+
+        # Salva o LabelEncoder para decodificar as previsões no Streamlit
+        joblib.dump(le, caminho_encoder)
+
+        print(f"✅ Artefatos salvos com sucesso em: {Path(caminho_modelo).parent}")
+        print(f"📦 Classes mapeadas no LabelEncoder: {list(le.classes_)}")
+
+    except Exception as e:
+        # Propaga: um artefato incompleto não pode ser registrado nem publicado
+        print(f"❌ Erro ao salvar os artefatos: {e}")
+        raise
+
+
+def _copiar_atomico(origem: Path, destino: Path) -> None:
+    """Copia para um temporário na pasta de destino e faz rename sobre o destino."""
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    temporario = destino.with_name(f".{destino.name}.{os.getpid()}.tmp")
+    shutil.copyfile(origem, temporario)
+    os.replace(temporario, destino)
+
+
+def _publicar_artefatos(diretorio_modelo: Path) -> None:
+    """
+    Copia os artefatos do armazenamento para os caminhos usados pelo app.
+    Cada arquivo é trocado de forma atômica, então quem recarrega o modelo
+    (registro_modelos.py) nunca lê um arquivo pela metade.
+    """
+    _copiar_atomico(diretorio_modelo / "pipeline.joblib", MODEL_FILE)
+    _copiar_atomico(diretorio_modelo / "label_encoder.joblib", LABEL_ENCODER_FILE)
+    shutil.copyfile(diretorio_modelo / "relatorio.txt", RELATORIO_MODELO)
+    # Modelos treinados antes do monitor de drift não têm a referência
+    if (diretorio_modelo / "referencia_drift.json").exists():
+        _copiar_atomico(diretorio_modelo / "referencia_drift.json", REFERENCIA_DRIFT_FILE)
+    print(f"✅ Artefatos publicados em: {MODEL_FILE.parent}")
+
+
+def diretorio_artefato(identificador_modelo) -> Path:
+    return ARTEFATOS_DIR / f"modelo_{identificador_modelo}"
+
+
+def registrar_artefato(diretorio_modelo: Path, pipeline, le, relatorio, referencia, meta) -> None:
+    """
+    Grava pipeline, label encoder, relatório, referência de drift (se houver)
+    e meta.json em diretorio_modelo, dentro de ARTEFATOS_DIR.
+
+    Tudo vai para um diretório temporário renomeado ao final, assim um
+    treinamento interrompido nunca deixa um artefato incompleto.
+    """
+    ARTEFATOS_DIR.mkdir(parents=True, exist_ok=True)
+    diretorio_temporario = Path(tempfile.mkdtemp(dir=ARTEFATOS_DIR, prefix=".tmp_"))
+    try:
+        salvar_artefatos(
+            pipeline,
+            le,
+            diretorio_temporario / "pipeline.joblib",
+            diretorio_temporario / "label_encoder.joblib",
+        )
+        salvar_relatorio(relatorio, diretorio_temporario / "relatorio.txt")
+        if referencia is not None:
+            salvar_referencia(referencia, diretorio_temporario / "referencia_drift.json")
+        with open(diretorio_temporario / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+    except BaseException:
+        # Nada é renomeado para o armazenamento nem publicado
+        shutil.rmtree(diretorio_temporario, ignore_errors=True)
+        raise
+
+    if diretorio_modelo.exists():
+        shutil.rmtree(diretorio_modelo)
+    diretorio_temporario.rename(diretorio_modelo)
+
+
+def executar_treinamento(
+    caminho_dados=DADOS_TREINO,
+    hiperparametros=None,
+    forcar=False,
+    usar_cache_pipeline=True,
+    estimador=None,
+    publicar=True,
+) -> dict:
+    """
+    Executa o treinamento completo, pulando pré-processamento e/ou ajuste
+    quando os artefatos correspondentes já existem em ARTEFATOS_DIR.
+
+    forcar: ignora os artefatos existentes e refaz todas as etapas.
+    estimador: nome em ESTIMADORES (padrão: estimador_configurado()).
+    publicar: False só grava no armazenamento, sem trocar o modelo do app.
+    Retorna os metadados do modelo (hashes, hiperparâmetros, acurácia,
+    métricas por classe e tempo de ajuste).
+    """
+    garantir_diretorios()
+    estimador = estimador or estimador_configurado()
+    hiperparametros = {**ESTIMADORES[estimador]["hiperparametros"], **(hiperparametros or {})}
+
+    with REGISTRO.medir("treino", "preprocessar"):
+        df_processado, identificador_dados = preprocessar(caminho_dados, usar_cache=not forcar)
+    identificador_modelo = hash_modelo(identificador_dados, hiperparametros, estimador)
+    diretorio_modelo = diretorio_artefato(identificador_modelo)
+
+    if not forcar and (diretorio_modelo / "meta.json").exists():
+        print(f"♻️ Modelo {identificador_modelo} já treinado com esses dados e hiperparâmetros.")
+        if publicar:
+            _publicar_artefatos(diretorio_modelo)
+        with open(diretorio_modelo / "meta.json", "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    X_treino, X_teste, y_treino, y_teste, le = separar_treino_teste(df_processado)
+
+    memory = str(CACHE_PIPELINE_DIR) if usar_cache_pipeline else None
+    pipeline_completa_rf = instrumentar_se_ativo(criar_pipeline(hiperparametros, memory=memory, estimador=estimador))
+    print(
+        f"Pipelines de pré-processamento e o modelo {ESTIMADORES[estimador]['descricao']} "
+        "definidos e combinados no pipeline completo."
+    )
+    inicio = time.perf_counter()
+    treinar(pipeline_completa_rf, X_treino, y_treino)
+    tempo_treino = time.perf_counter() - inicio
+    # Passos ajustados vindos do cache do Pipeline(memory=...) chegam sem instrumentação
+    instrumentar_se_ativo(pipeline_completa_rf)
+
+    rf_acuracia, report_str, metricas = avaliar(pipeline_completa_rf, X_teste, y_teste, le)
+
+    meta = {
+        "modelo": identificador_modelo,
+        "dados": identificador_dados,
+        "estimador": estimador,
+        "hiperparametros": hiperparametros,
+        "acuracia": rf_acuracia,
+        "metricas": metricas,
+        "tempo_treino": tempo_treino,
+        "classes": [str(classe) for classe in le.classes_],
+    }
+    # Distribuição das entradas no treino, base do monitor de drift
+    registrar_artefato(
+        diretorio_modelo,
+        pipeline_completa_rf,
+        le,
+        formatar_relatorio(rf_acuracia, report_str),
+        construir_referencia(X_treino),
+        meta,
+    )
+
+    if publicar:
+        _publicar_artefatos(diretorio_modelo)
+    if instrumentacao_ativa():
+        print(f"\n⏱️ Latência por etapa:\n{resumo_texto()}")
+        caminho_json, _ = salvar_metricas(METRICAS_DIR / "treino")
+        print(f"✅ Métricas salvas em: {caminho_json.parent}")
+    return meta
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Treinamento do pipeline de classificação.")
+    parser.add_argument(
+        "--dados",
+        type=Path,
+        default=DADOS_TREINO,
+        help="dataset bruto (csv, parquet ou feather) (padrão: %(default)s)",
+    )
+    parser.add_argument(
+        "--hiperparametros",
+        type=Path,
+        default=None,
+        help="json com hiperparâmetros do estimador que substituem os padrões",
+    )
+    parser.add_argument(
+        "--estimador",
+        choices=list(ESTIMADORES),
+        default=None,
+        help="estimador do pipeline (padrão: OBESIDADE_ESTIMADOR ou %s)" % ESTIMADOR_PADRAO,
+    )
+    parser.add_argument(
+        "--forcar",
+        action="store_true",
+        help="refaz pré-processamento e treinamento mesmo com artefatos em cache",
+    )
+    parser.add_argument(
+        "--sem-cache-pipeline",
+        action="store_true",
+        help="não usa o cache do Pipeline(memory=...) para o preprocessor",
+    )
+    args = parser.parse_args()
+
+    hiperparametros = ler_json(args.hiperparametros) if args.hiperparametros else None
+    executar_treinamento(
+        args.dados,
+        hiperparametros,
+        forcar=args.forcar,
+        usar_cache_pipeline=not args.sem_cache_pipeline,
+        estimador=args.estimador,
+    )
+
+
+if __name__ == "__main__":
+    main()
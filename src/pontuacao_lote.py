@@ -0,0 +1,326 @@
+"""
+Pontuação em lote de arquivos no formato do Obesity.csv (csv, parquet ou feather).
+
+Lê o arquivo de entrada em blocos de tamanho limitado, aplica o mesmo
+pré-processamento do treinamento, distribui os blocos entre processos e grava
+a classe prevista e as probabilidades de cada classe no arquivo de saída
+conforme os blocos ficam prontos. A memória fica limitada a alguns blocos em
+processamento, independente do tamanho do arquivo.
+
+Exemplo:
+    python src/pontuacao_lote.py dados/Obesity.csv dados/obesidade_pontuado.csv
+    python src/pontuacao_lote.py populacao.parquet populacao_pontuada.parquet
+    python src/pontuacao_lote.py dados/Obesity.csv /tmp/pontuado.csv --metricas
+    python src/pontuacao_lote.py dados/Obesity.csv /tmp/pontuado.csv --relatorio-contrato /tmp/contrato.json
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from config import (
+    MODEL_FILE,
+    LABEL_ENCODER_FILE,
+    MAPA_COLUNAS,
+    MAPA_VALORES_COLUNA,
+    METRICAS_DIR,
+    REFERENCIA_DRIFT_FILE,
+    ESTADO_DRIFT_LOTE,
+)
+from artefatos import carregar_artefatos, alinhar_colunas_modelo
+from motor_preprocessamento import MotorPreprocessamento
+from tabela_probabilidades import TabelaProbabilidades
+from codificador_fundido import fundir_pipeline
+from contrato_dados import ContratoDados
+from monitor_drift import MonitorDrift, carregar_referencia, formatar_relatorio_drift
+from instrumentacao import (
+    REGISTRO,
+    ativar,
+    instrumentar_se_ativo,
+    instrumentacao_ativa,
+    resumo_texto,
+    salvar_metricas,
+)
+from utils import ler_json, ler_dataset_em_blocos, EscritorDataset
+
+TAMANHO_BLOCO_PADRAO = 50_000
+COLUNA_CLASSE = "classe_prevista"
+
+# Estado de cada processo do pool, carregado uma única vez no initializer
+_estado_worker = {}
+
+
+def _inicializar_worker(
+    caminho_modelo, caminho_encoder, mapa_colunas, mapa_valores, usar_tabela, instrumentar, referencia_drift
+):
+    ativar(instrumentar)
+    pipeline, le = carregar_artefatos(caminho_modelo, caminho_encoder)
+    modelo = pipeline.named_steps["model"]
+    if "n_jobs" in modelo.get_params():
+        # Um núcleo por processo: o paralelismo fica entre os blocos
+        modelo.set_params(n_jobs=1)
+    try:
+        # Mesma saída do ColumnTransformer, sem o custo de despacho por ramo
+        pipeline = fundir_pipeline(pipeline)
+    except ValueError as e:
+        print(f"⚠️ Codificador fundido desativado: {e}")
+    _estado_worker["pipeline"] = instrumentar_se_ativo(pipeline)
+    _estado_worker["le"] = le
+    # Os mapas JSON são compilados uma única vez por processo
+    _estado_worker["motor"] = MotorPreprocessamento(mapa_colunas, mapa_valores)
+    # O memory-map faz os processos compartilharem as páginas da tabela
+    _estado_worker["tabela"] = (
+        TabelaProbabilidades.carregar(caminho_modelo=caminho_modelo) if usar_tabela else None
+    )
+    _estado_worker["drift"] = MonitorDrift(referencia_drift) if referencia_drift else None
+
+
+def calcular_probabilidades(df_input, pipeline, tabela=None) -> np.ndarray:
+    """
+    Retorna o predict_proba do pipeline para df_input. Com a tabela
+    pré-calculada, só as linhas fora do domínio do questionário passam pelo
+    pipeline.
+    """
+    if tabela is None:
+        return pipeline.predict_proba(df_input)
+
+    with REGISTRO.medir("lote/tabela", "consultar", len(df_input)):
+        probabilidades, validos = tabela.consultar(df_input)
+    if not validos.all():
+        probabilidades[~validos] = pipeline.predict_proba(df_input[~validos])
+    return probabilidades
+
+
+def pontuar_bloco(df_bloco, pipeline, le, motor, tabela=None, drift=None) -> pd.DataFrame:
+    """
+    Pré-processa um bloco de dados brutos com o MotorPreprocessamento (o mesmo
+    tratamento do preparar_dados_obesidade) e retorna a classe prevista e as
+    probabilidades de cada classe, preservando a ordem das linhas.
+    drift: MonitorDrift atualizado com as entradas do modelo do bloco.
+    """
+    with REGISTRO.medir("lote/motor", "processar", len(df_bloco)):
+        df_processado = motor.processar(df_bloco).df
+    with REGISTRO.medir("lote/alinhar_colunas", "transform", len(df_processado)):
+        df_input = alinhar_colunas_modelo(df_processado, pipeline)
+    if drift is not None:
+        drift.atualizar(df_input)
+
+    # predict é o argmax do predict_proba, então basta uma chamada ao modelo
+    probabilidades = calcular_probabilidades(df_input, pipeline, tabela)
+    indices = np.argmax(probabilidades, axis=1)
+    classes = le.inverse_transform(pipeline.classes_[indices])
+    return montar_saida(probabilidades, classes, le.classes_, df_bloco.index)
+
+
+def montar_saida(probabilidades, classes_previstas, classes, index=None) -> pd.DataFrame:
+    """Classe prevista seguida de uma coluna prob_<classe> por classe."""
+    df_saida = pd.DataFrame(
+        probabilidades,
+        columns=[f"prob_{classe}" for classe in classes],
+        index=index,
+    )
+    # Categorias fixas: todos os blocos gravados têm o mesmo tipo de coluna
+    df_saida.insert(
+        0, COLUNA_CLASSE, pd.Categorical(classes_previstas, categories=classes)
+    )
+    return df_saida
+
+
+def _pontuar_bloco_worker(df_bloco):
+    """
+    Retorna (resultado do bloco, métricas, contadores de drift) com as métricas
+    e os contadores acumulados desde o bloco anterior (None quando desligados).
+    """
+    drift = _estado_worker["drift"]
+    df_saida = pontuar_bloco(
+        df_bloco,
+        _estado_worker["pipeline"],
+        _estado_worker["le"],
+        _estado_worker["motor"],
+        _estado_worker["tabela"],
+        drift,
+    )
+    metricas = REGISTRO.capturar(zerar=True) if instrumentacao_ativa() else None
+    contagens_drift = drift.capturar(zerar=True) if drift is not None else None
+    return df_saida, metricas, contagens_drift
+
+
+def saida_vazia(caminho_encoder=LABEL_ENCODER_FILE) -> pd.DataFrame:
+    """Resultado sem linhas, gravado quando a entrada não tem nenhuma linha."""
+    classes = joblib.load(caminho_encoder).classes_
+    return montar_saida(np.empty((0, len(classes))), [], classes)
+
+
+def pontuar_arquivo(
+    caminho_entrada,
+    caminho_saida,
+    tamanho_bloco=TAMANHO_BLOCO_PADRAO,
+    processos=None,
+    caminho_modelo=MODEL_FILE,
+    caminho_encoder=LABEL_ENCODER_FILE,
+    usar_tabela=False,
+    instrumentar=None,
+    monitor_drift=None,
+    validador_contrato=None,
+) -> int:
+    """
+    Pontua caminho_entrada em blocos e grava o resultado em caminho_saida.
+    Os formatos de entrada e saída (csv, parquet ou feather) são definidos pela
+    extensão de cada arquivo.
+    instrumentar: mede a latência de cada etapa nos workers e junta as métricas
+    em instrumentacao.REGISTRO (padrão: OBESIDADE_INSTRUMENTACAO).
+    monitor_drift: MonitorDrift que recebe as contagens das entradas de todos
+    os blocos (os workers contam e o processo principal junta).
+    validador_contrato: ValidadorContrato (contrato_dados.py) que valida cada
+    bloco lido no processo principal enquanto os workers pontuam os anteriores.
+    Retorna o número de linhas pontuadas.
+    """
+    if instrumentar is None:
+        instrumentar = instrumentacao_ativa()
+    mapa_colunas = ler_json(MAPA_COLUNAS)
+    mapa_valores = ler_json(MAPA_VALORES_COLUNA)
+    processos = processos or os.cpu_count() or 1
+
+    # No máximo 2 blocos por processo ficam em memória (em fila ou em execução)
+    max_pendentes = 2 * processos
+    total_linhas = 0
+    inicio = time.perf_counter()
+
+    with ProcessPoolExecutor(
+        max_workers=processos,
+        initializer=_inicializar_worker,
+        initargs=(
+            caminho_modelo,
+            caminho_encoder,
+            mapa_colunas,
+            mapa_valores,
+            usar_tabela,
+            instrumentar,
+            monitor_drift.referencia if monitor_drift is not None else None,
+        ),
+    ) as executor, EscritorDataset(caminho_saida, saida_vazia(caminho_encoder)) as saida:
+        pendentes = deque()
+
+        def gravar_proximo():
+            nonlocal total_linhas
+            df_resultado, metricas, contagens_drift = pendentes.popleft().result()
+            if metricas:
+                REGISTRO.mesclar(metricas)
+            if contagens_drift:
+                monitor_drift.mesclar(contagens_drift)
+            saida.escrever(df_resultado)
+            total_linhas += len(df_resultado)
+
+        for df_bloco in ler_dataset_em_blocos(caminho_entrada, tamanho_bloco):
+            # Um csv só com o cabeçalho gera um bloco sem linhas
+            if df_bloco.empty:
+                continue
+            pendentes.append(executor.submit(_pontuar_bloco_worker, df_bloco))
+            if validador_contrato is not None:
+                validador_contrato.atualizar(df_bloco)
+            if len(pendentes) >= max_pendentes:
+                gravar_proximo()
+
+        while pendentes:
+            gravar_proximo()
+
+    duracao = time.perf_counter() - inicio
+    print(
+        f"✅ {total_linhas} linhas pontuadas em {duracao:.2f}s "
+        f"({processos} processos) -> '{caminho_saida}'"
+    )
+    return total_linhas
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Pontua em lote um arquivo no formato do Obesity.csv."
+    )
+    parser.add_argument("entrada", help="arquivo com os dados brutos (csv, parquet ou feather)")
+    parser.add_argument(
+        "saida", help="arquivo de saída com classe e probabilidades (csv, parquet ou feather)"
+    )
+    parser.add_argument(
+        "--tamanho-bloco",
+        type=int,
+        default=TAMANHO_BLOCO_PADRAO,
+        help="linhas lidas por bloco (padrão: %(default)s)",
+    )
+    parser.add_argument(
+        "--processos",
+        type=int,
+        default=None,
+        help="número de processos do pool (padrão: número de CPUs)",
+    )
+    parser.add_argument(
+        "--tabela",
+        action="store_true",
+        help="consulta a tabela pré-calculada de probabilidades (tabela_probabilidades.py)",
+    )
+    parser.add_argument(
+        "--metricas",
+        action="store_true",
+        help="mede a latência de cada etapa e grava as métricas em metricas/pontuacao_lote.*",
+    )
+    parser.add_argument(
+        "--sem-drift",
+        action="store_true",
+        help="não atualiza os contadores do monitor de drift (monitor_drift.py)",
+    )
+    parser.add_argument(
+        "--sem-contrato",
+        action="store_true",
+        help="não valida a entrada contra o contrato de dados (contrato_dados.py)",
+    )
+    parser.add_argument(
+        "--relatorio-contrato",
+        default=None,
+        help="grava o relatório estruturado do contrato de dados em json",
+    )
+    args = parser.parse_args()
+    instrumentar = args.metricas or instrumentacao_ativa()
+
+    # O drift é acumulado entre execuções em ESTADO_DRIFT_LOTE
+    monitor_drift = None
+    if not args.sem_drift and REFERENCIA_DRIFT_FILE.exists():
+        monitor_drift = MonitorDrift(carregar_referencia(), caminho_estado=ESTADO_DRIFT_LOTE)
+    validador_contrato = None if args.sem_contrato else ContratoDados.carregar("bruto").validador()
+
+    pontuar_arquivo(
+        args.entrada,
+        args.saida,
+        tamanho_bloco=args.tamanho_bloco,
+        processos=args.processos,
+        usar_tabela=args.tabela,
+        instrumentar=instrumentar,
+        monitor_drift=monitor_drift,
+        validador_contrato=validador_contrato,
+    )
+    if validador_contrato is not None:
+        relatorio = validador_contrato.finalizar()
+        print(f"\n{relatorio.formatar()}")
+        if args.relatorio_contrato:
+            Path(args.relatorio_contrato).parent.mkdir(parents=True, exist_ok=True)
+            with open(args.relatorio_contrato, "w", encoding="utf-8") as f:
+                json.dump(relatorio.para_dict(), f, ensure_ascii=False, indent=2)
+            print(f"✅ Relatório do contrato salvo em: {args.relatorio_contrato}")
+    if monitor_drift is not None:
+        monitor_drift.salvar_estado()
+        print(f"\n{formatar_relatorio_drift(monitor_drift.pontuacoes())}")
+        print(f"✅ Contadores de drift salvos em: {ESTADO_DRIFT_LOTE}")
+    if instrumentar:
+        print(f"\n⏱️ Latência por etapa:\n{resumo_texto()}")
+        caminho_json, _ = salvar_metricas(METRICAS_DIR / "pontuacao_lote")
+        print(f"✅ Métricas salvas em: {caminho_json.parent}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from utils import renomear_colunas, transformar_valores_string
+from motor_preprocessamento import MotorPreprocessamento, COLUNAS_POR_MAPEAMENTO
 
 
 def preparar_dados_obesidade(df, mapa_colunas, mapa_valores_colunas):
@@ -11,83 +11,48 @@ def preparar_dados_obesidade(df, mapa_colunas, mapa_valores_colunas):
 
     map_valores: contém os novos valores a serem transformados
 
+    A renomeação e a transformação de valores são feitas em uma única passada
+    pelo MotorPreprocessamento; as colunas transformadas saem como categóricas.
+    Para processar vários blocos, compile o MotorPreprocessamento uma vez e
+    chame motor.processar(bloco) diretamente.
     """
 
-    df_processado = df.copy()
-
     # 1. Validação e Renomeação de Colunas
     if not mapa_colunas:
         print(
             "❌ Arquivo mapa_colunas não encontrado. Retornado dataset df sem transformações"
         )
-        return df_processado
-
-    else:
-        df_processado = renomear_colunas(df_processado, mapa_colunas)
-        print("✅ colunas renomeadas")
+        return df.copy()
 
     # 2. Validação e Transformação de Valores
     if not mapa_valores_colunas:
         print(
             "❌ Arquivo mapa_valores não encontrado. Retornado dataset df sem transformações"
         )
-        return df_processado
+        return MotorPreprocessamento(mapa_colunas).processar(df).df
 
-    # Início das transformações categóricas
     print("Iniciando transformações de valores...")
+    resultado = MotorPreprocessamento(mapa_colunas, mapa_valores_colunas).processar(df)
+    print("✅ colunas renomeadas")
 
-    # Classificação do Peso (Alvo)
-    if "mapeamento_classificacao_peso_corporal" in mapa_valores_colunas:
-        transformar_valores_string(
-            df_processado,
-            "classificacao_peso_corporal",
-            mapa_valores_colunas["mapeamento_classificacao_peso_corporal"][
-                "valores_novos_classificacao_peso_corporal"
-            ],
-        )
-        print("  ✅ Valores classificacao_peso_corporal ok.")
-
-    # Meio de Transporte
-    if "mapeamento_mtrans" in mapa_valores_colunas:
-        transformar_valores_string(
-            df_processado,
-            "mtrans",
-            mapa_valores_colunas["mapeamento_mtrans"]["valores_novos_mtrans"],
-        )
-        print("  ✅ Valores mtrans ok.")
-
-    # Frequência (CAEC e CALC)
-    if "mapeamento_frequencia" in mapa_valores_colunas:
-        transformar_valores_string(
-            df_processado,
-            "caec",
-            mapa_valores_colunas["mapeamento_frequencia"]["valores_novos_frequencia"],
-        )
-        transformar_valores_string(
-            df_processado,
-            "calc",
-            mapa_valores_colunas["mapeamento_frequencia"]["valores_novos_frequencia"],
-        )
-        print("  ✅ Valores caec e calc ok.")
-
-    # Gênero
-    if "mapeamento_genero" in mapa_valores_colunas:
-        transformar_valores_string(
-            df_processado,
-            "genero",
-            mapa_valores_colunas["mapeamento_genero"]["transformacao_genero"],
+    if resultado.colunas_ausentes:
+        print(f"⚠️ Colunas não encontradas: {resultado.colunas_ausentes}")
+    if resultado.colunas_ignoradas:
+        print(
+            f"Erro: As colunas {resultado.colunas_ignoradas} não são do tipo texto. "
+            "Nenhuma transformação foi aplicada."
         )
-        print("  ✅ Valores genero ok.")
-
-    # Variáveis Binárias (Sim/Não)
-    if "mapeamento_sim_nao" in mapa_valores_colunas:
-        colunas_sim_nao = ["historico_familiar", "favc", "fumante", "scc"]
-        for coluna in colunas_sim_nao:
-            transformar_valores_string(
-                df_processado,
-                coluna,
-                mapa_valores_colunas["mapeamento_sim_nao"]["transformacao_sim_nao"],
-            )
-            print(f"  ✅ Colunas binárias {colunas_sim_nao} ok.")
 
-    return df_processado
+    for mapeamento, (colunas, _) in COLUNAS_POR_MAPEAMENTO.items():
+        if mapeamento not in mapa_valores_colunas:
+            continue
+        for coluna in colunas:
+            if coluna in resultado.valores_nao_mapeados:
+                print(
+                    f"Erro: Os seguintes valores únicos na coluna '{coluna}' não foram "
+                    f"encontrados no mapeamento e viraram nulos:"
+                )
+                print(resultado.valores_nao_mapeados[coluna])
+        print(f"  ✅ Valores {', '.join(colunas)} ok.")
+
+    return resultado.df
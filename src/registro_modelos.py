@@ -0,0 +1,293 @@
+"""
+Registro de versões do modelo com recarga a quente.
+
+Observa os arquivos do modelo publicado (pipeline e label encoder em
+MODELS_DIR) com o watchdog e, quando eles mudam, carrega a nova versão em uma
+thread de fundo, confere com uma predição de teste e troca o par
+(pipeline, encoder) de forma atômica: a versão atual é um único objeto
+imutável (VersaoModelo) e a troca é a substituição dessa referência. Quem já
+pegou a versão atual (uma predição em andamento) termina com ela; as
+próximas chamadas recebem a nova. As últimas versões ficam em memória para
+voltar instantaneamente (reverter); a versão revertida continua publicada em
+disco, então ela fica marcada e não é recarregada até que outra seja publicada.
+Cada versão guarda o hash de cada arquivo e, se informada, a referência de
+drift publicada com ela, para os recursos derivados conferirem a versão em
+memória e não os arquivos atuais.
+
+Exemplo:
+    python src/registro_modelos.py verificar
+    python src/registro_modelos.py observar
+"""
+
+import argparse
+import hashlib
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import MODEL_FILE, LABEL_ENCODER_FILE
+from artefatos import carregar_artefatos, alinhar_colunas_modelo, hash_arquivo
+from monitor_drift import carregar_referencia
+
+# Versões anteriores mantidas em memória para reverter
+MAX_VERSOES_PADRAO = 3
+
+# Espera após o último evento nos arquivos antes de carregar (o treino grava
+# o pipeline e o encoder em sequência)
+ESPERA_EVENTOS_PADRAO = 2.0
+
+# Resposta usada na predição de teste de cada versão nova
+LINHA_TESTE = {
+    "genero": "feminino",
+    "idade": 30,
+    "historico_familiar": "sim",
+    "favc": "sim",
+    "fcvc": 2,
+    "ncp": 3,
+    "caec": "as_vezes",
+    "ch20": 2,
+    "faf": 1,
+    "tue": 1,
+    "calc": "as_vezes",
+    "mtrans": "transporte_publico",
+}
+
+
+@dataclass(frozen=True)
+class VersaoModelo:
+    """
+    Par pipeline/encoder carregado, identificado pelo hash dos arquivos.
+    hashes: sha256 de cada arquivo no momento da carga (caminho absoluto -> hash).
+    referencia_drift: referência do monitor de drift publicada com o modelo.
+    """
+
+    pipeline: object
+    le: object
+    identificador: str
+    carregado_em: float
+    hashes: dict = field(default_factory=dict)
+    referencia_drift: dict = None
+
+    def hash_de(self, caminho) -> str:
+        """Hash do arquivo quando esta versão foi carregada (None se não existia)."""
+        return self.hashes.get(str(Path(caminho).resolve()))
+
+
+def hashes_arquivos(arquivos) -> dict:
+    """sha256 de cada arquivo existente da lista (caminho -> hash)."""
+    return {str(caminho): hash_arquivo(caminho) for caminho in arquivos if Path(caminho).exists()}
+
+
+def identificar_arquivos(arquivos, hashes=None) -> str:
+    """Hash combinado (12 caracteres) dos arquivos existentes da lista."""
+    hashes = hashes if hashes is not None else hashes_arquivos(arquivos)
+    return hashlib.sha256("".join(hashes.values()).encode()).hexdigest()[:12]
+
+
+def testar_versao(pipeline, le, linha=None) -> None:
+    """
+    Predição de teste: levanta ValueError se as probabilidades não tiverem
+    uma coluna por classe, não forem finitas ou não somarem 1, ou se o
+    encoder não decodificar as classes do pipeline.
+    """
+    df_teste = alinhar_colunas_modelo(pd.DataFrame([linha or LINHA_TESTE]), pipeline)
+    probabilidades = np.asarray(pipeline.predict_proba(df_teste))
+
+    if probabilidades.shape != (1, len(pipeline.classes_)):
+        raise ValueError(f"predict_proba retornou shape {probabilidades.shape}")
+    if not np.isfinite(probabilidades).all() or not np.allclose(probabilidades.sum(axis=1), 1.0):
+        raise ValueError("predict_proba retornou probabilidades inválidas")
+    le.inverse_transform(pipeline.classes_)
+
+
+class RegistroModelos:
+    """
+    Versão atual do modelo e histórico das anteriores.
+
+    carregador: função sem argumentos que retorna (pipeline, le); padrão:
+    artefatos.carregar_artefatos dos arquivos observados.
+    arquivos: arquivos cuja mudança dispara a recarga (e que identificam a versão).
+    caminho_referencia: referência de drift carregada junto com cada versão
+    (também observada e parte da identidade).
+    """
+
+    def __init__(
+        self,
+        carregador=None,
+        arquivos=(MODEL_FILE, LABEL_ENCODER_FILE),
+        max_versoes=MAX_VERSOES_PADRAO,
+        espera_eventos=ESPERA_EVENTOS_PADRAO,
+        caminho_referencia=None,
+    ):
+        self.arquivos = [Path(caminho).resolve() for caminho in arquivos]
+        self.caminho_referencia = Path(caminho_referencia).resolve() if caminho_referencia else None
+        if self.caminho_referencia is not None and self.caminho_referencia not in self.arquivos:
+            self.arquivos.append(self.caminho_referencia)
+        self.carregador = carregador or (lambda: carregar_artefatos(*self.arquivos[:2]))
+        self.max_versoes = max_versoes
+        self.espera_eventos = espera_eventos
+        self._atual = None
+        self._historico = []
+        # Versão descartada por reverter(): os arquivos ainda são dela
+        self.revertida = None
+        # _trava protege a troca e o histórico; _trava_carga evita duas cargas simultâneas
+        self._trava = threading.Lock()
+        self._trava_carga = threading.Lock()
+        self._temporizador = None
+        self._observador = None
+
+    def atual(self) -> VersaoModelo:
+        """Versão em uso. Quem faz uma predição deve pegá-la uma única vez."""
+        if self._atual is None:
+            raise RuntimeError("Nenhuma versão carregada: chame carregar() antes")
+        return self._atual
+
+    def versoes(self) -> list:
+        """Versão atual seguida das anteriores (da mais recente para a mais antiga)."""
+        with self._trava:
+            return [self._atual, *reversed(self._historico)] if self._atual else []
+
+    def versao(self, identificador) -> VersaoModelo:
+        """Versão em memória com esse identificador (None se já descartada)."""
+        return next((v for v in self.versoes() if v.identificador == identificador), None)
+
+    def carregar(self, forcar=False) -> bool:
+        """
+        Carrega os arquivos, testa a nova versão e troca a atual. Retorna True
+        se houve troca; False se os arquivos não mudaram ou ainda são os da
+        versão revertida (forcar carrega mesmo assim). Em caso de falha a
+        versão atual é mantida e a exceção é propagada.
+        """
+        with self._trava_carga:
+            hashes = hashes_arquivos(self.arquivos)
+            identificador = identificar_arquivos(self.arquivos, hashes)
+            if not forcar and self._atual is not None and identificador == self._atual.identificador:
+                return False
+            if not forcar and identificador == self.revertida:
+                print(f"⚠️ Modelo {identificador} foi revertido; publique outra versão ou use forcar")
+                return False
+
+            inicio = time.perf_counter()
+            pipeline, le = self.carregador()
+            referencia = self._carregar_referencia()
+            if identificar_arquivos(self.arquivos) != identificador:
+                raise ValueError("Arquivos do modelo alterados durante a carga")
+            testar_versao(pipeline, le)
+
+            nova = VersaoModelo(pipeline, le, identificador, time.time(), hashes, referencia)
+            with self._trava:
+                if self._atual is not None:
+                    self._historico.append(self._atual)
+                    del self._historico[: -self.max_versoes]
+                self._atual = nova
+                self.revertida = None
+            print(f"✅ Modelo {identificador} carregado em {time.perf_counter() - inicio:.3f}s")
+            return True
+
+    def _carregar_referencia(self):
+        if self.caminho_referencia is None or not self.caminho_referencia.exists():
+            return None
+        try:
+            return carregar_referencia(self.caminho_referencia)
+        except ValueError as e:
+            # A versão é usada mesmo assim, só sem monitor de drift
+            print(f"⚠️ Referência de drift ignorada: {e}")
+            return None
+
+    def reverter(self) -> VersaoModelo:
+        """
+        Volta para a versão anterior. A atual é descartada e seu identificador
+        fica em `revertida`, para carregar() não trazê-la de volta dos arquivos.
+        """
+        with self._trava:
+            if not self._historico:
+                raise ValueError("Não há versão anterior para reverter")
+            self.revertida = self._atual.identificador
+            self._atual = self._historico.pop()
+            print(f"♻️ Modelo revertido para {self._atual.identificador}")
+            return self._atual
+
+    def _recarregar(self) -> None:
+        try:
+            self.carregar()
+        except Exception as e:
+            atual = self._atual.identificador if self._atual else "nenhuma"
+            print(f"⚠️ Nova versão do modelo rejeitada, mantendo {atual}: {e}")
+
+    def agendar_recarga(self) -> None:
+        """Agenda a carga em uma thread de fundo; eventos seguidos reiniciam a espera."""
+        with self._trava:
+            if self._temporizador is not None:
+                self._temporizador.cancel()
+            self._temporizador = threading.Timer(self.espera_eventos, self._recarregar)
+            self._temporizador.daemon = True
+            self._temporizador.start()
+
+    def iniciar_observador(self) -> None:
+        """Observa as pastas dos arquivos com o watchdog (thread daemon)."""
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+
+        registro = self
+        observados = {str(caminho) for caminho in self.arquivos}
+
+        class _Eventos(FileSystemEventHandler):
+            def on_any_event(self, event):
+                caminhos = {str(Path(event.src_path).resolve())}
+                if getattr(event, "dest_path", ""):
+                    caminhos.add(str(Path(event.dest_path).resolve()))
+                if caminhos & observados and event.event_type in ("created", "modified", "moved"):
+                    registro.agendar_recarga()
+
+        self._observador = Observer()
+        self._observador.daemon = True
+        for pasta in {caminho.parent for caminho in self.arquivos}:
+            # Sem modelo publicado ainda, a pasta é criada para ser observada
+            pasta.mkdir(parents=True, exist_ok=True)
+            self._observador.schedule(_Eventos(), str(pasta), recursive=False)
+        self._observador.start()
+
+    def parar_observador(self) -> None:
+        if self._temporizador is not None:
+            self._temporizador.cancel()
+        if self._observador is not None:
+            self._observador.stop()
+            self._observador.join()
+            self._observador = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Registro de versões do modelo com recarga a quente.")
+    parser.add_argument(
+        "acao",
+        choices=["verificar", "observar"],
+        help="verificar: carrega e testa o modelo publicado; observar: recarrega a cada mudança",
+    )
+    parser.add_argument("--modelo", default=MODEL_FILE)
+    parser.add_argument("--encoder", default=LABEL_ENCODER_FILE)
+    args = parser.parse_args()
+
+    registro = RegistroModelos(arquivos=(args.modelo, args.encoder))
+    try:
+        registro.carregar()
+    except Exception as e:
+        print(f"❌ Modelo publicado inválido: {e}")
+        raise SystemExit(1)
+    if args.acao == "verificar":
+        return
+
+    registro.iniciar_observador()
+    print(f"🔍 Observando {', '.join(str(c) for c in registro.arquivos)} (Ctrl+C para sair)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        registro.parar_observador()
+
+
+if __name__ == "__main__":
+    main()
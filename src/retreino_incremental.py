@@ -0,0 +1,381 @@
+"""
+Retreino incremental do pipeline_completa_rf com novos questionários rotulados.
+
+Em vez de refazer o pré-processamento e a floresta com todo o histórico
+(pipeline_treino.py), adiciona árvores treinadas só com o lote novo:
+1. carrega o pipeline publicado (MODEL_FILE) e o label encoder;
+2. pré-processa o lote novo com o MotorPreprocessamento e separa uma parte
+   estratificada para avaliação (holdout; --holdout 0 usa o lote inteiro);
+3. confere se os encoders ajustados cobrem o lote (categorias e classes
+   conhecidas; avisa sobre valores contínuos muito longe da média do treino);
+4. ajusta novas árvores com warm_start sobre o lote transformado pelo
+   preprocessor já ajustado (sem reajustá-lo);
+5. opcionalmente aposenta as árvores mais antigas;
+6. registra o pipeline atualizado como uma nova versão no armazenamento de
+   artefatos (meta.json, referência de drift com as contagens do lote somadas,
+   relatório com a acurácia no holdout antes e depois) e publica essa versão
+   para o app, como o pipeline_treino.py.
+
+O tempo depende só do tamanho do lote novo e do número de árvores adicionadas.
+
+Exemplo:
+    python src/retreino_incremental.py dados/novos_questionarios.csv --arvores 20
+    python src/retreino_incremental.py novos.parquet --arvores 30 --aposentar 30
+    python src/retreino_incremental.py novos.csv --holdout 0 --sem-publicar
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, classification_report
+from sklearn.model_selection import train_test_split
+
+from config import (
+    MODEL_FILE,
+    LABEL_ENCODER_FILE,
+    MAPA_COLUNAS,
+    MAPA_VALORES_COLUNA,
+    RELATORIO_RETREINO,
+    REFERENCIA_DRIFT_FILE,
+)
+from artefatos import carregar_artefatos, alinhar_colunas_modelo, hash_arquivo
+from monitor_drift import acumular_referencia, carregar_referencia
+from motor_preprocessamento import MotorPreprocessamento
+from pipeline_treino import (
+    _publicar_artefatos,
+    coluna_alvo,
+    diretorio_artefato,
+    hash_conteudo,
+    registrar_artefato,
+    salvar_relatorio,
+)
+from utils import ler_json, ler_dataset
+
+# Desvios-padrão a partir dos quais um valor contínuo é considerado fora da faixa do treino
+LIMITE_DESVIOS = 4.0
+
+
+def preparar_lote(caminho_dados, pipeline, le):
+    """
+    Pré-processa o lote bruto (formato do Obesity.csv) e retorna (X, y) com
+    as colunas do modelo e o alvo codificado pelo label encoder publicado.
+    Linhas sem rótulo são descartadas.
+    """
+    motor = MotorPreprocessamento(ler_json(MAPA_COLUNAS), ler_json(MAPA_VALORES_COLUNA))
+    df = motor.processar(ler_dataset(caminho_dados)).df
+    df = df[df[coluna_alvo].notna()]
+
+    desconhecidas = sorted(set(df[coluna_alvo].astype(str)) - set(le.classes_))
+    if desconhecidas:
+        raise ValueError(
+            f"Classes fora do label encoder: {desconhecidas}. "
+            "Novas classes exigem o treinamento completo (pipeline_treino.py)."
+        )
+    return alinhar_colunas_modelo(df, pipeline), le.transform(df[coluna_alvo].astype(str))
+
+
+def verificar_cobertura(preprocessor, X) -> tuple:
+    """
+    Confere se os passos ajustados do ColumnTransformer cobrem os dados de X.
+    Retorna (problemas, avisos):
+    - problemas: categorias que um encoder não viu no ajuste (seriam
+      codificadas como desconhecidas, sem significado para as árvores);
+    - avisos: valores contínuos a mais de LIMITE_DESVIOS desvios da média do
+      scaler (as árvores ainda os tratam, mas vale conferir o lote).
+    """
+    problemas, avisos = [], []
+    for ramo, transformer, colunas in preprocessor.transformers_:
+        if isinstance(transformer, str):
+            continue
+        passos = transformer.steps if hasattr(transformer, "steps") else [(ramo, transformer)]
+        dados = X[colunas]
+        for nome, passo in passos:
+            if hasattr(passo, "categories_"):
+                for coluna, categorias in zip(colunas, passo.categories_):
+                    valores = pd.Series(np.asarray(dados)[:, colunas.index(coluna)])
+                    conhecidos = pd.Series(categorias)
+                    novos = valores[~valores.isin(conhecidos)]
+                    if len(novos):
+                        problemas.append(
+                            f"{ramo}/{nome}: '{coluna}' com {len(novos)} linhas em categorias "
+                            f"não vistas no treino: {sorted(map(str, novos.unique()))[:5]}"
+                        )
+            if hasattr(passo, "mean_") and hasattr(passo, "scale_"):
+                desvios = np.abs((np.asarray(dados, dtype=float) - passo.mean_) / passo.scale_)
+                for coluna, fora in zip(colunas, (desvios > LIMITE_DESVIOS).sum(axis=0)):
+                    if fora:
+                        avisos.append(
+                            f"{ramo}/{nome}: '{coluna}' com {fora} linhas a mais de "
+                            f"{LIMITE_DESVIOS:g} desvios da média do treino"
+                        )
+            # As categorias desconhecidas já foram reportadas acima
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", UserWarning)
+                dados = passo.transform(dados)
+    return problemas, avisos
+
+
+def _ancoras(X_transformado, y, n_classes):
+    """
+    Linhas com peso zero para as classes ausentes do lote: o warm_start
+    recalcula classes_ a partir de y, e todas as árvores precisam das mesmas
+    classes. Com peso zero elas não mudam as contagens das folhas.
+    """
+    ausentes = np.setdiff1d(np.arange(n_classes), y)
+    if len(ausentes) == 0:
+        return X_transformado, y, np.ones(len(y))
+    X_ancoras = np.repeat(X_transformado[:1], len(ausentes), axis=0)
+    pesos = np.concatenate([np.ones(len(y)), np.zeros(len(ausentes))])
+    return np.vstack([X_transformado, X_ancoras]), np.concatenate([y, ausentes]), pesos
+
+
+def adicionar_arvores(floresta: RandomForestClassifier, X_transformado, y, n_arvores, n_classes):
+    """Ajusta n_arvores novas árvores com warm_start (as existentes não mudam)."""
+    X_ajuste, y_ajuste, pesos = _ancoras(X_transformado, y, n_classes)
+    floresta.set_params(warm_start=True, n_estimators=len(floresta.estimators_) + n_arvores)
+    floresta.fit(X_ajuste, y_ajuste, sample_weight=pesos)
+    floresta.set_params(warm_start=False)
+    return floresta
+
+
+def aposentar_arvores(floresta: RandomForestClassifier, n_arvores) -> int:
+    """Remove as n_arvores mais antigas (as primeiras de estimators_)."""
+    n_arvores = min(n_arvores, len(floresta.estimators_) - 1)
+    if n_arvores > 0:
+        floresta.estimators_ = floresta.estimators_[n_arvores:]
+        floresta.n_estimators = len(floresta.estimators_)
+    return max(n_arvores, 0)
+
+
+def salvar_atomico(objeto, caminho) -> None:
+    """joblib.dump em um temporário na mesma pasta e rename sobre o destino."""
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    descritor, temporario = tempfile.mkstemp(dir=caminho.parent, prefix=f".{caminho.name}.")
+    os.close(descritor)
+    try:
+        joblib.dump(objeto, temporario)
+        os.replace(temporario, caminho)
+    except BaseException:
+        Path(temporario).unlink(missing_ok=True)
+        raise
+
+
+def executar_retreino_incremental(
+    caminho_dados,
+    n_arvores=20,
+    aposentar=0,
+    fracao_holdout=0.2,
+    caminho_modelo=MODEL_FILE,
+    caminho_encoder=LABEL_ENCODER_FILE,
+    caminho_saida=None,
+    caminho_referencia=REFERENCIA_DRIFT_FILE,
+    publicar=True,
+    permitir_desconhecidas=False,
+    random_state=42,
+) -> dict:
+    """
+    Atualiza o pipeline com o lote em caminho_dados e o registra como uma nova
+    versão no armazenamento de artefatos (publicada se publicar). Com
+    caminho_saida, grava só o pipeline nesse arquivo, sem registrar nem publicar.
+    fracao_holdout=0 usa o lote inteiro no ajuste, sem avaliação.
+    Retorna o resumo da atualização.
+
+    Levanta ValueError se o lote tiver classes novas ou, sem
+    permitir_desconhecidas, se os encoders não cobrirem os dados.
+    """
+    inicio = time.perf_counter()
+    hash_base = hash_arquivo(caminho_modelo)
+    pipeline, le = carregar_artefatos(caminho_modelo, caminho_encoder)
+    floresta = pipeline.named_steps["model"]
+    if not isinstance(floresta, RandomForestClassifier):
+        raise ValueError(
+            f"O passo 'model' é {type(floresta).__name__}; o retreino incremental "
+            "requer o RandomForestClassifier publicado pelo pipeline_treino.py."
+        )
+    preprocessor = pipeline.named_steps["preprocessor"]
+
+    X, y = preparar_lote(caminho_dados, pipeline, le)
+    if fracao_holdout:
+        _, contagens = np.unique(y, return_counts=True)
+        estratificar = y if contagens.min() >= 2 else None
+        X_novo, X_holdout, y_novo, y_holdout = train_test_split(
+            X, y, test_size=fracao_holdout, stratify=estratificar, random_state=random_state
+        )
+    else:
+        X_novo, X_holdout, y_novo, y_holdout = X, X.iloc[:0], y, y[:0]
+
+    problemas, avisos = verificar_cobertura(preprocessor, X_novo)
+    for problema in problemas + avisos:
+        print(f"⚠️ {problema}")
+    if problemas and not permitir_desconhecidas:
+        raise ValueError(
+            "Os encoders ajustados não cobrem o lote novo; use o treinamento completo "
+            "(pipeline_treino.py) ou --permitir-desconhecidas."
+        )
+
+    avaliar = len(y_holdout) > 0
+    acuracia_antes = accuracy_score(y_holdout, pipeline.predict(X_holdout)) if avaliar else None
+    arvores_antes = len(floresta.estimators_)
+
+    inicio_ajuste = time.perf_counter()
+    adicionar_arvores(floresta, preprocessor.transform(X_novo), y_novo, n_arvores, len(le.classes_))
+    tempo_ajuste = time.perf_counter() - inicio_ajuste
+    aposentadas = aposentar_arvores(floresta, aposentar)
+
+    acuracia_depois, report_str, metricas = None, "Sem holdout: o lote inteiro foi usado no ajuste.\n", {}
+    if avaliar:
+        previsto = pipeline.predict(X_holdout)
+        acuracia_depois = accuracy_score(y_holdout, previsto)
+        parametros_report = {
+            "labels": np.arange(len(le.classes_)),
+            "target_names": le.classes_,
+            "zero_division": 0,
+        }
+        report_str = classification_report(y_holdout, previsto, **parametros_report)
+        metricas = classification_report(y_holdout, previsto, output_dict=True, **parametros_report)
+
+    resumo = {
+        "linhas_ajuste": len(X_novo),
+        "linhas_holdout": len(X_holdout),
+        "arvores_antes": arvores_antes,
+        "arvores_adicionadas": n_arvores,
+        "arvores_aposentadas": aposentadas,
+        "arvores_depois": len(floresta.estimators_),
+        "acuracia_antes": acuracia_antes,
+        "acuracia_depois": acuracia_depois,
+        "tempo_ajuste_s": tempo_ajuste,
+        "tempo_total_s": time.perf_counter() - inicio,
+        "problemas_cobertura": problemas + avisos,
+        "relatorio_classificacao": report_str,
+    }
+
+    if caminho_saida:
+        salvar_atomico(pipeline, caminho_saida)
+        resumo["modelo"] = str(caminho_saida)
+        return resumo
+
+    identificador_modelo = hash_conteudo(
+        "incremental", hash_base, hash_arquivo(caminho_dados), n_arvores, aposentar, fracao_holdout, random_state
+    )
+    referencia = None
+    if Path(caminho_referencia).exists():
+        # Mesmas faixas do treino original, com as contagens do lote novo somadas
+        referencia = acumular_referencia(carregar_referencia(caminho_referencia), X_novo)
+    else:
+        print(f"⚠️ Referência de drift não encontrada em {caminho_referencia}; a versão nova fica sem ela.")
+    meta = {
+        "modelo": identificador_modelo,
+        "dados": hash_arquivo(caminho_dados),
+        "estimador": "floresta",
+        "hiperparametros": floresta.get_params(),
+        "acuracia": acuracia_depois,
+        "metricas": metricas,
+        "tempo_treino": tempo_ajuste,
+        "classes": [str(classe) for classe in le.classes_],
+        "incremental": {
+            "modelo_base": hash_base,
+            "arvores_adicionadas": n_arvores,
+            "arvores_aposentadas": aposentadas,
+            "linhas_ajuste": len(X_novo),
+            "linhas_holdout": len(X_holdout),
+        },
+    }
+    diretorio_modelo = diretorio_artefato(identificador_modelo)
+    registrar_artefato(
+        diretorio_modelo, pipeline, le, formatar_relatorio_retreino(resumo, caminho_dados), referencia, meta
+    )
+    if publicar:
+        _publicar_artefatos(diretorio_modelo)
+    resumo["modelo"] = identificador_modelo
+    return resumo
+
+
+def formatar_relatorio_retreino(resumo, caminho_dados) -> str:
+    linhas = [
+        f"Retreino incremental com '{caminho_dados}'",
+        f"Linhas do lote: {resumo['linhas_ajuste']} para ajuste, {resumo['linhas_holdout']} para avaliação",
+        f"Árvores: {resumo['arvores_antes']} + {resumo['arvores_adicionadas']} novas "
+        f"- {resumo['arvores_aposentadas']} aposentadas = {resumo['arvores_depois']}",
+    ]
+    if resumo["acuracia_antes"] is not None:
+        linhas += [
+            f"Acurácia no holdout antes:  {resumo['acuracia_antes'] * 100:.2f}%",
+            f"Acurácia no holdout depois: {resumo['acuracia_depois'] * 100:.2f}% "
+            f"({(resumo['acuracia_depois'] - resumo['acuracia_antes']) * 100:+.2f} p.p.)",
+        ]
+    linhas.append(
+        f"Tempo de ajuste das árvores novas: {resumo['tempo_ajuste_s']:.2f}s (total {resumo['tempo_total_s']:.2f}s)"
+    )
+    if resumo["problemas_cobertura"]:
+        linhas.append("Avisos de cobertura dos encoders:")
+        linhas.extend(f"  - {problema}" for problema in resumo["problemas_cobertura"])
+    linhas.append("\nRelatório de Classificação (holdout, depois):")
+    linhas.append(resumo["relatorio_classificacao"])
+    return "\n".join(linhas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retreino incremental do Random Forest com um lote novo.")
+    parser.add_argument("dados", type=Path, help="lote rotulado no formato do Obesity.csv (csv, parquet ou feather)")
+    parser.add_argument("--arvores", type=int, default=20, help="árvores novas (padrão: %(default)s)")
+    parser.add_argument("--aposentar", type=int, default=0, help="árvores mais antigas removidas")
+    parser.add_argument(
+        "--holdout", type=float, default=0.2, help="fração do lote reservada para avaliação (0: sem avaliação)"
+    )
+    parser.add_argument(
+        "--saida",
+        type=Path,
+        default=None,
+        help="grava só o pipeline neste arquivo (padrão: nova versão no armazenamento de artefatos)",
+    )
+    parser.add_argument("--sem-publicar", action="store_true", help="registra a versão nova sem publicá-la para o app")
+    parser.add_argument(
+        "--permitir-desconhecidas",
+        action="store_true",
+        help="segue mesmo com categorias não vistas pelos encoders",
+    )
+    args = parser.parse_args()
+    if not 0 <= args.holdout < 1:
+        parser.error("--holdout deve estar em [0, 1)")
+
+    try:
+        resumo = executar_retreino_incremental(
+            args.dados,
+            n_arvores=args.arvores,
+            aposentar=args.aposentar,
+            fracao_holdout=args.holdout,
+            caminho_saida=args.saida,
+            publicar=not args.sem_publicar,
+            permitir_desconhecidas=args.permitir_desconhecidas,
+        )
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    texto = formatar_relatorio_retreino(resumo, args.dados)
+    print(texto)
+    salvar_relatorio(texto, RELATORIO_RETREINO)
+    if args.saida:
+        print(f"✅ Pipeline atualizado salvo em: {resumo['modelo']}")
+    elif args.sem_publicar:
+        print(f"✅ Modelo {resumo['modelo']} registrado (não publicado) em: {diretorio_artefato(resumo['modelo'])}")
+    else:
+        print(f"✅ Modelo {resumo['modelo']} registrado e publicado")
+    print(
+        "⚠️ O artefato memory-map e a tabela de probabilidades ficam desatualizados; "
+        "exporte-os novamente (artefato_mmap.py, tabela_probabilidades.py)."
+    )
+
+
+if __name__ == "__main__":
+    main()
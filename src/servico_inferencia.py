@@ -0,0 +1,391 @@
+"""
+Serviço HTTP (JSON) de inferência para uso máquina a máquina.
+
+Requisições simultâneas são agrupadas em micro-lotes: o primeiro registro que
+chega abre um lote, que é fechado quando atinge max_lote registros ou quando
+max_espera_ms se passa. Cada lote é avaliado com uma única chamada a
+predict_proba e a classe é derivada das probabilidades.
+
+Cada registro é validado e convertido (tipos, faixas e categorias do contrato
+de dados da fase "processado") antes de entrar na fila; registros inválidos
+recebem 400 sem afetar os demais. Se mesmo assim a avaliação de um lote
+falhar, o lote é reavaliado registro a registro e só o registro com problema
+recebe o erro.
+
+Rotas:
+    POST /prever       um registro (objeto JSON) ou uma lista de registros
+    GET  /estatisticas tamanho e latência dos lotes processados
+    GET  /metricas     latência por etapa do pipeline no formato do Prometheus
+                       (?formato=json para o JSON); requer OBESIDADE_INSTRUMENTACAO=1
+    GET  /saude        verificação simples de disponibilidade
+
+Exemplos:
+    python src/servico_inferencia.py --porta 8000 --max-lote 64 --max-espera-ms 5
+    python src/servico_inferencia.py --carga-local 2000 --concorrencia 200
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+import tornado.web
+from tornado.httpclient import AsyncHTTPClient
+from tornado.httpserver import HTTPServer
+from tornado.netutil import bind_sockets
+
+from artefatos import carregar_artefatos, alinhar_colunas_modelo
+from contrato_dados import ContratoDados
+from instrumentacao import REGISTRO, exportar_json, exportar_prometheus, instrumentar_se_ativo
+
+MAX_LOTE_PADRAO = 64
+MAX_ESPERA_MS_PADRAO = 5.0
+
+
+class MicroLote:
+    """
+    Agrupa registros enviados de forma concorrente e avalia cada lote com uma
+    única chamada a predict_proba, fora do event loop.
+    """
+
+    def __init__(
+        self,
+        pipeline,
+        le,
+        max_lote=MAX_LOTE_PADRAO,
+        max_espera_ms=MAX_ESPERA_MS_PADRAO,
+        janela_estatisticas=1000,
+        contrato=None,
+    ):
+        """contrato: ContratoDados usado no validar (padrão: fase "processado")."""
+        self.pipeline = pipeline
+        self.le = le
+        self.max_lote = max_lote
+        self.max_espera = max_espera_ms / 1000
+        self.colunas_modelo = list(pipeline.feature_names_in_)
+        contrato = contrato or ContratoDados.carregar("processado")
+        self.regras = {coluna: contrato.regras.get(coluna) for coluna in self.colunas_modelo}
+
+        self._fila = None
+        self._tarefa = None
+
+        self.total_lotes = 0
+        self.total_registros = 0
+        self._tamanhos = deque(maxlen=janela_estatisticas)
+        self._latencias_ms = deque(maxlen=janela_estatisticas)
+
+    def iniciar(self):
+        """Cria a fila e a tarefa de processamento no event loop atual."""
+        self._fila = asyncio.Queue()
+        self._tarefa = asyncio.get_running_loop().create_task(self._processar())
+
+    async def parar(self):
+        """Para o processamento; quem ainda espera na fila recebe CancelledError."""
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            try:
+                await self._tarefa
+            except asyncio.CancelledError:
+                pass
+            self._tarefa = None
+        while self._fila is not None and not self._fila.empty():
+            _, futuro = self._fila.get_nowait()
+            futuro.cancel()
+
+    def validar(self, registro):
+        """
+        Confere e converte um registro. Retorna (registro_convertido, erros):
+        erros é um dict campo -> motivo (vazio se o registro é válido). Campos
+        numéricos aceitam números ou textos numéricos dentro da faixa do
+        contrato; categóricos, só as categorias do contrato.
+        """
+        if not isinstance(registro, dict):
+            return None, {"registro": "esperado um objeto JSON"}
+
+        convertido, erros = {}, {}
+        for coluna in self.colunas_modelo:
+            valor = registro.get(coluna)
+            regra = self.regras[coluna]
+            if valor is None:
+                erros[coluna] = "ausente"
+            elif regra is None:
+                convertido[coluna] = valor
+            elif regra.tipo == "numerica":
+                try:
+                    if isinstance(valor, bool):
+                        raise ValueError
+                    numero = float(valor)
+                except (TypeError, ValueError):
+                    erros[coluna] = f"não numérico: {valor!r}"
+                    continue
+                if not math.isfinite(numero) or not regra.minimo <= numero <= regra.maximo:
+                    erros[coluna] = f"fora da faixa [{regra.minimo}, {regra.maximo}]: {valor!r}"
+                else:
+                    convertido[coluna] = numero
+            elif valor not in regra.permitidos:
+                erros[coluna] = f"categoria inválida: {valor!r}"
+            else:
+                convertido[coluna] = valor
+        return convertido, erros
+
+    async def prever(self, registro: dict) -> dict:
+        futuro = asyncio.get_running_loop().create_future()
+        await self._fila.put((registro, futuro))
+        return await futuro
+
+    async def _coletar_lote(self, lote) -> None:
+        """Preenche `lote` (recebido de fora para que um cancelamento veja o que já saiu da fila)."""
+        lote.append(await self._fila.get())
+        limite = asyncio.get_running_loop().time() + self.max_espera
+
+        while len(lote) < self.max_lote:
+            restante = limite - asyncio.get_running_loop().time()
+            if restante <= 0:
+                break
+            try:
+                lote.append(await asyncio.wait_for(self._fila.get(), restante))
+            except asyncio.TimeoutError:
+                break
+
+    def _avaliar(self, registros) -> np.ndarray:
+        with REGISTRO.medir("servico/montar_entrada", "transform", len(registros)):
+            df_input = alinhar_colunas_modelo(pd.DataFrame(registros), self.pipeline)
+        return self.pipeline.predict_proba(df_input)
+
+    def _classes(self, probabilidades) -> np.ndarray:
+        return self.le.inverse_transform(self.pipeline.classes_[np.argmax(probabilidades, axis=1)])
+
+    def _resultado(self, classe, probabilidades) -> dict:
+        return {
+            "classe": str(classe),
+            "probabilidades": dict(zip(map(str, self.le.classes_), probabilidades.tolist())),
+        }
+
+    async def _reavaliar_individualmente(self, lote) -> None:
+        """Avalia cada registro de um lote que falhou: só os registros com problema recebem o erro."""
+        loop = asyncio.get_running_loop()
+        for posicao, (registro, futuro) in enumerate(lote):
+            try:
+                probabilidades = await loop.run_in_executor(None, self._avaliar, [registro])
+            except asyncio.CancelledError:
+                for _, pendente in lote[posicao:]:
+                    pendente.cancel()
+                raise
+            except Exception as e:
+                if not futuro.done():
+                    futuro.set_exception(e)
+                continue
+            if not futuro.done():
+                futuro.set_result(self._resultado(self._classes(probabilidades)[0], probabilidades[0]))
+
+    async def _processar(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            lote = []
+            try:
+                await self._coletar_lote(lote)
+                inicio = time.perf_counter()
+                # predict_proba roda em thread para não travar o event loop
+                probabilidades = await loop.run_in_executor(
+                    None, self._avaliar, [registro for registro, _ in lote]
+                )
+            except asyncio.CancelledError:
+                for _, futuro in lote:
+                    futuro.cancel()
+                raise
+            except Exception:
+                await self._reavaliar_individualmente(lote)
+                continue
+            latencia_ms = (time.perf_counter() - inicio) * 1000
+
+            for (_, futuro), classe, proba in zip(lote, self._classes(probabilidades), probabilidades):
+                if not futuro.done():
+                    futuro.set_result(self._resultado(classe, proba))
+
+            self.total_lotes += 1
+            self.total_registros += len(lote)
+            self._tamanhos.append(len(lote))
+            self._latencias_ms.append(latencia_ms)
+
+    def estatisticas(self) -> dict:
+        """Resumo dos lotes processados (a distribuição usa a janela mais recente)."""
+        tamanhos = np.array(self._tamanhos)
+        latencias = np.array(self._latencias_ms)
+        resumo = {
+            "total_lotes": self.total_lotes,
+            "total_registros": self.total_registros,
+            "max_lote": self.max_lote,
+            "max_espera_ms": self.max_espera * 1000,
+        }
+        if len(tamanhos):
+            resumo.update(
+                {
+                    "tamanho_lote_medio": float(tamanhos.mean()),
+                    "tamanho_lote_max": int(tamanhos.max()),
+                    "latencia_lote_ms_p50": float(np.percentile(latencias, 50)),
+                    "latencia_lote_ms_p95": float(np.percentile(latencias, 95)),
+                    "latencia_lote_ms_max": float(latencias.max()),
+                }
+            )
+        return resumo
+
+
+class PreverHandler(tornado.web.RequestHandler):
+    def initialize(self, micro_lote: MicroLote):
+        self.micro_lote = micro_lote
+
+    def _responder(self, status, corpo):
+        self.set_status(status)
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+        self.finish(json.dumps(corpo, ensure_ascii=False))
+
+    async def post(self):
+        try:
+            corpo = json.loads(self.request.body)
+        except json.JSONDecodeError as e:
+            return self._responder(400, {"erro": f"JSON inválido: {e}"})
+
+        registros = []
+        for posicao, registro in enumerate(corpo if isinstance(corpo, list) else [corpo]):
+            convertido, erros = self.micro_lote.validar(registro)
+            if erros:
+                return self._responder(400, {"erro": "Registro inválido", "registro": posicao, "campos": erros})
+            registros.append(convertido)
+
+        try:
+            # Cada registro entra na fila separadamente e pode ser agrupado com
+            # registros de outras requisições
+            resultados = await asyncio.gather(*(self.micro_lote.prever(r) for r in registros))
+        except asyncio.CancelledError:
+            return self._responder(503, {"erro": "Serviço encerrando"})
+        except Exception as e:
+            return self._responder(500, {"erro": f"Erro na predição: {e}"})
+
+        self._responder(200, resultados if isinstance(corpo, list) else resultados[0])
+
+
+class EstatisticasHandler(tornado.web.RequestHandler):
+    def initialize(self, micro_lote: MicroLote):
+        self.micro_lote = micro_lote
+
+    def get(self):
+        self.write(self.micro_lote.estatisticas())
+
+
+class MetricasHandler(tornado.web.RequestHandler):
+    def get(self):
+        if self.get_argument("formato", "prometheus") == "json":
+            self.set_header("Content-Type", "application/json; charset=utf-8")
+            self.finish(json.dumps(exportar_json(), ensure_ascii=False))
+        else:
+            self.set_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.finish(exportar_prometheus())
+
+
+class SaudeHandler(tornado.web.RequestHandler):
+    def get(self):
+        self.write({"status": "ok"})
+
+
+def criar_aplicacao(micro_lote: MicroLote) -> tornado.web.Application:
+    argumentos = {"micro_lote": micro_lote}
+    return tornado.web.Application(
+        [
+            (r"/prever", PreverHandler, argumentos),
+            (r"/estatisticas", EstatisticasHandler, argumentos),
+            (r"/metricas", MetricasHandler),
+            (r"/saude", SaudeHandler),
+        ]
+    )
+
+
+async def iniciar_servidor(micro_lote: MicroLote, porta=0, endereco="127.0.0.1"):
+    """
+    Inicia o servidor no event loop atual. Com porta=0 o sistema escolhe uma
+    porta livre. Retorna (servidor, porta).
+    """
+    micro_lote.iniciar()
+    sockets = bind_sockets(porta, address=endereco)
+    servidor = HTTPServer(criar_aplicacao(micro_lote))
+    servidor.add_sockets(sockets)
+    return servidor, sockets[0].getsockname()[1]
+
+
+async def executar_carga_local(micro_lote: MicroLote, registros, concorrencia=100) -> dict:
+    """
+    Sobe o serviço em uma porta livre no próprio processo e envia os registros
+    com um cliente HTTP assíncrono, até `concorrencia` requisições em paralelo.
+    Retorna as estatísticas do serviço e a latência observada pelo cliente.
+    """
+    servidor, porta = await iniciar_servidor(micro_lote)
+    cliente = AsyncHTTPClient(max_clients=concorrencia)
+    url = f"http://127.0.0.1:{porta}/prever"
+    semaforo = asyncio.Semaphore(concorrencia)
+    latencias_ms = []
+
+    async def enviar(registro):
+        async with semaforo:
+            inicio = time.perf_counter()
+            resposta = await cliente.fetch(url, method="POST", body=json.dumps(registro))
+            latencias_ms.append((time.perf_counter() - inicio) * 1000)
+            return json.loads(resposta.body)
+
+    try:
+        inicio = time.perf_counter()
+        respostas = await asyncio.gather(*(enviar(r) for r in registros))
+        duracao = time.perf_counter() - inicio
+    finally:
+        servidor.stop()
+        await micro_lote.parar()
+
+    return {
+        "requisicoes": len(respostas),
+        "requisicoes_por_s": len(respostas) / duracao,
+        "latencia_cliente_ms_p50": float(np.percentile(latencias_ms, 50)),
+        "latencia_cliente_ms_p95": float(np.percentile(latencias_ms, 95)),
+        "servico": micro_lote.estatisticas(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serviço HTTP de inferência com micro-lotes.")
+    parser.add_argument("--porta", type=int, default=8000)
+    parser.add_argument("--endereco", default="0.0.0.0")
+    parser.add_argument("--max-lote", type=int, default=MAX_LOTE_PADRAO)
+    parser.add_argument("--max-espera-ms", type=float, default=MAX_ESPERA_MS_PADRAO)
+    parser.add_argument(
+        "--carga-local",
+        type=int,
+        default=None,
+        help="em vez de servir, envia N requisições com o cliente em processo e mostra as estatísticas",
+    )
+    parser.add_argument("--concorrencia", type=int, default=100)
+    args = parser.parse_args()
+
+    pipeline, le = carregar_artefatos()
+    instrumentar_se_ativo(pipeline)
+    micro_lote = MicroLote(pipeline, le, args.max_lote, args.max_espera_ms)
+
+    if args.carga_local:
+        from benchmarks import carregar_dados_processados, escalar_linhas
+
+        df = alinhar_colunas_modelo(carregar_dados_processados(), pipeline)
+        registros = escalar_linhas(df, args.carga_local).to_dict(orient="records")
+        resultado = asyncio.run(executar_carga_local(micro_lote, registros, args.concorrencia))
+        print(json.dumps(resultado, indent=2))
+        return
+
+    async def servir():
+        await iniciar_servidor(micro_lote, args.porta, args.endereco)
+        print(f"✅ Serviço de inferência em http://{args.endereco}:{args.porta}")
+        await asyncio.Event().wait()
+
+    asyncio.run(servir())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+"""
+Tabela pré-calculada de probabilidades para o domínio do questionário do app.
+
+Todas as entradas possíveis do formulário do app.py vêm de um domínio discreto
+(idade 1-100 e opções fixas para os demais campos). Depois do agrupamento do
+MtransGrouper e do CalcGrouper o espaço tem ~12M pontos, então o pipeline pode
+ser avaliado uma única vez para todos eles. As probabilidades ficam
+quantizadas em um arquivo binário acessado via memory-map e cada consulta vira
+um cálculo de índice O(1), sem ColumnTransformer nem floresta.
+
+Exemplos:
+    python src/tabela_probabilidades.py construir
+    python src/tabela_probabilidades.py verificar --amostras 100000
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    MODEL_FILE,
+    LABEL_ENCODER_FILE,
+    TABELA_PROBABILIDADES_FILE,
+    TABELA_PROBABILIDADES_META,
+)
+from artefatos import carregar_artefatos, alinhar_colunas_modelo, hash_arquivo
+from transformers import MtransGrouper, CalcGrouper
+
+FREQUENCIAS = ["nunca", "as_vezes", "frequentemente", "sempre"]
+
+# Opções de cada campo do formulário do app.py, na ordem dos eixos da tabela
+DOMINIO_QUESTIONARIO = {
+    "idade": list(range(1, 101)),
+    "genero": ["feminino", "masculino"],
+    "historico_familiar": ["sim", "nao"],
+    "favc": ["sim", "nao"],
+    "faf": [0, 1, 2, 3],
+    "mtrans": ["carro", "transporte_publico", "caminhando", "moto", "bicicleta"],
+    "tue": [0, 1, 2],
+    "fcvc": [1, 2, 3],
+    "caec": FREQUENCIAS,
+    "ch20": [1, 2, 3],
+    "ncp": [1, 2, 3, 4],
+    "calc": FREQUENCIAS,
+}
+
+# Campos arredondados pelo RoundingTransformer antes da codificação
+CAMPOS_ARREDONDADOS = ["fcvc", "ncp", "ch20", "faf", "tue"]
+
+# Campos cujas categorias são agrupadas dentro do pipeline
+AGRUPADORES = {"mtrans": MtransGrouper, "calc": CalcGrouper}
+
+TIPOS_QUANTIZACAO = {8: np.uint8, 16: np.uint16}
+TAMANHO_LOTE_PADRAO = 100_000
+
+
+def calcular_grupos(campo, opcoes) -> list:
+    """
+    Retorna, para cada opção do campo, o índice do seu grupo no eixo da tabela.
+    Opções que o pipeline agrupa na mesma categoria dividem o mesmo índice.
+    """
+    if campo not in AGRUPADORES:
+        return list(range(len(opcoes)))
+
+    agrupadas = AGRUPADORES[campo]().fit_transform(np.array(opcoes, dtype=object).reshape(-1, 1))
+    rotulos = list(dict.fromkeys(agrupadas.ravel()))
+    return [rotulos.index(rotulo) for rotulo in agrupadas.ravel()]
+
+
+class TabelaProbabilidades:
+    """
+    Consulta às probabilidades pré-calculadas.
+
+    dados: array (pontos x classes) quantizado, normalmente um np.memmap.
+    meta: dicionário salvo junto da tabela (campos, grupos, classes, escala).
+    """
+
+    def __init__(self, dados, meta):
+        self.dados = dados
+        self.meta = meta
+        self.classes = np.array(meta["classes"])
+        self.escala = meta["escala"]
+
+        # Para cada campo: índice das opções, grupo de cada opção e passo do eixo
+        self._eixos = []
+        passo = 1
+        for campo in reversed(meta["campos"]):
+            opcoes = meta["dominio"][campo]
+            grupos = np.array(meta["grupos"][campo], dtype=np.int64)
+            self._eixos.append((campo, pd.Index(opcoes), grupos, passo))
+            passo *= int(grupos.max()) + 1
+        self._eixos.reverse()
+
+    @classmethod
+    def carregar(
+        cls,
+        caminho=TABELA_PROBABILIDADES_FILE,
+        caminho_meta=TABELA_PROBABILIDADES_META,
+        caminho_modelo=MODEL_FILE,
+        hash_modelo=None,
+    ):
+        """
+        Abre a tabela via memory-map (somente leitura).
+
+        Se caminho_modelo for informado, confere se a tabela foi gerada a partir
+        do mesmo arquivo de modelo e levanta ValueError caso esteja desatualizada.
+        hash_modelo: confere contra esse hash (ex: o da versão do modelo em
+        memória) em vez de ler caminho_modelo.
+        """
+        with open(caminho_meta, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        if hash_modelo is None and caminho_modelo is not None:
+            hash_modelo = hash_arquivo(caminho_modelo)
+        if hash_modelo is not None and hash_modelo != meta["hash_modelo"]:
+            raise ValueError(
+                f"A tabela '{caminho}' foi gerada a partir de outro modelo. "
+                "Execute novamente: python src/tabela_probabilidades.py construir"
+            )
+
+        dados = np.memmap(
+            caminho,
+            dtype=meta["dtype"],
+            mode="r",
+            shape=(meta["pontos"], len(meta["classes"])),
+        )
+        return cls(dados, meta)
+
+    def indices(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Calcula a posição de cada linha de df na tabela.
+        Linhas com algum valor fora do domínio do questionário recebem -1.
+        """
+        indice = np.zeros(len(df), dtype=np.int64)
+        validos = np.ones(len(df), dtype=bool)
+
+        for campo, opcoes, grupos, passo in self._eixos:
+            valores = df[campo].to_numpy()
+            if campo in CAMPOS_ARREDONDADOS:
+                valores = np.round(pd.to_numeric(valores, errors="coerce"))
+            posicao = opcoes.get_indexer(valores)
+            validos &= posicao >= 0
+            indice += grupos[posicao] * passo
+
+        indice[~validos] = -1
+        return indice
+
+    def consultar(self, df: pd.DataFrame):
+        """
+        Retorna (probabilidades, validos).
+
+        probabilidades: array float64 (linhas x classes), na ordem de self.classes.
+        Linhas fora do domínio (validos == False) ficam com NaN e devem ser
+        calculadas pelo pipeline.
+        """
+        indice = self.indices(df)
+        validos = indice >= 0
+
+        proba = np.full((len(df), len(self.classes)), np.nan)
+        proba[validos] = self.dados[indice[validos]] / self.escala
+        return proba, validos
+
+
+def _eixos_construcao():
+    """Retorna, para cada campo, as opções representantes de cada grupo."""
+    representantes = {}
+    grupos = {}
+    for campo, opcoes in DOMINIO_QUESTIONARIO.items():
+        grupos[campo] = calcular_grupos(campo, opcoes)
+        representantes[campo] = [
+            opcoes[grupos[campo].index(g)] for g in range(max(grupos[campo]) + 1)
+        ]
+    return representantes, grupos
+
+
+def decodificar_indices(indices, representantes) -> pd.DataFrame:
+    """Converte posições da tabela em linhas do questionário (inverso de indices)."""
+    restante = np.asarray(indices, dtype=np.int64).copy()
+    colunas = {}
+    for campo in reversed(list(representantes)):
+        opcoes = np.asarray(representantes[campo])
+        colunas[campo] = opcoes[restante % len(opcoes)]
+        restante //= len(opcoes)
+    return pd.DataFrame({campo: colunas[campo] for campo in representantes})
+
+
+# Estado de cada processo do pool de construção
+_estado_worker = {}
+
+
+def _inicializar_worker(caminho_modelo, caminho_encoder, caminho_tabela, dtype, pontos, n_classes, escala):
+    pipeline, _ = carregar_artefatos(caminho_modelo, caminho_encoder)
+    _estado_worker["pipeline"] = pipeline
+    _estado_worker["representantes"], _ = _eixos_construcao()
+    _estado_worker["escala"] = escala
+    _estado_worker["dados"] = np.memmap(
+        caminho_tabela, dtype=dtype, mode="r+", shape=(pontos, n_classes)
+    )
+
+
+def _construir_lote(inicio, fim) -> int:
+    pipeline = _estado_worker["pipeline"]
+    dados = _estado_worker["dados"]
+
+    df_lote = decodificar_indices(np.arange(inicio, fim), _estado_worker["representantes"])
+    proba = pipeline.predict_proba(alinhar_colunas_modelo(df_lote, pipeline))
+    dados[inicio:fim] = np.rint(proba * _estado_worker["escala"])
+    dados.flush()
+    return fim - inicio
+
+
+def construir_tabela(
+    caminho=TABELA_PROBABILIDADES_FILE,
+    caminho_meta=TABELA_PROBABILIDADES_META,
+    caminho_modelo=MODEL_FILE,
+    caminho_encoder=LABEL_ENCODER_FILE,
+    bits=16,
+    tamanho_lote=TAMANHO_LOTE_PADRAO,
+    processos=None,
+) -> dict:
+    """
+    Avalia o pipeline em todo o domínio do questionário, em lotes vetorizados
+    distribuídos entre processos, e grava a tabela quantizada e seus metadados.
+    """
+    _, le = carregar_artefatos(caminho_modelo, caminho_encoder)
+    representantes, grupos = _eixos_construcao()
+
+    pontos = int(np.prod([len(valores) for valores in representantes.values()]))
+    dtype = np.dtype(TIPOS_QUANTIZACAO[bits])
+    escala = int(np.iinfo(dtype).max)
+    n_classes = len(le.classes_)
+    processos = processos or os.cpu_count() or 1
+
+    print(
+        f"Construindo tabela com {pontos} pontos x {n_classes} classes "
+        f"({pontos * n_classes * dtype.itemsize / 1e6:.0f} MB, {dtype.name})..."
+    )
+    inicio_construcao = time.perf_counter()
+
+    for destino in (caminho, caminho_meta):
+        Path(destino).parent.mkdir(parents=True, exist_ok=True)
+    # Cria o arquivo com o tamanho final; os processos escrevem cada um o seu trecho
+    np.memmap(caminho, dtype=dtype, mode="w+", shape=(pontos, n_classes)).flush()
+
+    concluidos = 0
+    with ProcessPoolExecutor(
+        max_workers=processos,
+        initializer=_inicializar_worker,
+        initargs=(caminho_modelo, caminho_encoder, caminho, dtype.name, pontos, n_classes, escala),
+    ) as executor:
+        lotes = range(0, pontos, tamanho_lote)
+        futuros = [
+            executor.submit(_construir_lote, inicio, min(inicio + tamanho_lote, pontos))
+            for inicio in lotes
+        ]
+        for futuro in futuros:
+            concluidos += futuro.result()
+            print(f"  {concluidos}/{pontos} pontos", end="\r")
+
+    meta = {
+        "campos": list(DOMINIO_QUESTIONARIO),
+        "dominio": DOMINIO_QUESTIONARIO,
+        "grupos": grupos,
+        "classes": [str(classe) for classe in le.classes_],
+        "pontos": pontos,
+        "dtype": dtype.name,
+        "escala": escala,
+        "hash_modelo": hash_arquivo(caminho_modelo),
+    }
+    with open(caminho_meta, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    duracao = time.perf_counter() - inicio_construcao
+    print(f"\n✅ Tabela salva em '{caminho}' ({duracao:.1f}s)")
+    return meta
+
+
+def verificar_tabela(
+    caminho=TABELA_PROBABILIDADES_FILE,
+    caminho_meta=TABELA_PROBABILIDADES_META,
+    caminho_modelo=MODEL_FILE,
+    caminho_encoder=LABEL_ENCODER_FILE,
+    amostras=100_000,
+    semente=42,
+) -> dict:
+    """
+    Compara consultas à tabela com predições do pipeline para entradas
+    aleatórias do domínio (incluindo as categorias que o pipeline agrupa).
+
+    A verificação passa se o erro absoluto máximo for no máximo meio passo de
+    quantização e se a classe prevista só divergir em empates dentro desse erro.
+    """
+    pipeline, le = carregar_artefatos(caminho_modelo, caminho_encoder)
+    tabela = TabelaProbabilidades.carregar(caminho, caminho_meta, caminho_modelo)
+
+    rng = np.random.default_rng(semente)
+    df = pd.DataFrame(
+        {
+            campo: np.array(opcoes, dtype=object)[rng.integers(0, len(opcoes), amostras)]
+            for campo, opcoes in DOMINIO_QUESTIONARIO.items()
+        }
+    )
+    df = df.infer_objects()
+
+    inicio = time.perf_counter()
+    proba_tabela, validos = tabela.consultar(df)
+    tempo_tabela = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    proba_pipeline = pipeline.predict_proba(alinhar_colunas_modelo(df, pipeline))
+    tempo_pipeline = time.perf_counter() - inicio
+
+    tolerancia = 0.5 / tabela.escala + 1e-12
+    erro_maximo = float(np.abs(proba_tabela - proba_pipeline).max())
+
+    classe_tabela = np.argmax(proba_tabela, axis=1)
+    classe_pipeline = np.argmax(proba_pipeline, axis=1)
+    divergentes = classe_tabela != classe_pipeline
+    # Divergência só é aceitável se as duas classes estiverem empatadas dentro do erro
+    diferenca_empate = np.abs(
+        proba_pipeline[divergentes, classe_pipeline[divergentes]]
+        - proba_pipeline[divergentes, classe_tabela[divergentes]]
+    )
+    divergencias_reais = int((diferenca_empate > 2 * tolerancia).sum())
+
+    resultado = {
+        "amostras": amostras,
+        "fora_do_dominio": int((~validos).sum()),
+        "erro_maximo": erro_maximo,
+        "tolerancia": tolerancia,
+        "classes_divergentes": int(divergentes.sum()),
+        "divergencias_reais": divergencias_reais,
+        "tempo_tabela_s": tempo_tabela,
+        "tempo_pipeline_s": tempo_pipeline,
+        "ok": bool(validos.all() and erro_maximo <= tolerancia and divergencias_reais == 0),
+    }
+
+    print(json.dumps(resultado, indent=2))
+    print("✅ Tabela consistente com o pipeline." if resultado["ok"] else "❌ Tabela divergente do pipeline.")
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Tabela pré-calculada de probabilidades do questionário."
+    )
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    construir = subparsers.add_parser("construir", help="avalia o pipeline em todo o domínio")
+    construir.add_argument("--bits", type=int, choices=sorted(TIPOS_QUANTIZACAO), default=16)
+    construir.add_argument("--tamanho-lote", type=int, default=TAMANHO_LOTE_PADRAO)
+    construir.add_argument("--processos", type=int, default=None)
+
+    verificar = subparsers.add_parser("verificar", help="compara a tabela com o pipeline")
+    verificar.add_argument("--amostras", type=int, default=100_000)
+    verificar.add_argument("--semente", type=int, default=42)
+
+    args = parser.parse_args()
+    if args.comando == "construir":
+        construir_tabela(bits=args.bits, tamanho_lote=args.tamanho_lote, processos=args.processos)
+    else:
+        resultado = verificar_tabela(amostras=args.amostras, semente=args.semente)
+        raise SystemExit(0 if resultado["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,52 +3,145 @@ import pandas as pd
 from sklearn.base import BaseEstimator, TransformerMixin
 
 
-class MtransGrouper(BaseEstimator, TransformerMixin):
-    """Agrupa as categorias raras de 'mtrans'."""
+# Abaixo deste número de linhas a tabela é aplicada com um dicionário, que
+# tem custo fixo menor que o pd.Index.get_indexer
+LIMITE_ENTRADA_PEQUENA = 64
+
+
+def _como_array(X, dtype=None) -> np.ndarray:
+    """Converte a entrada para ndarray sem cópia quando possível."""
+    if isinstance(X, (pd.DataFrame, pd.Series)):
+        return X.to_numpy(dtype=dtype)
+    return np.asarray(X, dtype=dtype)
+
+
+class _AgrupadorCategorias(TransformerMixin, BaseEstimator):
+    """
+    Base dos agrupadores de categorias raras.
+
+    No fit aprende uma tabela categoria -> código do grupo (int8) a partir das
+    categorias observadas e do dicionário `agrupamento` da classe. No transform
+    aplica a tabela com indexação NumPy:
+    - saida="categoria" (padrão): retorna o nome do grupo, como as versões
+      anteriores, para manter compatíveis os encoders do pipeline;
+    - saida="codigo": retorna o código int8 do grupo (-1 para categorias novas).
+
+    Categorias que não estavam na tabela são mantidas como vieram (saida="categoria").
+    """
+
+    agrupamento = {}
+    nome_saida = None
+
+    def __init__(self, saida="categoria"):
+        self.saida = saida
+
+    def _montar_tabela(self, observadas):
+        categorias = list(dict.fromkeys([*self.agrupamento, *observadas]))
+        destinos = [self.agrupamento.get(categoria, categoria) for categoria in categorias]
+        grupos = list(dict.fromkeys(destinos))
+
+        self.categorias_ = np.array(categorias, dtype=object)
+        self.grupos_ = np.array(grupos, dtype=object)
+        # O último elemento é a sentinela usada para categorias desconhecidas (posição -1)
+        self.codigos_ = np.array([grupos.index(d) for d in destinos] + [-1], dtype=np.int8)
+        self._indice = pd.Index(self.categorias_)
+        self._posicoes = {categoria: i for i, categoria in enumerate(categorias)}
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        # Pipelines salvos antes da tabela de códigos não têm esses atributos
+        self.__dict__.setdefault("saida", "categoria")
+        if "categorias_" not in self.__dict__:
+            self._montar_tabela([])
 
     def fit(self, X, y=None):
+        valores = _como_array(X).reshape(-1)
+        self._montar_tabela(pd.unique(valores[pd.notna(valores)]))
         return self
 
     def transform(self, X):
-        X_array = np.asarray(X)
-        X_series = pd.Series(X_array.flatten(), name="mtrans")
-        mtrans_agrupado = X_series.replace(
-            ["moto", "bicicleta", "caminhando"], "outros"
-        )
-        return mtrans_agrupado.values.reshape(-1, 1)
+        valores = _como_array(X).reshape(-1)
+        if len(valores) < LIMITE_ENTRADA_PEQUENA:
+            posicao = np.fromiter(
+                (self._posicoes.get(valor, -1) for valor in valores), np.intp, len(valores)
+            )
+        else:
+            posicao = self._indice.get_indexer(valores)
+        codigos = self.codigos_[posicao]
+
+        if self.saida == "codigo":
+            return codigos.reshape(-1, 1)
+
+        agrupado = self.grupos_[codigos]
+        desconhecidas = posicao < 0
+        if desconhecidas.any():
+            agrupado[desconhecidas] = valores[desconhecidas]
+        return agrupado.reshape(-1, 1)
 
     def get_feature_names_out(self, input_features=None):
         if input_features is None:
-            return ["mtrans_grouped"]
+            return [self.nome_saida]
         return input_features
 
 
-class CalcGrouper(BaseEstimator, TransformerMixin):
+class MtransGrouper(_AgrupadorCategorias):
+    """Agrupa as categorias raras de 'mtrans'."""
+
+    agrupamento = {"moto": "outros", "bicicleta": "outros", "caminhando": "outros"}
+    nome_saida = "mtrans_grouped"
+
+
+class CalcGrouper(_AgrupadorCategorias):
     """Agrupa as categorias raras de 'calc'."""
 
-    def fit(self, X, y=None):
-        return self
+    agrupamento = {"sempre": "frequentemente"}
+    nome_saida = "calc_grouped"
 
-    def transform(self, X):
-        X_array = np.asarray(X)
-        X_series = pd.Series(X_array.flatten(), name="calc")
-        sempre_freq = X_series.replace("sempre", "frequentemente")
-        return sempre_freq.values.reshape(-1, 1)
 
-    def get_feature_names_out(self, input_features=None):
-        if input_features is None:
-            return ["calc_grouped"]
-        return input_features
+class RoundingTransformer(TransformerMixin, BaseEstimator):
+    """
+    Arredonda os dados sintéticos (ex: 2.45 -> 2)
 
+    O fit escolhe o menor tipo inteiro que comporta os valores de treino
+    (normalmente int8). Valores fora desse tipo ou não finitos no transform
+    usam int64, como as versões anteriores.
+    """
 
-class RoundingTransformer(BaseEstimator, TransformerMixin):
-    """Arredonda os dados sintéticos (ex: 2.45 -> 2)"""
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        # Pipelines salvos antes do fit aprender o tipo de saída
+        self.__dict__.setdefault("dtype_", np.dtype(np.int8))
 
     def fit(self, X, y=None):
+        arredondado = np.rint(_como_array(X, dtype=np.float64))
+        finitos = arredondado[np.isfinite(arredondado)]
+        self.dtype_ = np.dtype(np.int8)
+        if finitos.size:
+            for tipo in (np.int8, np.int16, np.int32, np.int64):
+                limites = np.iinfo(tipo)
+                if limites.min <= finitos.min() and finitos.max() <= limites.max:
+                    self.dtype_ = np.dtype(tipo)
+                    break
         return self
 
+    def _cabe_no_tipo(self, arredondado) -> bool:
+        if arredondado.size == 0:
+            return True
+        limites = np.iinfo(self.dtype_)
+        return bool(
+            np.isfinite(arredondado).all()
+            and limites.min <= arredondado.min()
+            and arredondado.max() <= limites.max
+        )
+
     def transform(self, X, **kwargs):
-        return np.round(X).astype(int)
+        arredondado = np.rint(_como_array(X, dtype=np.float64))
+        tipo = self.dtype_ if self._cabe_no_tipo(arredondado) else np.int64
+        saida = arredondado.astype(tipo)
+
+        if isinstance(X, pd.DataFrame):
+            return pd.DataFrame(saida, index=X.index, columns=X.columns, copy=False)
+        return saida
 
     def get_feature_names_out(self, input_features=None):
         if input_features is None:
@@ -20,6 +20,182 @@ def criar_csv_de_dataframe(df, nome_arquivo) -> None:
         print(f"❌ Erro ao salvar: {e}")
 
 
+# Formatos suportados por ler_dataset/salvar_dataset, pela extensão do arquivo
+FORMATOS_DATASET = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".feather": "feather",
+    ".arrow": "feather",
+}
+
+
+def formato_dataset(caminho) -> str:
+    """Retorna o formato ('csv', 'parquet' ou 'feather') pela extensão do arquivo."""
+    sufixo = Path(caminho).suffix.lower()
+    if sufixo not in FORMATOS_DATASET:
+        raise ValueError(
+            f"Extensão '{sufixo}' não suportada. Use uma de: {sorted(FORMATOS_DATASET)}"
+        )
+    return FORMATOS_DATASET[sufixo]
+
+
+def _para_tabela_arrow(df: pd.DataFrame):
+    """Converte para Arrow com as colunas de texto codificadas como dicionário."""
+    import pyarrow as pa
+
+    colunas_texto = [
+        coluna for coluna in df.columns if pd.api.types.is_object_dtype(df[coluna].dtype)
+    ]
+    if colunas_texto:
+        df = df.astype({coluna: "category" for coluna in colunas_texto})
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def ler_dataset(caminho, colunas=None, memory_map=True) -> pd.DataFrame:
+    """
+    Lê um dataset em csv, parquet ou feather (Arrow IPC) pela extensão.
+
+    colunas: lê apenas essas colunas (nos formatos colunares as demais nem são
+    carregadas do disco).
+
+    memory_map: nos formatos Arrow, mapeia o arquivo em memória em vez de
+    copiá-lo. Colunas codificadas como dicionário viram pandas Categorical.
+    """
+    formato = formato_dataset(caminho)
+
+    if formato == "csv":
+        return pd.read_csv(caminho, usecols=colunas)
+
+    if formato == "parquet":
+        import pyarrow.parquet as pq
+
+        tabela = pq.read_table(caminho, columns=colunas, memory_map=memory_map)
+    else:
+        import pyarrow.feather as feather
+
+        tabela = feather.read_table(caminho, columns=colunas, memory_map=memory_map)
+    return tabela.to_pandas()
+
+
+def ler_dataset_em_blocos(caminho, tamanho_bloco, colunas=None):
+    """Gera DataFrames de até tamanho_bloco linhas, sem carregar o arquivo inteiro."""
+    formato = formato_dataset(caminho)
+
+    if formato == "csv":
+        yield from pd.read_csv(caminho, usecols=colunas, chunksize=tamanho_bloco)
+
+    elif formato == "parquet":
+        import pyarrow.parquet as pq
+
+        arquivo = pq.ParquetFile(caminho, memory_map=True)
+        for lote in arquivo.iter_batches(batch_size=tamanho_bloco, columns=colunas):
+            yield lote.to_pandas()
+
+    else:
+        import pyarrow as pa
+
+        # Com memory-map os lotes apontam para o arquivo, sem cópia para a memória
+        with pa.memory_map(str(caminho)) as fonte:
+            tabela = pa.ipc.open_file(fonte).read_all()
+            if colunas is not None:
+                tabela = tabela.select(colunas)
+            for inicio in range(0, tabela.num_rows, tamanho_bloco):
+                yield tabela.slice(inicio, tamanho_bloco).to_pandas()
+
+
+def salvar_dataset(df, caminho) -> None:
+    """
+    Salva o DataFrame em csv, parquet ou feather (Arrow IPC) pela extensão.
+    Nos formatos Arrow as colunas de texto/categóricas são gravadas como dicionário.
+    O feather é gravado sem compressão para poder ser lido com memory-map.
+    """
+    formato = formato_dataset(caminho)
+    Path(caminho).parent.mkdir(parents=True, exist_ok=True)
+    if formato == "csv":
+        criar_csv_de_dataframe(df, caminho)
+        return
+
+    try:
+        tabela = _para_tabela_arrow(df)
+        if formato == "parquet":
+            import pyarrow.parquet as pq
+
+            pq.write_table(tabela, caminho)
+        else:
+            import pyarrow.feather as feather
+
+            feather.write_feather(tabela, caminho, compression="uncompressed")
+        print(f"✅ DataFrame salvo com sucesso em '{caminho}'")
+    except Exception as e:
+        print(f"❌ Erro ao salvar: {e}")
+
+
+class EscritorDataset:
+    """
+    Grava blocos de DataFrames em sequência em um único arquivo csv, parquet ou
+    feather, sem manter os blocos anteriores em memória.
+
+    Todos os blocos devem ter as mesmas colunas e tipos (nas colunas
+    categóricas, as mesmas categorias).
+
+    vazio: DataFrame sem linhas com as colunas e tipos da saída; se nenhum
+    bloco for escrito, fechar() grava o arquivo só com ele (cabeçalho no csv,
+    esquema no parquet/feather). Sem ele o arquivo é criado sem colunas.
+    """
+
+    def __init__(self, caminho, vazio: pd.DataFrame = None):
+        self.caminho = caminho
+        self.vazio = vazio
+        self.formato = formato_dataset(caminho)
+        Path(caminho).parent.mkdir(parents=True, exist_ok=True)
+        self._arquivo = None
+        self._escritor = None
+        self._escreveu = False
+
+    def escrever(self, df: pd.DataFrame) -> None:
+        self._escreveu = True
+        if self.formato == "csv":
+            if self._arquivo is None:
+                self._arquivo = open(self.caminho, "w", encoding="utf-8", newline="")
+                df.to_csv(self._arquivo, index=False)
+            else:
+                df.to_csv(self._arquivo, header=False, index=False)
+            return
+
+        tabela = _para_tabela_arrow(df)
+        if self._escritor is None:
+            if self.formato == "parquet":
+                import pyarrow.parquet as pq
+
+                self._escritor = pq.ParquetWriter(self.caminho, tabela.schema)
+            else:
+                import pyarrow as pa
+
+                self._escritor = pa.ipc.new_file(str(self.caminho), tabela.schema)
+        self._escritor.write_table(tabela)
+
+    def fechar(self) -> None:
+        if not self._escreveu:
+            # Entrada vazia: o arquivo existe e é legível, só que sem linhas
+            self.escrever(self.vazio if self.vazio is not None else pd.DataFrame())
+        if self._arquivo is not None:
+            self._arquivo.close()
+            self._arquivo = None
+        if self._escritor is not None:
+            self._escritor.close()
+            self._escritor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo_excecao, *exc):
+        if tipo_excecao is not None and not self._escreveu:
+            # Falhou antes do primeiro bloco: não deixa um arquivo vazio "válido"
+            return
+        self.fechar()
+
+
 def renomear_colunas(df: pd.DataFrame, mapa_renomeacao: dict = None) -> pd.DataFrame:
     """
     Renomeia as colunas de um DataFrame utilizando um dicionário fornecido
@@ -105,20 +281,30 @@ def ler_json(caminho_ou_url: str) -> dict:
 
 
 def validar_processamento(df_orig, df_proc, mapa_cols, mapa_vals):
-    """Realiza um sanity check para garantir a qualidade dos dados processados."""
+    """
+    Realiza um sanity check para garantir a qualidade dos dados processados,
+    usando o contrato de dados (contrato_dados.py) montado a partir dos mapas.
+    Retorna o RelatorioContrato.
+    """
+    from contrato_dados import ContratoDados
+
     print("\n🔍 Iniciando validação dos dados...")
+    relatorio = ContratoDados.de_mapas(mapa_cols, mapa_vals, fase="processado", opcionais=()).validar(
+        df_proc
+    )
 
     # Teste de Colunas
-    colunas_esperadas = list(mapa_cols.values())
-    faltam_colunas = [col for col in colunas_esperadas if col not in df_proc.columns]
-
-    if not faltam_colunas:
+    if not relatorio.colunas_ausentes:
         print("✅ Sucesso: Todas as colunas foram renomeadas.")
     else:
-        print(f"⚠️ Atenção: Colunas não encontradas: {faltam_colunas}")
+        print(f"⚠️ Atenção: Colunas não encontradas: {relatorio.colunas_ausentes}")
 
     # Teste de Integridade de Linhas
-    if len(df_orig) == len(df_proc):
-        print(f"✅ Sucesso: Integridade de linhas mantida ({len(df_proc)} linhas).")
+    if len(df_orig) == relatorio.linhas:
+        print(f"✅ Sucesso: Integridade de linhas mantida ({relatorio.linhas} linhas).")
     else:
         print(f"❌ Erro: O número de linhas mudou!")
+
+    # Regras de tipos, categorias, faixas e nulos
+    print(relatorio.formatar())
+    return relatorio
@@ -0,0 +1,51 @@
+import contextlib
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+# Os módulos de src/ se importam pelo nome (python src/<script>.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+
+@pytest.fixture(scope="session")
+def dados_processados():
+    from config import DADOS_PROCESSADOS
+    from utils import ler_dataset
+
+    return ler_dataset(DADOS_PROCESSADOS)
+
+
+@pytest.fixture(scope="session")
+def modelo_treinado(dados_processados):
+    """
+    (pipeline, le, X_teste) de uma floresta pequena treinada no dataset
+    processado versionado, sem depender dos artefatos em models/.
+    """
+    from pipeline_treino import criar_pipeline, separar_treino_teste
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        X_treino, X_teste, y_treino, _, le = separar_treino_teste(dados_processados)
+    pipeline = criar_pipeline({"n_estimators": 10, "n_jobs": 1})
+    pipeline.fit(X_treino, y_treino)
+    return pipeline, le, X_teste
+
+
+@pytest.fixture
+def destinos(tmp_path, monkeypatch):
+    """Armazenamento e caminhos publicados do treinamento em uma pasta temporária."""
+    import pipeline_treino
+
+    destinos = {
+        "ARTEFATOS_DIR": tmp_path / "artefatos",
+        "CACHE_PIPELINE_DIR": tmp_path / "cache",
+        "DADOS_PROCESSADOS": tmp_path / "processado.csv",
+        "MODEL_FILE": tmp_path / "pipeline.joblib",
+        "LABEL_ENCODER_FILE": tmp_path / "le.joblib",
+        "RELATORIO_MODELO": tmp_path / "relatorio.txt",
+        "REFERENCIA_DRIFT_FILE": tmp_path / "referencia_drift.json",
+    }
+    for nome, caminho in destinos.items():
+        monkeypatch.setattr(pipeline_treino, nome, caminho)
+    return destinos
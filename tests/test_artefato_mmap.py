@@ -0,0 +1,57 @@
+import os
+
+import joblib
+import numpy as np
+import pytest
+
+import artefato_mmap
+from artefato_mmap import carregar_artefato_mmap, exportar_artefato_mmap, verificar_artefato_mmap
+
+
+@pytest.fixture
+def exportado(tmp_path, modelo_treinado):
+    pipeline, le, _ = modelo_treinado
+    caminho_modelo = tmp_path / "pipeline.joblib"
+    joblib.dump(pipeline, caminho_modelo)
+    diretorio = tmp_path / "mmap"
+    exportar_artefato_mmap(pipeline, le, diretorio, caminho_modelo)
+    return diretorio, caminho_modelo
+
+
+@pytest.fixture
+def modelos_hasheados(monkeypatch):
+    """Caminhos do modelo de origem passados ao hash_arquivo do artefato_mmap."""
+    chamadas = []
+    original = artefato_mmap.hash_arquivo
+
+    def contar(caminho):
+        if str(caminho).endswith("pipeline.joblib"):
+            chamadas.append(caminho)
+        return original(caminho)
+
+    monkeypatch.setattr(artefato_mmap, "hash_arquivo", contar)
+    return chamadas
+
+
+def test_carregamento_rapido_nao_le_o_modelo(exportado, modelos_hasheados, modelo_treinado):
+    diretorio, caminho_modelo = exportado
+    pipeline, _ = carregar_artefato_mmap(diretorio, caminho_modelo=caminho_modelo)
+    assert modelos_hasheados == []
+
+    original, _, X_teste = modelo_treinado
+    np.testing.assert_array_equal(pipeline.predict_proba(X_teste), original.predict_proba(X_teste))
+
+    assert verificar_artefato_mmap(diretorio, completo=True, caminho_modelo=caminho_modelo) == []
+    assert len(modelos_hasheados) == 1
+
+
+def test_modelo_alterado(exportado, modelos_hasheados):
+    diretorio, caminho_modelo = exportado
+    # Mesmo conteúdo com outro mtime (ex: publicado de novo): confere pelo hash
+    os.utime(caminho_modelo, ns=(0, 0))
+    assert verificar_artefato_mmap(diretorio, completo=False, caminho_modelo=caminho_modelo) == []
+    assert len(modelos_hasheados) == 1
+
+    caminho_modelo.write_bytes(b"outro modelo")
+    with pytest.raises(ValueError, match="outro modelo"):
+        carregar_artefato_mmap(diretorio, caminho_modelo=caminho_modelo)
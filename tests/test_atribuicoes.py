@@ -0,0 +1,36 @@
+import contextlib
+import io
+
+import numpy as np
+import pytest
+
+from atribuicoes import ExplicadorFloresta
+from compactacao_floresta import compactar_floresta
+from pipeline_treino import separar_treino_teste
+
+
+@pytest.fixture(scope="module")
+def pipeline_compacto(dados_processados, modelo_treinado):
+    pipeline, _, _ = modelo_treinado
+    with contextlib.redirect_stdout(io.StringIO()):
+        X_treino, _, y_treino, _, _ = separar_treino_teste(dados_processados)
+        return compactar_floresta(pipeline, X_treino, y_treino, tipo_valores="uint8")
+
+
+@pytest.mark.parametrize("compacto", [False, True])
+def test_base_mais_contribuicoes_igual_predict_proba(compacto, modelo_treinado, pipeline_compacto):
+    pipeline, _, X_teste = modelo_treinado
+    if compacto:
+        pipeline = pipeline_compacto
+    explicador = ExplicadorFloresta(pipeline)
+
+    base, contribuicoes = explicador.explicar(X_teste)
+    np.testing.assert_allclose(base + contribuicoes.sum(axis=1), pipeline.predict_proba(X_teste), atol=1e-9)
+
+    # Sem classes, a classe explicada é a prevista pelo modelo (linhas sem empate)
+    probabilidades = np.sort(pipeline.predict_proba(X_teste), axis=1)
+    sem_empate = probabilidades[:, -1] - probabilidades[:, -2] > 1e-6
+    prevista = np.argmax(pipeline.predict_proba(X_teste), axis=1)
+    selecionadas = explicador.contribuicoes_classe(X_teste).to_numpy()
+    esperadas = contribuicoes[np.arange(len(X_teste)), :, prevista]
+    np.testing.assert_allclose(selecionadas[sem_empate], esperadas[sem_empate])
@@ -0,0 +1,70 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+import auditoria
+from auditoria import AuditoriaPredicoes, ler_auditoria
+
+
+def _registrar(registro, linhas=3):
+    df = pd.DataFrame({"idade": np.arange(linhas, dtype=float), "genero": ["Female"] * linhas})
+    return registro.registrar(df, np.full((linhas, 2), 0.5), ["a"] * linhas, "modelo_x", classes=["a", "b"])
+
+
+def test_arquivo_rotacionado_pela_idade_ja_e_legivel_antes_de_fechar(tmp_path):
+    registro = AuditoriaPredicoes(tmp_path, tamanho_lote=3, intervalo_gravacao=0.01, idade_arquivo=0.2).iniciar()
+    try:
+        _registrar(registro)
+        _registrar(registro)
+        for _ in range(200):
+            if registro.estatisticas()["gravados"] == 6:
+                break
+            threading.Event().wait(0.01)
+        # Sem fechar (como em um processo morto): o arquivo rotacionado já está completo
+        df = ler_auditoria(tmp_path)
+        assert len(df) == 6
+        assert not list(tmp_path.glob(f"*{auditoria.EXTENSAO_PARCIAL}"))
+    finally:
+        registro.fechar()
+    assert registro.estatisticas()["arquivos"] == 1
+
+
+def test_lotes_viram_row_groups_do_mesmo_arquivo(tmp_path):
+    import pyarrow.parquet as pq
+
+    registro = AuditoriaPredicoes(tmp_path, tamanho_lote=3, intervalo_gravacao=0.01).iniciar()
+    _registrar(registro)
+    threading.Event().wait(0.1)
+    _registrar(registro)
+    threading.Event().wait(0.1)
+    # Enquanto aberto, o arquivo fica como .parcial e não é lido
+    assert ler_auditoria(tmp_path).empty
+    registro.fechar()
+
+    (arquivo,) = tmp_path.glob("predicoes_*.parquet")
+    assert pq.ParquetFile(arquivo).num_row_groups == 2
+    assert len(ler_auditoria(tmp_path)) == 6
+
+
+def test_rotaciona_pelo_tamanho(tmp_path):
+    registro = AuditoriaPredicoes(tmp_path, tamanho_lote=3, intervalo_gravacao=0.01, tamanho_arquivo=1).iniciar()
+    _registrar(registro)
+    _registrar(registro)
+    registro.fechar()
+    assert registro.estatisticas()["arquivos"] == 2
+    assert len(ler_auditoria(tmp_path)) == 6
+
+
+def test_fechar_com_fila_cheia_conta_descartes(tmp_path, monkeypatch):
+    liberar = threading.Event()
+    monkeypatch.setattr(AuditoriaPredicoes, "_gravar_lote", lambda self, lote: liberar.wait(5))
+    registro = AuditoriaPredicoes(tmp_path, max_fila=2, tamanho_lote=1, intervalo_gravacao=0.01).iniciar()
+    try:
+        _registrar(registro, linhas=1)
+        threading.Event().wait(0.1)  # a thread pega o registro e trava na gravação
+        assert _registrar(registro, linhas=2)
+        registro.fechar(timeout=0.1)
+        assert registro.estatisticas()["descartados"] == 2
+    finally:
+        liberar.set()
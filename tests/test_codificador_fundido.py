@@ -0,0 +1,82 @@
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cenarios import SimuladorCenarios
+from codificador_fundido import compilar, casos_borda, fundir_pipeline
+from pipeline_treino import criar_pipeline, criar_preprocessador, separar_treino_teste
+
+
+def assert_identico_bit_a_bit(preprocessor, X):
+    esperado = preprocessor.transform(X).astype(np.float32)
+    obtido = compilar(preprocessor).transform(X)
+    assert obtido.dtype == np.float32
+    assert obtido.shape == esperado.shape
+    np.testing.assert_array_equal(obtido.view(np.uint32), esperado.view(np.uint32))
+
+
+@pytest.fixture(scope="module", params=[False, True], ids=["one_hot", "categorias_nativas"])
+def preprocessor(request, modelo_treinado):
+    _, _, X_teste = modelo_treinado
+    return criar_preprocessador(categorias_nativas=request.param).fit(X_teste)
+
+
+@pytest.fixture(scope="module")
+def X(dados_processados, modelo_treinado):
+    pipeline, _, _ = modelo_treinado
+    return dados_processados[list(pipeline.feature_names_in_)]
+
+
+def test_dataset(preprocessor, X):
+    assert_identico_bit_a_bit(preprocessor, X)
+
+
+@pytest.mark.parametrize("linhas", [1, 3])
+def test_poucas_linhas(preprocessor, X, linhas):
+    # Entradas pequenas usam o caminho com dict em vez do searchsorted
+    assert_identico_bit_a_bit(preprocessor, X.iloc[:linhas])
+
+
+def test_casos_borda(preprocessor, X):
+    escaladas = [op.coluna for op in compilar(preprocessor).operacoes if op.tipo == "escala"]
+    assert_identico_bit_a_bit(preprocessor, casos_borda(X, escaladas))
+
+
+def test_entrada_categorica(preprocessor, X):
+    categorica = X.copy()
+    for coluna in categorica.columns:
+        if not pd.api.types.is_numeric_dtype(categorica[coluna]):
+            categorica[coluna] = categorica[coluna].astype("category")
+    assert_identico_bit_a_bit(preprocessor, categorica)
+    assert_identico_bit_a_bit(preprocessor, categorica.iloc[:1])
+
+
+def test_infinito_rejeitado_como_no_preprocessor(preprocessor, X):
+    escaladas = [op.coluna for op in compilar(preprocessor).operacoes if op.tipo == "escala"]
+    assert escaladas
+    for coluna in escaladas:
+        infinito = X.head(1).copy()
+        infinito[coluna] = np.inf
+        with pytest.raises(ValueError):
+            preprocessor.transform(infinito)
+        with pytest.raises(ValueError):
+            compilar(preprocessor).transform(infinito)
+
+
+def test_fundir_so_com_floresta(dados_processados, modelo_treinado):
+    pipeline, le, X_teste = modelo_treinado
+    fundido = fundir_pipeline(pipeline)
+    np.testing.assert_array_equal(fundido.predict_proba(X_teste), pipeline.predict_proba(X_teste))
+
+    # O HistGradientBoosting discretiza em float64: fundido, mudaria as probabilidades
+    with contextlib.redirect_stdout(io.StringIO()):
+        X_treino, _, y_treino, _, _ = separar_treino_teste(dados_processados)
+    hgb = criar_pipeline({"max_iter": 10}, estimador="hgb").fit(X_treino, y_treino)
+    with pytest.raises(ValueError, match="HistGradientBoostingClassifier"):
+        fundir_pipeline(hgb)
+    # Pontuação em lote e cenários seguem com o pipeline original
+    simulador = SimuladorCenarios(hgb, le)
+    np.testing.assert_array_equal(simulador.pipeline.predict_proba(X_teste), hgb.predict_proba(X_teste))
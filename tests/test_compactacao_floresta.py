@@ -0,0 +1,26 @@
+import json
+
+import joblib
+
+from compactacao_floresta import avaliar_modelo, compactar_floresta, registrar_compacto
+from pipeline_treino import _publicar_artefatos
+
+
+def test_publicar_registra_versao_do_compacto(destinos, modelo_treinado):
+    pipeline, le, X_teste = modelo_treinado
+    joblib.dump(pipeline, destinos["MODEL_FILE"])
+    y = pipeline.predict(X_teste)
+    compacto = compactar_floresta(pipeline, X_teste, y, tipo_valores="float32")
+    avaliacao = avaliar_modelo(compacto, X_teste, y, le, repeticoes=1, linhas_lote=1000)
+
+    diretorio = registrar_compacto(
+        compacto, le, "original", "dados", X_teste, {**avaliacao, "tempo_compactacao": 0.1}, {}, "relatório"
+    )
+    _publicar_artefatos(diretorio)
+
+    meta = json.loads((diretorio / "meta.json").read_text(encoding="utf-8"))
+    assert meta["compactacao"]["modelo_base"] == "original"
+    assert meta["acuracia"] == avaliacao["acuracia"]
+    assert destinos["MODEL_FILE"].read_bytes() == (diretorio / "pipeline.joblib").read_bytes()
+    assert destinos["RELATORIO_MODELO"].read_text(encoding="utf-8") == "relatório"
+    assert destinos["REFERENCIA_DRIFT_FILE"].exists()
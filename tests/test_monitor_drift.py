@@ -0,0 +1,43 @@
+import json
+import threading
+
+from monitor_drift import MonitorDrift, construir_referencia
+
+
+def test_gravacoes_concorrentes_do_estado(tmp_path, modelo_treinado):
+    _, _, X_teste = modelo_treinado
+    caminho = tmp_path / "drift.json"
+    monitor = MonitorDrift(construir_referencia(X_teste), caminho_estado=caminho, salvar_a_cada=1)
+    erros = []
+
+    def predicoes():
+        try:
+            for posicao in range(50):
+                monitor.atualizar(X_teste.iloc[[posicao]])
+        except Exception as e:
+            erros.append(e)
+
+    threads = [threading.Thread(target=predicoes) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not erros
+    assert json.loads(caminho.read_text())["linhas"] == 8 * 50
+    assert [p.name for p in tmp_path.iterdir()] == ["drift.json"]
+
+
+def test_salvar_por_intervalo(tmp_path, modelo_treinado):
+    _, _, X_teste = modelo_treinado
+    caminho = tmp_path / "drift.json"
+    monitor = MonitorDrift(
+        construir_referencia(X_teste), caminho_estado=caminho, salvar_a_cada=1000, intervalo_salvamento=3600
+    )
+    monitor.atualizar(X_teste.iloc[:10])
+    assert not caminho.exists()
+
+    monitor.intervalo_salvamento = 0
+    monitor.atualizar(X_teste.iloc[:10])
+    assert json.loads(caminho.read_text())["linhas"] == 20
+    assert MonitorDrift(construir_referencia(X_teste), caminho_estado=caminho).linhas == 20
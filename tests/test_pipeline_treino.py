@@ -0,0 +1,36 @@
+import pytest
+
+import pipeline_treino
+from contrato_dados import ContratoDados
+
+
+def test_falha_ao_salvar_nao_registra_nem_publica(destinos, monkeypatch):
+    def falhar(*args, **kwargs):
+        raise OSError("disco cheio")
+
+    monkeypatch.setattr(pipeline_treino.joblib, "dump", falhar)
+    with pytest.raises(OSError, match="disco cheio"):
+        pipeline_treino.executar_treinamento(hiperparametros={"n_estimators": 5}, usar_cache_pipeline=False)
+
+    assert not list(destinos["ARTEFATOS_DIR"].glob("modelo_*"))
+    assert not list(destinos["ARTEFATOS_DIR"].glob(".tmp_*"))
+    assert not destinos["MODEL_FILE"].exists()
+
+
+def test_treinamento_publica_artefatos(destinos):
+    meta = pipeline_treino.executar_treinamento(hiperparametros={"n_estimators": 5}, usar_cache_pipeline=False)
+    assert (destinos["ARTEFATOS_DIR"] / f"modelo_{meta['modelo']}" / "meta.json").exists()
+    for nome in ("MODEL_FILE", "LABEL_ENCODER_FILE", "RELATORIO_MODELO", "REFERENCIA_DRIFT_FILE"):
+        assert destinos[nome].exists()
+
+    # O dataset processado mantém as colunas fora do modelo (altura, peso...) e segue o contrato
+    relatorio = ContratoDados.carregar("processado").validar_arquivo(destinos["DADOS_PROCESSADOS"])
+    assert relatorio.ok, relatorio.formatar()
+
+
+def test_salvar_artefatos_cria_a_pasta(tmp_path, modelo_treinado):
+    pipeline, le, _ = modelo_treinado
+    destino = tmp_path / "models_novo"
+    pipeline_treino.salvar_artefatos(pipeline, le, destino / "pipeline.joblib", destino / "le.joblib")
+    pipeline_treino.salvar_relatorio("ok", destino / "relatorio.txt")
+    assert sorted(arquivo.name for arquivo in destino.iterdir()) == ["le.joblib", "pipeline.joblib", "relatorio.txt"]
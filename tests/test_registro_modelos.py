@@ -0,0 +1,95 @@
+import json
+import time
+
+import pytest
+
+from artefatos import hash_arquivo
+from monitor_drift import construir_referencia, salvar_referencia
+from registro_modelos import RegistroModelos
+from tabela_probabilidades import TabelaProbabilidades
+
+
+def test_versao_revertida_nao_volta_dos_arquivos(tmp_path, modelo_treinado):
+    pipeline, le, _ = modelo_treinado
+    arquivos = [tmp_path / "pipeline.joblib", tmp_path / "le.joblib"]
+
+    def publicar(conteudo):
+        for arquivo in arquivos:
+            arquivo.write_text(conteudo)
+
+    registro = RegistroModelos(lambda: (pipeline, le), arquivos=arquivos)
+    publicar("v1")
+    registro.carregar()
+    v1 = registro.atual().identificador
+    publicar("v2")
+    registro.carregar()
+    v2 = registro.atual().identificador
+
+    assert registro.reverter().identificador == v1
+    assert registro.revertida == v2
+    # Os arquivos ainda são os da v2 (ex: evento do watchdog): nada muda
+    assert not registro.carregar()
+    assert registro.atual().identificador == v1
+
+    assert registro.carregar(forcar=True)
+    assert registro.atual().identificador == v2
+    assert registro.revertida is None
+
+
+def test_nova_publicacao_depois_de_reverter(tmp_path, modelo_treinado):
+    pipeline, le, _ = modelo_treinado
+    arquivo = tmp_path / "pipeline.joblib"
+    registro = RegistroModelos(lambda: (pipeline, le), arquivos=[arquivo])
+    for conteudo in ("v1", "v2"):
+        arquivo.write_text(conteudo)
+        registro.carregar()
+    registro.reverter()
+
+    arquivo.write_text("v3")
+    assert registro.carregar()
+    assert registro.revertida is None
+
+
+def test_versao_guarda_hashes_e_referencia(tmp_path, modelo_treinado):
+    pipeline, le, X_teste = modelo_treinado
+    arquivo = tmp_path / "pipeline.joblib"
+    caminho_referencia = tmp_path / "referencia_drift.json"
+    arquivo.write_text("v1")
+    salvar_referencia(construir_referencia(X_teste), caminho_referencia)
+
+    registro = RegistroModelos(lambda: (pipeline, le), arquivos=[arquivo], caminho_referencia=caminho_referencia)
+    registro.carregar()
+    versao = registro.atual()
+    assert versao.hash_de(arquivo) == hash_arquivo(arquivo)
+    assert versao.referencia_drift["linhas"] == len(X_teste)
+
+    # Publicar outra referência é uma versão nova; a anterior mantém a sua
+    salvar_referencia(construir_referencia(X_teste.head(10)), caminho_referencia)
+    assert registro.carregar()
+    assert registro.atual().referencia_drift["linhas"] == 10
+    assert versao.referencia_drift["linhas"] == len(X_teste)
+
+
+def test_observador_carrega_o_primeiro_modelo_publicado(tmp_path, modelo_treinado):
+    pipeline, le, _ = modelo_treinado
+    arquivo = tmp_path / "models" / "pipeline.joblib"
+    registro = RegistroModelos(lambda: (pipeline, le), arquivos=[arquivo], espera_eventos=0.05)
+    with pytest.raises(RuntimeError):
+        registro.atual()
+    registro.iniciar_observador()
+    try:
+        arquivo.write_text("v1")
+        for _ in range(200):
+            if registro.versoes():
+                break
+            time.sleep(0.02)
+        assert registro.atual().hash_de(arquivo) == hash_arquivo(arquivo)
+    finally:
+        registro.parar_observador()
+
+
+def test_tabela_de_outro_modelo_rejeitada(tmp_path):
+    caminho_meta = tmp_path / "tabela.json"
+    caminho_meta.write_text(json.dumps({"hash_modelo": "abc"}))
+    with pytest.raises(ValueError, match="outro modelo"):
+        TabelaProbabilidades.carregar(tmp_path / "tabela.bin", caminho_meta, caminho_modelo=None, hash_modelo="def")
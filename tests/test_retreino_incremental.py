@@ -0,0 +1,62 @@
+import json
+
+import joblib
+import pandas as pd
+import pytest
+
+from config import DADOS_TREINO
+from monitor_drift import construir_referencia, salvar_referencia
+from retreino_incremental import executar_retreino_incremental
+
+
+@pytest.fixture
+def publicado(destinos, modelo_treinado, tmp_path):
+    """Modelo publicado (com referência de drift) e um lote novo no formato do Obesity.csv."""
+    pipeline, le, X_teste = modelo_treinado
+    joblib.dump(pipeline, destinos["MODEL_FILE"])
+    joblib.dump(le, destinos["LABEL_ENCODER_FILE"])
+    salvar_referencia(construir_referencia(X_teste), destinos["REFERENCIA_DRIFT_FILE"])
+    lote = tmp_path / "lote.csv"
+    pd.read_csv(DADOS_TREINO).sample(200, random_state=0).to_csv(lote, index=False)
+    return destinos, lote
+
+
+def _retreinar(destinos, lote, **kwargs):
+    return executar_retreino_incremental(
+        lote,
+        n_arvores=3,
+        caminho_modelo=destinos["MODEL_FILE"],
+        caminho_encoder=destinos["LABEL_ENCODER_FILE"],
+        caminho_referencia=destinos["REFERENCIA_DRIFT_FILE"],
+        **kwargs,
+    )
+
+
+def test_registra_versao_nova_e_publica(publicado):
+    destinos, lote = publicado
+    referencia_antes = json.loads(destinos["REFERENCIA_DRIFT_FILE"].read_text(encoding="utf-8"))
+    resumo = _retreinar(destinos, lote)
+
+    diretorio = destinos["ARTEFATOS_DIR"] / f"modelo_{resumo['modelo']}"
+    meta = json.loads((diretorio / "meta.json").read_text(encoding="utf-8"))
+    assert meta["incremental"]["arvores_adicionadas"] == 3
+    assert meta["acuracia"] == resumo["acuracia_depois"]
+    for arquivo in ("pipeline.joblib", "label_encoder.joblib", "relatorio.txt", "referencia_drift.json"):
+        assert (diretorio / arquivo).exists()
+
+    # A versão registrada é a publicada, e a referência de drift soma o lote de ajuste
+    assert destinos["MODEL_FILE"].read_bytes() == (diretorio / "pipeline.joblib").read_bytes()
+    referencia = json.loads(destinos["REFERENCIA_DRIFT_FILE"].read_text(encoding="utf-8"))
+    assert referencia["linhas"] == referencia_antes["linhas"] + resumo["linhas_ajuste"]
+
+
+def test_holdout_zero_usa_o_lote_inteiro(publicado):
+    destinos, lote = publicado
+    publicado_antes = destinos["MODEL_FILE"].read_bytes()
+    resumo = _retreinar(destinos, lote, fracao_holdout=0, publicar=False)
+
+    assert resumo["linhas_holdout"] == 0
+    assert resumo["linhas_ajuste"] == 200
+    assert resumo["acuracia_depois"] is None
+    assert (destinos["ARTEFATOS_DIR"] / f"modelo_{resumo['modelo']}" / "meta.json").exists()
+    assert destinos["MODEL_FILE"].read_bytes() == publicado_antes
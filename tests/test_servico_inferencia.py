@@ -0,0 +1,72 @@
+import asyncio
+import json
+
+import pytest
+from tornado.testing import AsyncHTTPTestCase, gen_test
+
+from registro_modelos import LINHA_TESTE
+from servico_inferencia import MicroLote, criar_aplicacao
+
+
+@pytest.fixture(autouse=True, scope="class")
+def _modelo(request, modelo_treinado):
+    request.cls.pipeline, request.cls.le, _ = modelo_treinado
+
+
+class TestServicoInferencia(AsyncHTTPTestCase):
+    def get_app(self):
+        self.micro_lote = MicroLote(self.pipeline, self.le, max_lote=16, max_espera_ms=20)
+        self.io_loop.run_sync(self._iniciar)
+        return criar_aplicacao(self.micro_lote)
+
+    async def _iniciar(self):
+        self.micro_lote.iniciar()
+
+    def tearDown(self):
+        self.io_loop.run_sync(self.micro_lote.parar)
+        super().tearDown()
+
+    def _prever(self, corpo):
+        resposta = self.fetch("/prever", method="POST", body=json.dumps(corpo), raise_error=False)
+        return resposta.code, json.loads(resposta.body)
+
+    def test_registro_valido(self):
+        codigo, corpo = self._prever(LINHA_TESTE)
+        assert codigo == 200
+        assert corpo["classe"] in self.le.classes_
+        assert sum(corpo["probabilidades"].values()) == pytest.approx(1.0)
+
+    def test_texto_numerico_convertido(self):
+        codigo, _ = self._prever({**LINHA_TESTE, "idade": "30"})
+        assert codigo == 200
+
+    def test_registro_invalido_400(self):
+        for campo, valor in [("idade", "abc"), ("idade", 500), ("faf", True), ("mtrans", "foguete"), ("genero", None)]:
+            codigo, corpo = self._prever({**LINHA_TESTE, campo: valor})
+            assert codigo == 400, (campo, valor)
+            assert list(corpo["campos"]) == [campo]
+
+    def test_lista_com_registro_invalido(self):
+        codigo, corpo = self._prever([LINHA_TESTE, {**LINHA_TESTE, "idade": "abc"}])
+        assert codigo == 400
+        assert corpo["registro"] == 1
+
+    @gen_test
+    async def test_falha_no_lote_afeta_so_o_registro_ruim(self):
+        # Registro que passa direto pela fila (sem validar) e quebra o predict_proba
+        ruim = {**LINHA_TESTE, "idade": "abc"}
+        bom, erro = await asyncio.gather(
+            self.micro_lote.prever(LINHA_TESTE), self.micro_lote.prever(ruim), return_exceptions=True
+        )
+        assert bom["classe"] in self.le.classes_
+        assert isinstance(erro, ValueError)
+
+    @gen_test
+    async def test_parar_cancela_registros_pendentes(self):
+        micro_lote = MicroLote(self.pipeline, self.le, max_lote=100, max_espera_ms=10_000)
+        micro_lote.iniciar()
+        pendentes = [asyncio.ensure_future(micro_lote.prever(LINHA_TESTE)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        await micro_lote.parar()
+        resultados = await asyncio.gather(*pendentes, return_exceptions=True)
+        assert all(isinstance(r, asyncio.CancelledError) for r in resultados)
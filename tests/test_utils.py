@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+
+from utils import EscritorDataset, ler_dataset, salvar_dataset
+
+
+@pytest.mark.parametrize("extensao", ["csv", "parquet", "feather"])
+def test_escritores_criam_a_pasta(tmp_path, extensao):
+    df = pd.DataFrame({"idade": [21.0, 30.0], "genero": ["feminino", "masculino"]})
+
+    caminho = tmp_path / "nova" / f"dados.{extensao}"
+    salvar_dataset(df, caminho)
+    pd.testing.assert_frame_equal(ler_dataset(caminho), df, check_dtype=False, check_categorical=False)
+
+    caminho = tmp_path / "outra" / f"blocos.{extensao}"
+    with EscritorDataset(caminho) as escritor:
+        escritor.escrever(df)
+    assert len(ler_dataset(caminho)) == 2
+
+
+@pytest.mark.parametrize("extensao", ["csv", "parquet", "feather"])
+def test_escritor_sem_blocos_grava_arquivo_vazio(tmp_path, extensao):
+    vazio = pd.DataFrame({"classe": pd.Categorical([], categories=["a", "b"]), "prob_a": pd.Series([], dtype=float)})
+
+    caminho = tmp_path / f"vazio.{extensao}"
+    with EscritorDataset(caminho, vazio):
+        pass
+    lido = ler_dataset(caminho)
+    assert len(lido) == 0
+    assert list(lido.columns) == ["classe", "prob_a"]
+
+    # Sem o modelo das colunas, o arquivo existe e é legível
+    caminho = tmp_path / f"sem_colunas.{extensao}"
+    EscritorDataset(caminho).fechar()
+    assert caminho.exists()
+    if extensao != "csv":
+        assert ler_dataset(caminho).empty